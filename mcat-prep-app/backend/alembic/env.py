@@ -20,6 +20,9 @@ from app.models import (
     UserStudyProgress,
     UserGoal,
     ReviewQueue,
+    UserDailySectionStats,
+    UserMetricTotals,
+    CohortSketchBin,
 )
 
 # this is the Alembic Config object, which provides
@@ -0,0 +1,195 @@
+"""Partition user_question_attempts by month on attempted_at
+
+Revision ID: 9d4f7a2c3e18
+Revises: 5b2e8c1d4a70
+Create Date: 2026-10-18 11:40:03.518204
+
+Rebuilds user_question_attempts as a RANGE-partitioned table with one partition
+per calendar month (UTC) plus a default partition, and copies the existing rows
+across. The copy rewrites the whole table, so run it in a maintenance window.
+
+- The primary key becomes (id, attempted_at); Postgres requires the partition key
+  in every unique constraint. attempted_at is therefore NOT NULL now.
+- review_queue.last_attempt_id can no longer be a foreign key (it would have to
+  reference the full primary key) and is kept as a plain column.
+- Indexes are declared on the parent, so every partition, including ones created
+  later, gets them: (user_id, attempted_at) for per-user analytics and exports,
+  plus question_id and test_attempt_id. The low-selectivity is_correct and the
+  standalone attempted_at indexes are dropped; partition pruning covers time ranges.
+- create_user_question_attempt_partitions(months_ahead, from_month) creates any
+  missing monthly partitions and is safe to call repeatedly. It is scheduled daily
+  through pg_cron when that extension is installed; otherwise run
+  scripts/maintain_partitions.py from cron, which also detaches old partitions.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '9d4f7a2c3e18'
+down_revision = '5b2e8c1d4a70'
+branch_labels = None
+depends_on = None
+
+PARTITION_MONTHS_AHEAD = 3
+
+CREATE_PARTITIONS_FUNCTION = """
+CREATE OR REPLACE FUNCTION create_user_question_attempt_partitions(
+    months_ahead integer DEFAULT 3,
+    from_month date DEFAULT date_trunc('month', now() AT TIME ZONE 'UTC')::date
+) RETURNS integer
+LANGUAGE plpgsql AS $$
+DECLARE
+    month_start date := date_trunc('month', from_month)::date;
+    last_month date := (date_trunc('month', now() AT TIME ZONE 'UTC') + make_interval(months => months_ahead))::date;
+    partition_name text;
+    created integer := 0;
+BEGIN
+    WHILE month_start <= last_month LOOP
+        partition_name := format('user_question_attempts_%s', to_char(month_start, 'YYYY_MM'));
+        IF to_regclass(partition_name) IS NULL THEN
+            -- Fails if the default partition already holds rows for this month;
+            -- keep partitions created ahead of time so that never happens.
+            EXECUTE format(
+                'CREATE TABLE %I PARTITION OF user_question_attempts FOR VALUES FROM (%L) TO (%L)',
+                partition_name,
+                month_start::timestamp AT TIME ZONE 'UTC',
+                (month_start + interval '1 month')::timestamp AT TIME ZONE 'UTC'
+            );
+            created := created + 1;
+        END IF;
+        month_start := (month_start + interval '1 month')::date;
+    END LOOP;
+    RETURN created;
+END
+$$;
+"""
+
+ATTEMPT_COLUMNS = (
+    "id, user_id, question_id, test_attempt_id, selected_answer, is_correct, time_spent_seconds, "
+    "is_flagged, is_reviewed, attempt_mode, attempted_at, confidence_level, notes"
+)
+
+
+def _attempt_columns():
+    return [
+        sa.Column('id', sa.UUID(), nullable=False),
+        sa.Column('user_id', sa.UUID(), nullable=False),
+        sa.Column('question_id', sa.UUID(), nullable=False),
+        sa.Column('test_attempt_id', sa.UUID(), nullable=True),
+        sa.Column('selected_answer', sa.String(length=1), nullable=False),
+        sa.Column('is_correct', sa.Boolean(), nullable=False),
+        sa.Column('time_spent_seconds', sa.Integer(), nullable=False),
+        sa.Column('is_flagged', sa.Boolean(), nullable=True),
+        sa.Column('is_reviewed', sa.Boolean(), nullable=True),
+        sa.Column('attempt_mode', sa.String(length=20), nullable=False),
+        sa.Column('attempted_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+        sa.Column('confidence_level', sa.Integer(), nullable=True),
+        sa.Column('notes', sa.Text(), nullable=True),
+        sa.CheckConstraint("selected_answer IN ('A', 'B', 'C', 'D', 'X')", name='check_selected_answer'),
+        sa.CheckConstraint('confidence_level >= 1 AND confidence_level <= 5 OR confidence_level IS NULL', name='check_confidence'),
+        sa.ForeignKeyConstraint(['question_id'], ['questions.id'], ),
+        sa.ForeignKeyConstraint(['test_attempt_id'], ['user_test_attempts.id'], ),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+    ]
+
+
+def upgrade() -> None:
+    op.drop_constraint('review_queue_last_attempt_id_fkey', 'review_queue', type_='foreignkey')
+
+    # Move the old table out of the way, freeing its index and constraint names
+    op.rename_table('user_question_attempts', 'user_question_attempts_unpartitioned')
+    op.drop_constraint('user_question_attempts_pkey', 'user_question_attempts_unpartitioned', type_='primary')
+    for column in ('user_id', 'test_attempt_id', 'question_id', 'is_correct', 'attempted_at'):
+        op.drop_index(f'ix_user_question_attempts_{column}', table_name='user_question_attempts_unpartitioned')
+
+    op.create_table('user_question_attempts',
+    *_attempt_columns(),
+    sa.PrimaryKeyConstraint('id', 'attempted_at'),
+    postgresql_partition_by='RANGE (attempted_at)'
+    )
+    op.create_index('ix_user_question_attempts_user_id_attempted_at', 'user_question_attempts', ['user_id', 'attempted_at'], unique=False)
+    op.create_index(op.f('ix_user_question_attempts_question_id'), 'user_question_attempts', ['question_id'], unique=False)
+    op.create_index(op.f('ix_user_question_attempts_test_attempt_id'), 'user_question_attempts', ['test_attempt_id'], unique=False)
+
+    op.execute(CREATE_PARTITIONS_FUNCTION)
+    op.execute(
+        f"""
+        SELECT create_user_question_attempt_partitions(
+            {PARTITION_MONTHS_AHEAD},
+            COALESCE(
+                (SELECT min(attempted_at) AT TIME ZONE 'UTC' FROM user_question_attempts_unpartitioned),
+                now() AT TIME ZONE 'UTC'
+            )::date
+        )
+        """
+    )
+    op.execute("CREATE TABLE user_question_attempts_default PARTITION OF user_question_attempts DEFAULT")
+
+    op.execute(
+        f"""
+        INSERT INTO user_question_attempts ({ATTEMPT_COLUMNS})
+        SELECT {ATTEMPT_COLUMNS.replace('attempted_at', 'COALESCE(attempted_at, now())')}
+        FROM user_question_attempts_unpartitioned
+        """
+    )
+    op.drop_table('user_question_attempts_unpartitioned')
+
+    op.execute(
+        f"""
+        DO $$
+        BEGIN
+            IF EXISTS (SELECT 1 FROM pg_extension WHERE extname = 'pg_cron') THEN
+                PERFORM cron.schedule(
+                    'user-question-attempt-partitions',
+                    '17 3 * * *',
+                    'SELECT create_user_question_attempt_partitions({PARTITION_MONTHS_AHEAD})'
+                );
+            END IF;
+        END
+        $$
+        """
+    )
+
+
+def downgrade() -> None:
+    op.execute(
+        """
+        DO $$
+        BEGIN
+            IF EXISTS (SELECT 1 FROM pg_extension WHERE extname = 'pg_cron') THEN
+                PERFORM cron.unschedule(jobid) FROM cron.job WHERE jobname = 'user-question-attempt-partitions';
+            END IF;
+        END
+        $$
+        """
+    )
+
+    op.rename_table('user_question_attempts', 'user_question_attempts_partitioned')
+    op.drop_constraint('user_question_attempts_pkey', 'user_question_attempts_partitioned', type_='primary')
+    op.drop_index('ix_user_question_attempts_user_id_attempted_at', table_name='user_question_attempts_partitioned')
+    op.drop_index(op.f('ix_user_question_attempts_question_id'), table_name='user_question_attempts_partitioned')
+    op.drop_index(op.f('ix_user_question_attempts_test_attempt_id'), table_name='user_question_attempts_partitioned')
+
+    op.create_table('user_question_attempts',
+    *_attempt_columns(),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.alter_column('user_question_attempts', 'attempted_at', nullable=True)
+    op.execute(
+        f"""
+        INSERT INTO user_question_attempts ({ATTEMPT_COLUMNS})
+        SELECT {ATTEMPT_COLUMNS} FROM user_question_attempts_partitioned
+        """
+    )
+    # Dropping the parent drops every attached partition; detached ones are left alone
+    op.drop_table('user_question_attempts_partitioned')
+    op.execute("DROP FUNCTION IF EXISTS create_user_question_attempt_partitions(integer, date)")
+
+    op.create_index(op.f('ix_user_question_attempts_attempted_at'), 'user_question_attempts', ['attempted_at'], unique=False)
+    op.create_index(op.f('ix_user_question_attempts_is_correct'), 'user_question_attempts', ['is_correct'], unique=False)
+    op.create_index(op.f('ix_user_question_attempts_question_id'), 'user_question_attempts', ['question_id'], unique=False)
+    op.create_index(op.f('ix_user_question_attempts_test_attempt_id'), 'user_question_attempts', ['test_attempt_id'], unique=False)
+    op.create_index(op.f('ix_user_question_attempts_user_id'), 'user_question_attempts', ['user_id'], unique=False)
+    op.create_foreign_key(
+        'review_queue_last_attempt_id_fkey', 'review_queue', 'user_question_attempts', ['last_attempt_id'], ['id']
+    )
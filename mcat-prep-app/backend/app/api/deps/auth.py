@@ -9,13 +9,8 @@ from app.models.user import User
 security = HTTPBearer()
 
 
-async def get_current_user(
-    credentials: HTTPAuthorizationCredentials = Depends(security),
-    db: Session = Depends(get_db),
-) -> User:
-    """Get current authenticated user from JWT token"""
-
-    token = credentials.credentials
+def user_id_from_token(token: str) -> UUID:
+    """Validate an access token and return the user id it was issued for"""
 
     # Decode token
     payload = decode_token(token)
@@ -44,7 +39,7 @@ async def get_current_user(
         )
 
     try:
-        user_id = UUID(user_id_str)
+        return UUID(user_id_str)
     except ValueError:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -52,6 +47,22 @@ async def get_current_user(
             headers={"WWW-Authenticate": "Bearer"},
         )
 
+
+async def get_current_user_id(
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+) -> UUID:
+    """Get current user ID from the JWT alone, without loading the user from the database"""
+    return user_id_from_token(credentials.credentials)
+
+
+async def get_current_user(
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    db: Session = Depends(get_db),
+) -> User:
+    """Get current authenticated user from JWT token"""
+
+    user_id = user_id_from_token(credentials.credentials)
+
     # Get user from database
     user = db.query(User).filter(User.id == user_id).first()
     if user is None:
@@ -0,0 +1,56 @@
+import time
+from typing import Dict
+from fastapi import Depends
+from uuid import UUID
+from redis.exceptions import RedisError
+from app.core.config import settings
+from app.core.database import open_read_session, replica_engines
+from app.core.redis_client import redis_client
+from app.api.deps.auth import get_current_user
+from app.models.user import User
+
+# This worker's own pins, so its reads are consistent even while Redis is unreachable
+_local_pins: Dict[UUID, float] = {}
+
+
+def _pin_key(user_id: UUID) -> str:
+    return f"db:primary-pin:{user_id}"
+
+
+def pin_to_primary(user_id: UUID) -> None:
+    """Keep the user's reads on the primary until replicas have caught up with a write"""
+    if not replica_engines:
+        return
+    now = time.monotonic()
+    if len(_local_pins) > 10_000:
+        for pinned_user_id, expires in list(_local_pins.items()):
+            if expires <= now:
+                del _local_pins[pinned_user_id]
+    _local_pins[user_id] = now + settings.READ_YOUR_WRITES_SECONDS
+    try:
+        redis_client.set(_pin_key(user_id), 1, ex=settings.READ_YOUR_WRITES_SECONDS)
+    except RedisError:
+        pass
+
+
+def is_pinned_to_primary(user_id: UUID) -> bool:
+    if not replica_engines:
+        return False
+    expires = _local_pins.get(user_id)
+    if expires is not None:
+        if expires > time.monotonic():
+            return True
+        del _local_pins[user_id]
+    try:
+        return bool(redis_client.exists(_pin_key(user_id)))
+    except RedisError:
+        return False
+
+
+def get_read_db(current_user: User = Depends(get_current_user)):
+    """Get a read-only database session, served by a replica where possible"""
+    db = open_read_session(use_primary=is_pinned_to_primary(current_user.id))
+    try:
+        yield db
+    finally:
+        db.close()
@@ -0,0 +1,140 @@
+"""
+Token-bucket rate limiting for expensive endpoints
+
+Each (route, client) pair has a bucket of RATE_LIMIT_<ROUTE>_BURST tokens that
+refills at RATE_LIMIT_<ROUTE>_PER_MINUTE. The bucket lives in a Redis hash and
+is refilled and spent by one Lua script using the Redis clock, so all workers
+share it and a check costs a single round trip. After a Redis error each worker
+uses its own in-memory buckets with the same budget for
+RATE_LIMIT_REDIS_RETRY_SECONDS before trying Redis again, so an outage costs
+one timeout per interval rather than one per request.
+
+The dependencies are plain functions, so FastAPI runs them (and their blocking
+Redis call) in the threadpool instead of on the event loop.
+
+Authenticated routes are limited per user, login per client IP.
+"""
+import math
+import threading
+import time
+from typing import Dict, Tuple
+from uuid import UUID
+from fastapi import Depends, HTTPException, Request, Response, status
+from redis.exceptions import RedisError
+from app.core.config import settings
+from app.core.metrics import registry
+from app.core.redis_client import redis_client
+from app.api.deps.auth import get_current_user_id
+
+registry.counters.setdefault("rate_limited_total", {})
+
+# KEYS[1] bucket; ARGV: capacity, tokens per second, cost. Returns {allowed, tokens left, retry after ms}
+_TOKEN_BUCKET = redis_client.register_script(
+    """
+local capacity = tonumber(ARGV[1])
+local rate = tonumber(ARGV[2])
+local cost = tonumber(ARGV[3])
+local clock = redis.call('TIME')
+local now = tonumber(clock[1]) * 1000 + math.floor(tonumber(clock[2]) / 1000)
+local bucket = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(bucket[1]) or capacity
+local ts = tonumber(bucket[2]) or now
+tokens = math.min(capacity, tokens + math.max(0, now - ts) * rate / 1000)
+local allowed, retry_ms = 0, 0
+if tokens >= cost then
+    tokens = tokens - cost
+    allowed = 1
+else
+    retry_ms = math.ceil((cost - tokens) * 1000 / rate)
+end
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'ts', now)
+redis.call('PEXPIRE', KEYS[1], math.ceil(capacity * 1000 / rate) + 1000)
+return {allowed, math.floor(tokens), retry_ms}
+"""
+)
+
+# This worker's buckets while Redis is unreachable: key -> (tokens, monotonic seconds)
+_local_buckets: Dict[str, Tuple[float, float]] = {}
+_local_lock = threading.Lock()
+_redis_retry_at = 0.0  # monotonic time before which Redis is not tried
+
+
+def _budget(route: str) -> Tuple[int, float]:
+    """(burst capacity, tokens per second) for a route"""
+    name = route.upper()
+    burst = getattr(settings, f"RATE_LIMIT_{name}_BURST")
+    per_minute = getattr(settings, f"RATE_LIMIT_{name}_PER_MINUTE")
+    return burst, per_minute / 60
+
+
+def _take_local(key: str, capacity: int, rate: float) -> Tuple[bool, int, int]:
+    with _local_lock:
+        return _take_local_locked(key, capacity, rate)
+
+
+def _take_local_locked(key: str, capacity: int, rate: float) -> Tuple[bool, int, int]:
+    now = time.monotonic()
+    if len(_local_buckets) > 10_000:
+        for bucket_key, (tokens, ts) in list(_local_buckets.items()):
+            if tokens + (now - ts) * rate >= capacity:
+                del _local_buckets[bucket_key]  # full again; same as no bucket
+    tokens, ts = _local_buckets.get(key, (capacity, now))
+    tokens = min(capacity, tokens + (now - ts) * rate)
+    if tokens >= 1:
+        _local_buckets[key] = (tokens - 1, now)
+        return True, int(tokens - 1), 0
+    _local_buckets[key] = (tokens, now)
+    return False, 0, math.ceil((1 - tokens) * 1000 / rate)
+
+
+def _take(key: str, capacity: int, rate: float) -> Tuple[bool, int, int]:
+    global _redis_retry_at
+    if time.monotonic() >= _redis_retry_at:
+        try:
+            return _TOKEN_BUCKET(keys=[key], args=[capacity, rate, 1])
+        except RedisError:
+            _redis_retry_at = time.monotonic() + settings.RATE_LIMIT_REDIS_RETRY_SECONDS
+    return _take_local(key, capacity, rate)
+
+
+def check_rate_limit(route: str, client: str, response: Response) -> None:
+    """Spend one token from the client's bucket for ``route`` or raise 429 with Retry-After"""
+    if not settings.RATE_LIMIT_ENABLED:
+        return
+    capacity, rate = _budget(route)
+    key = f"ratelimit:{route}:{client}"
+    allowed, remaining, retry_ms = _take(key, capacity, rate)
+
+    if not allowed:
+        limited = registry.counters["rate_limited_total"]
+        limited[(route,)] = limited.get((route,), 0) + 1
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Too many requests; try again later",
+            headers={"Retry-After": str(max(1, math.ceil(retry_ms / 1000)))},
+        )
+    response.headers["X-RateLimit-Limit"] = str(capacity)
+    response.headers["X-RateLimit-Remaining"] = str(remaining)
+
+
+def client_ip(request: Request) -> str:
+    # Behind a proxy, run uvicorn with --proxy-headers so this is the forwarded address
+    return request.client.host if request.client else "unknown"
+
+
+def rate_limit_by_user(route: str):
+    """Dependency limiting an authenticated route per user"""
+
+    def limit(response: Response, user_id: UUID = Depends(get_current_user_id)) -> None:
+        check_rate_limit(route, f"user:{user_id}", response)
+
+    return limit
+
+
+def rate_limit_by_ip(route: str):
+    """Dependency limiting a route per client IP"""
+
+    def limit(request: Request, response: Response) -> None:
+        check_rate_limit(route, f"ip:{client_ip(request)}", response)
+
+    return limit
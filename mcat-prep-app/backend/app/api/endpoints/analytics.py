@@ -1,21 +1,58 @@
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.orm import Session
-from sqlalchemy import func, case
-from typing import Dict, Any
-from app.core.database import get_db
-from app.api.deps.auth import get_current_user
+from sqlalchemy import func, case, cast, Date
+from typing import Dict, Any, List
+from datetime import datetime, timedelta, timezone
+from uuid import UUID
+from redis.exceptions import RedisError
+from app.api.deps.auth import get_current_user, get_current_user_id
+from app.api.deps.database import get_read_db
+from app.api.deps.rate_limit import rate_limit_by_user
 from app.models.user import User
 from app.models.test import UserQuestionAttempt, UserTestAttempt
 from app.models.content import Question, AAMCFoundationalConcept
 from app.models.progress import ReviewQueue
+from app.models.analytics import UserDailySectionStats, UserMetricTotals
+from app.schemas.analytics import LeaderboardResponse, PercentileResponse, TrendResponse
+from app.core.config import settings
+from app.services import leaderboard
+from app.services.cohort import SCORE_SECTIONS, cohort, cohort_accuracy
+from app.services.rollups import bucket_start, bucket_starts, choose_bucket
 
 router = APIRouter()
 
 
-@router.get("/dashboard", response_model=Dict[str, Any])
+def build_concept_mastery(concept_performance) -> List[Dict[str, Any]]:
+    """Shape per-concept attempt counts into accuracy and proficiency bands"""
+    concept_mastery = []
+    for concept in concept_performance:
+        accuracy = (
+            round((concept.correct_attempts / concept.total_attempts * 100), 2)
+            if concept.total_attempts > 0
+            else 0
+        )
+        proficiency = "green" if accuracy >= 80 else "yellow" if accuracy >= 60 else "red"
+        concept_mastery.append(
+            {
+                "concept_code": concept.concept_code,
+                "title": concept.title,
+                "mcat_section": concept.mcat_section,
+                "accuracy": accuracy,
+                "proficiency": proficiency,
+                "total_attempts": concept.total_attempts,
+            }
+        )
+    return concept_mastery
+
+
+@router.get(
+    "/dashboard",
+    response_model=Dict[str, Any],
+    dependencies=[Depends(rate_limit_by_user("dashboard"))],
+)
 async def get_dashboard_analytics(
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
 ):
     """Get comprehensive dashboard analytics for current user"""
 
@@ -84,24 +121,7 @@ async def get_dashboard_analytics(
         .all()
     )
 
-    concept_mastery = []
-    for concept in concept_performance:
-        accuracy = (
-            round((concept.correct_attempts / concept.total_attempts * 100), 2)
-            if concept.total_attempts > 0
-            else 0
-        )
-        proficiency = "green" if accuracy >= 80 else "yellow" if accuracy >= 60 else "red"
-        concept_mastery.append(
-            {
-                "concept_code": concept.concept_code,
-                "title": concept.title,
-                "mcat_section": concept.mcat_section,
-                "accuracy": accuracy,
-                "proficiency": proficiency,
-                "total_attempts": concept.total_attempts,
-            }
-        )
+    concept_mastery = build_concept_mastery(concept_performance)
 
     # Review queue count
     review_queue_count = (
@@ -132,7 +152,7 @@ async def get_dashboard_analytics(
 @router.get("/review-queue")
 async def get_review_queue(
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
 ):
     """Get questions in review queue"""
     review_items = (
@@ -144,3 +164,171 @@ async def get_review_queue(
     )
 
     return {"review_queue": [{"question_id": str(item.question_id), "priority": item.priority} for item in review_items]}
+
+
+def _trend_counts(attempts: int, correct: int, seconds_spent: int) -> Dict[str, Any]:
+    return {
+        "attempts": attempts,
+        "correct": correct,
+        "accuracy": round(correct / attempts * 100, 2) if attempts else 0,
+        "seconds_spent": seconds_spent,
+    }
+
+
+@router.get("/trends", response_model=TrendResponse)
+async def get_performance_trends(
+    range_: str = Query("90d", alias="range", pattern=r"^[1-9]\d{0,3}d$"),
+    bucket: str = Query("day", pattern="^(day|week|month)$"),
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_read_db),
+):
+    """Get accuracy and volume over time from the daily rollup"""
+    range_days = int(range_[:-1])
+    end = datetime.now(timezone.utc).date()
+    first = end - timedelta(days=range_days - 1)
+
+    # Long ranges are downsampled to coarser buckets so charts get a bounded number of points
+    bucket = choose_bucket(first, end, bucket)
+    start = bucket_start(first, bucket)
+
+    bucket_column = cast(func.date_trunc(bucket, UserDailySectionStats.day), Date)
+    rows = (
+        db.query(
+            bucket_column.label("bucket_start"),
+            UserDailySectionStats.mcat_section,
+            func.sum(UserDailySectionStats.attempts).label("attempts"),
+            func.sum(UserDailySectionStats.correct).label("correct"),
+            func.sum(UserDailySectionStats.seconds_spent).label("seconds_spent"),
+        )
+        .filter(
+            UserDailySectionStats.user_id == current_user.id,
+            UserDailySectionStats.day >= start,
+            UserDailySectionStats.day <= end,
+        )
+        .group_by(bucket_column, UserDailySectionStats.mcat_section)
+        .all()
+    )
+
+    by_bucket: Dict[Any, Dict[str, Any]] = {}
+    for row in rows:
+        by_bucket.setdefault(row.bucket_start, {})[row.mcat_section] = row
+
+    points = []
+    for point_start in bucket_starts(start, end, bucket):
+        sections = by_bucket.get(point_start, {})
+        attempts = sum(row.attempts for row in sections.values())
+        correct = sum(row.correct for row in sections.values())
+        seconds_spent = sum(row.seconds_spent for row in sections.values())
+        points.append(
+            {
+                "start": point_start,
+                **_trend_counts(attempts, correct, seconds_spent),
+                "sections": {
+                    section: _trend_counts(row.attempts, row.correct, row.seconds_spent)
+                    for section, row in sections.items()
+                },
+            }
+        )
+
+    return {"range_days": range_days, "bucket": bucket, "start": start, "end": end, "points": points}
+
+
+@router.get("/percentiles", response_model=PercentileResponse)
+async def get_cohort_percentiles(
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_read_db),
+):
+    """Get the user's percentile rank per section, concept and latest test score"""
+    totals = db.query(UserMetricTotals).filter(UserMetricTotals.user_id == current_user.id).all()
+
+    concept_ids = [
+        int(total.metric.rsplit(":", 1)[1]) for total in totals if total.metric.startswith("accuracy:concept:")
+    ]
+    concept_codes = {}
+    if concept_ids:
+        concept_codes = dict(
+            db.query(AAMCFoundationalConcept.id, AAMCFoundationalConcept.concept_code)
+            .filter(AAMCFoundationalConcept.id.in_(concept_ids))
+            .all()
+        )
+
+    # Each lookup is a bin index into this worker's in-memory sketch
+    metrics = []
+    for total in sorted(totals, key=lambda t: t.metric):
+        value = cohort_accuracy(total.attempts, total.correct)
+        if value is None:
+            continue
+        kind, key = total.metric.split(":")[1:]
+        if kind == "section":
+            label = f"{key} accuracy"
+        else:
+            label = f"Concept {concept_codes.get(int(key), key)} accuracy"
+        percentile, cohort_size = cohort.rank(total.metric, value)
+        metrics.append(
+            {
+                "metric": total.metric,
+                "label": label,
+                "value": round(value, 1),
+                "percentile": percentile,
+                "cohort_size": cohort_size,
+            }
+        )
+
+    latest_test = (
+        db.query(UserTestAttempt)
+        .filter(UserTestAttempt.user_id == current_user.id, UserTestAttempt.status == "completed")
+        .order_by(UserTestAttempt.completed_at.desc())
+        .first()
+    )
+    if latest_test:
+        scores = [("total", latest_test.total_score)] + [
+            (section, getattr(latest_test, f"{section}_score")) for section in SCORE_SECTIONS
+        ]
+        for name, score in scores:
+            if score is not None:
+                percentile, cohort_size = cohort.rank(f"score:{name}", score)
+                metrics.append(
+                    {
+                        "metric": f"score:{name}",
+                        "label": f"Latest {name if name == 'total' else name.upper()} score",
+                        "value": score,
+                        "percentile": percentile,
+                        "cohort_size": cohort_size,
+                    }
+                )
+
+    return {"metrics": metrics}
+
+
+@router.get("/leaderboard", response_model=LeaderboardResponse)
+async def get_leaderboard(
+    board: str = Query("volume", pattern="^(volume|accuracy|score)$"),
+    week: str = Query("current", pattern=r"^(current|previous|\d{4}-W\d{2})$"),
+    page: int = Query(1, ge=1),
+    page_size: int = Query(25, ge=1, le=settings.LEADERBOARD_MAX_PAGE_SIZE),
+    user_id: UUID = Depends(get_current_user_id),
+):
+    """Get a page of a weekly leaderboard and the user's own rank (served from Redis only)"""
+    if week == "current":
+        week = leaderboard.current_week()
+    elif week == "previous":
+        week = leaderboard.current_week(1)
+    else:
+        try:
+            leaderboard.week_bounds(week)
+        except ValueError:
+            raise HTTPException(status_code=422, detail="Invalid ISO week")
+
+    try:
+        standings = leaderboard.read_board(week, board, (page - 1) * page_size, page_size, user_id)
+    except RedisError:
+        raise HTTPException(status_code=503, detail="Leaderboard temporarily unavailable")
+
+    return {
+        "board": board,
+        "week": week,
+        "page": page,
+        "page_size": page_size,
+        "min_attempts": settings.LEADERBOARD_MIN_ATTEMPTS if board == "accuracy" else None,
+        **standings,
+    }
@@ -1,14 +1,23 @@
 from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.orm import Session
-from sqlalchemy import func
+from sqlalchemy import func, update
 from typing import Optional, List
 from uuid import UUID
+import logging
+import uuid
+from redis.exceptions import RedisError
 from app.core.database import get_db
+from app.core.timer_wheel import now_ms
 from app.api.deps.auth import get_current_user
+from app.api.deps.database import get_read_db, pin_to_primary
 from app.models.user import User
 from app.models.content import Question, Passage
-from app.models.test import UserQuestionAttempt
-from app.models.progress import ReviewQueue
+from app.models.test import UserQuestionAttempt, UserTestAttempt
+from app.services import leaderboard, seen_questions, session_state
+from app.services.attempts import answered_questions, record_question_attempts
+from app.services.cohort import apply_accuracy_moves
+from app.services.test_sessions import TestSession, test_contents
+from app.services.topic_closure import topic_and_descendants
 from app.schemas.question import (
     QuestionResponse,
     QuestionWithAnswer,
@@ -17,14 +26,44 @@ from app.schemas.question import (
     PassageResponse,
 )
 
+logger = logging.getLogger(__name__)
+
 router = APIRouter()
 
 
+def _test_session(attempt_id: UUID, question_id: UUID, current_user: User, db: Session) -> TestSession:
+    """The attempt an answer is submitted to, held to the same rules as answers sent over its WebSocket"""
+    test_attempt = (
+        db.query(UserTestAttempt)
+        .filter(UserTestAttempt.id == attempt_id, UserTestAttempt.user_id == current_user.id)
+        .with_for_update()  # one answer at a time per attempt, so a question cannot be answered twice
+        .first()
+    )
+    if test_attempt is None:
+        raise HTTPException(status_code=404, detail="Test attempt not found")
+    if test_attempt.status not in session_state.OPEN_STATUSES:
+        raise HTTPException(status_code=409, detail=f"Test attempt is {test_attempt.status}")
+    content = test_contents.get(db, test_attempt.practice_test_id)
+    if content is None or str(question_id) not in content.positions:
+        raise HTTPException(status_code=400, detail="Question is not part of this test")
+    try:
+        state = session_state.load_or_seed(test_attempt)
+    except RedisError as e:
+        logger.warning("Test session state for %s unavailable: %s", test_attempt.id, e)
+        state = None  # as over the WebSocket, the section timer cannot be enforced without it
+    answered = answered_questions(db, test_attempt)
+    session = TestSession(current_user.id, current_user.full_name, test_attempt, content, state, answered)
+    problem = session.accepts(str(question_id), now_ms())
+    if problem is not None:
+        raise HTTPException(status_code=409, detail=problem)
+    return session
+
+
 @router.get("/{question_id}", response_model=QuestionResponse)
 async def get_question(
     question_id: UUID,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
 ):
     """Get a question by ID (without answer)"""
     question = db.query(Question).filter(Question.id == question_id).first()
@@ -37,12 +76,13 @@ async def get_question(
 async def get_questions(
     mcat_section: Optional[str] = Query(None),
     topic_id: Optional[int] = Query(None),
+    include_subtopics: bool = Query(True),
     difficulty_level: Optional[int] = Query(None),
     question_type: Optional[str] = Query(None),
     limit: int = Query(10, le=100),
     offset: int = Query(0),
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
 ):
     """Get questions with filters"""
     query = db.query(Question)
@@ -50,7 +90,10 @@ async def get_questions(
     if mcat_section:
         query = query.filter(Question.mcat_section == mcat_section)
     if topic_id:
-        query = query.filter(Question.topic_id == topic_id)
+        if include_subtopics:
+            query = query.filter(Question.topic_id.in_(topic_and_descendants([topic_id])))
+        else:
+            query = query.filter(Question.topic_id == topic_id)
     if difficulty_level:
         query = query.filter(Question.difficulty_level == difficulty_level)
     if question_type:
@@ -70,9 +113,25 @@ async def submit_question_attempt(
     db: Session = Depends(get_db),
 ):
     """Submit a question attempt and get immediate feedback"""
-
-    # Get the question
-    question = db.query(Question).filter(Question.id == attempt.question_id).first()
+    session = None
+    if attempt.test_attempt_id is not None:
+        session = _test_session(attempt.test_attempt_id, attempt.question_id, current_user, db)
+
+    # Bump the question's answer count and fetch what grading needs in one statement
+    question = db.execute(
+        update(Question)
+        .where(Question.id == attempt.question_id)
+        .values(times_answered=func.coalesce(Question.times_answered, 0) + 1)
+        .returning(
+            Question.id,
+            Question.ordinal,
+            Question.mcat_section,
+            Question.foundational_concept_id,
+            Question.correct_answer,
+            Question.correct_explanation,
+            Question.incorrect_explanations,
+        )
+    ).first()
     if not question:
         raise HTTPException(status_code=404, detail="Question not found")
 
@@ -81,6 +140,7 @@ async def submit_question_attempt(
 
     # Save the attempt
     user_attempt = UserQuestionAttempt(
+        id=uuid.uuid4(),
         user_id=current_user.id,
         question_id=attempt.question_id,
         test_attempt_id=attempt.test_attempt_id,
@@ -92,38 +152,18 @@ async def submit_question_attempt(
         confidence_level=attempt.confidence_level,
     )
 
-    db.add(user_attempt)
-
-    # Update question statistics
-    question.times_answered += 1
-
-    # Add to review queue if incorrect or flagged
-    if not is_correct or attempt.is_flagged:
-        # Check if already in review queue
-        existing_review = (
-            db.query(ReviewQueue)
-            .filter(
-                ReviewQueue.user_id == current_user.id,
-                ReviewQueue.question_id == attempt.question_id,
-            )
-            .first()
-        )
-
-        if not existing_review:
-            review_item = ReviewQueue(
-                user_id=current_user.id,
-                question_id=attempt.question_id,
-                priority=5 if not is_correct else 3,
-                last_attempt_id=user_attempt.id,
-            )
-            db.add(review_item)
-        else:
-            # Update priority if question was incorrect
-            if not is_correct:
-                existing_review.priority = min(existing_review.priority + 1, 10)
+    accuracy_moves = record_question_attempts(
+        db, current_user.id, [(user_attempt, question.mcat_section, question.foundational_concept_id)]
+    )
 
     db.commit()
-    db.refresh(user_attempt)
+    apply_accuracy_moves(accuracy_moves)
+    seen_questions.record_seen(current_user.id, [question.ordinal])
+    if session is not None:
+        session.submitted(str(question.id))
+    # The dashboard and review queue read from replicas; serve this user's next reads from the primary
+    pin_to_primary(current_user.id)
+    leaderboard.record_attempt(current_user.id, current_user.full_name, is_correct)
 
     return {
         "id": user_attempt.id,
@@ -141,7 +181,7 @@ async def submit_question_attempt(
 async def get_passage(
     passage_id: UUID,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
 ):
     """Get a passage by ID"""
     passage = db.query(Passage).filter(Passage.id == passage_id).first()
@@ -1,11 +1,21 @@
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Request, Response, status
 from sqlalchemy.orm import Session
 from typing import List
-from app.core.database import get_db
-from app.api.deps.auth import get_current_user
+from uuid import UUID
+from app.api.deps.auth import get_current_user, get_current_user_id
+from app.api.deps.database import get_read_db
 from app.models.user import User
-from app.models.content import StudyModule, Topic
-from app.schemas.study import StudyModuleResponse, TopicResponse
+from app.models.content import StudyModule
+from app.models.progress import UserStudyProgress
+from app.schemas.study import (
+    StudyHeartbeat,
+    StudyModuleResponse,
+    TaxonomyResponse,
+    TopicResponse,
+    UserStudyProgressResponse,
+)
+from app.services.study_progress import heartbeats
+from app.services.taxonomy import taxonomy
 
 router = APIRouter()
 
@@ -14,7 +24,7 @@ router = APIRouter()
 async def get_study_modules(
     mcat_section: str = None,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
 ):
     """Get all study modules, optionally filtered by MCAT section"""
     query = db.query(StudyModule)
@@ -27,12 +37,56 @@ async def get_study_modules(
 @router.get("/topics", response_model=List[TopicResponse])
 async def get_topics(
     mcat_section: str = None,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    user_id: UUID = Depends(get_current_user_id),
 ):
-    """Get all topics, optionally filtered by MCAT section"""
-    query = db.query(Topic)
+    """Get all topics, optionally filtered by MCAT section (served from the taxonomy snapshot)"""
+    topics = taxonomy.snapshot().topics.values()
     if mcat_section:
-        query = query.filter(Topic.mcat_section == mcat_section)
-    topics = query.all()
-    return topics
+        return [topic for topic in topics if topic["mcat_section"] == mcat_section]
+    return list(topics)
+
+
+def _etag_matches(if_none_match: str, etag: str) -> bool:
+    candidates = [candidate.strip() for candidate in if_none_match.split(",")]
+    return "*" in candidates or etag in [candidate.removeprefix("W/") for candidate in candidates]
+
+
+@router.get(
+    "/taxonomy",
+    responses={200: {"model": TaxonomyResponse}, 304: {"description": "Not modified"}},
+)
+async def get_taxonomy(
+    request: Request,
+    user_id: UUID = Depends(get_current_user_id),
+):
+    """Get foundational concepts and topics as a tree per MCAT section, with an ETag"""
+    snapshot = taxonomy.snapshot()
+    headers = {"ETag": snapshot.etag, "Cache-Control": "private, no-cache"}
+    if _etag_matches(request.headers.get("if-none-match", ""), snapshot.etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    return Response(content=snapshot.tree_json, media_type="application/json", headers=headers)
+
+
+@router.post("/modules/{module_id}/heartbeat", status_code=status.HTTP_204_NO_CONTENT)
+async def record_study_heartbeat(
+    module_id: int,
+    heartbeat: StudyHeartbeat,
+    user_id: UUID = Depends(get_current_user_id),
+):
+    """Record reading time on a study module (coalesced and written in batches)"""
+    heartbeats.record(user_id, module_id, heartbeat.seconds, heartbeat.bookmark_position, heartbeat.completed)
+    return Response(status_code=status.HTTP_204_NO_CONTENT)
+
+
+@router.get("/progress", response_model=List[UserStudyProgressResponse])
+async def get_study_progress(
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_read_db),
+):
+    """Get the user's progress on study modules (heartbeats appear after the next flush)"""
+    return (
+        db.query(UserStudyProgress)
+        .filter(UserStudyProgress.user_id == current_user.id)
+        .order_by(UserStudyProgress.last_accessed_at.desc())
+        .all()
+    )
@@ -1,72 +1,91 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
+from redis.exceptions import RedisError
 from sqlalchemy.orm import Session
-from sqlalchemy import func
 from typing import List
 from uuid import UUID
+import gzip
 import uuid
+from app.core.bitmap import Bitmap
 from app.core.database import get_db
-from app.api.deps.auth import get_current_user
+from app.api.deps.auth import get_current_user, get_current_user_id
+from app.api.deps.database import get_read_db, pin_to_primary
+from app.api.deps.rate_limit import rate_limit_by_user
 from app.models.user import User
 from app.models.test import PracticeTest, UserTestAttempt
 from app.models.content import Question
 from app.schemas.test import (
     QuizCreateRequest,
-    PracticeTestResponse,
+    CustomQuizResponse,
     TestAttemptResponse,
     TestAttemptStart,
+    TestAttemptComplete,
+    TestBundleResponse,
+    TestSessionState,
 )
+from app.services import leaderboard, section_timers, seen_questions, session_state
+from app.services.cohort import record_test_scores
+from app.services.quiz_sets import create_quiz
+from app.services.scoring import score_attempt
+from app.services.test_bundles import get_bundle
+from app.services.topic_closure import topic_and_descendants
 
 router = APIRouter()
 
 
-@router.post("/quiz/create", response_model=PracticeTestResponse)
-async def create_custom_quiz(
-    quiz_request: QuizCreateRequest,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
-):
-    """Create a custom quiz based on user preferences"""
-
-    # Query questions based on filters
-    query = db.query(Question)
+def _candidate_ordinals(db: Session, quiz_request: QuizCreateRequest) -> Bitmap:
+    """Ordinals of every question matching the quiz filters"""
+    query = db.query(Question.ordinal)
 
     if quiz_request.mcat_section:
         query = query.filter(Question.mcat_section == quiz_request.mcat_section)
     if quiz_request.topic_ids:
-        query = query.filter(Question.topic_id.in_(quiz_request.topic_ids))
+        if quiz_request.include_subtopics:
+            query = query.filter(Question.topic_id.in_(topic_and_descendants(quiz_request.topic_ids)))
+        else:
+            query = query.filter(Question.topic_id.in_(quiz_request.topic_ids))
     if quiz_request.difficulty_level:
         query = query.filter(Question.difficulty_level == quiz_request.difficulty_level)
     if quiz_request.question_type:
         query = query.filter(Question.question_type == quiz_request.question_type)
 
-    # Get random questions
-    questions = query.order_by(func.random()).limit(quiz_request.num_questions).all()
+    return Bitmap(ordinal for (ordinal,) in query)
 
-    if not questions:
-        raise HTTPException(status_code=404, detail="No questions found matching the criteria")
 
-    # Create practice test
-    section_title = quiz_request.mcat_section or "Mixed Sections"
-    practice_test = PracticeTest(
-        test_type="custom_quiz",
-        title=f"Custom Quiz - {section_title}",
-        description=f"{len(questions)} questions",
-        sections=[
-            {
-                "section": quiz_request.mcat_section or "mixed",
-                "duration_minutes": len(questions) * 2,  # ~2 min per question
-                "question_ids": [str(q.id) for q in questions],
-            }
-        ],
-        total_questions=len(questions),
-        total_duration_minutes=len(questions) * 2,
+@router.post(
+    "/quiz/create",
+    response_model=CustomQuizResponse,
+    dependencies=[Depends(rate_limit_by_user("quiz_create"))],
+)
+async def create_custom_quiz(
+    quiz_request: QuizCreateRequest,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db),
+):
+    """Create a custom quiz based on user preferences"""
+
+    candidates = seen_questions.quiz_candidates.get(
+        (
+            quiz_request.mcat_section,
+            tuple(sorted(quiz_request.topic_ids)) if quiz_request.topic_ids else None,
+            quiz_request.include_subtopics,
+            quiz_request.difficulty_level,
+            quiz_request.question_type,
+        ),
+        lambda: _candidate_ordinals(db, quiz_request),
     )
+    if not candidates or quiz_request.num_questions < 1:
+        raise HTTPException(status_code=404, detail="No questions found matching the criteria")
+
+    # Sample in memory, preferring questions the user has not answered yet
+    seen = seen_questions.seen_questions(db, current_user.id) if quiz_request.exclude_seen else Bitmap()
+    ordinals = seen_questions.sample_questions(candidates, seen, quiz_request.num_questions)
+    question_ids = [question_id for (question_id,) in db.query(Question.id).filter(Question.ordinal.in_(ordinals))]
 
-    db.add(practice_test)
+    quiz = create_quiz(db, current_user.id, quiz_request.mcat_section, question_ids)
     db.commit()
-    db.refresh(practice_test)
+    pin_to_primary(current_user.id)  # its bundle is usually fetched right away
 
-    return practice_test
+    return quiz
 
 
 @router.post("/attempt/start", response_model=TestAttemptResponse)
@@ -96,9 +115,113 @@ async def start_test_attempt(
     db.commit()
     db.refresh(attempt)
 
+    # The first section's clock starts now; later sections start as each one ends
+    if practice_test.sections:
+        try:
+            session_state.seed(attempt)
+            section_timers.start_section(attempt.id, 0, practice_test.sections[0].get("duration_minutes"))
+        except RedisError:
+            raise HTTPException(status_code=503, detail="Test session state temporarily unavailable")
+
+    return attempt
+
+
+@router.post("/attempt/complete", response_model=TestAttemptResponse)
+async def complete_test_attempt(
+    test_complete: TestAttemptComplete,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db),
+):
+    """Score and complete a test attempt"""
+    attempt = (
+        db.query(UserTestAttempt)
+        .filter(
+            UserTestAttempt.id == test_complete.test_attempt_id,
+            UserTestAttempt.user_id == current_user.id,
+        )
+        .with_for_update()
+        .first()
+    )
+    if not attempt:
+        raise HTTPException(status_code=404, detail="Test attempt not found")
+
+    # Completing twice must not count the scores twice
+    if attempt.status == "completed":
+        return attempt
+
+    score_attempt(db, attempt)
+    db.commit()
+    db.refresh(attempt)
+
+    try:
+        session_state.clear(attempt.id)
+    except RedisError:
+        pass  # the state expires on its own and checkpoints never reopen a completed attempt
+    record_test_scores(attempt)
+    leaderboard.record_test_score(current_user.id, current_user.full_name, attempt.total_score, attempt.completed_at)
+    pin_to_primary(current_user.id)
     return attempt
 
 
+def _session_state(attempt_id: UUID, user_id: UUID, db: Session) -> dict:
+    """The attempt's live state from Redis, reseeded from its last checkpoint when missing"""
+    state = session_state.load(attempt_id)
+    if state is None:
+        attempt = (
+            db.query(UserTestAttempt)
+            .filter(UserTestAttempt.id == attempt_id, UserTestAttempt.user_id == user_id)
+            .first()
+        )
+        if attempt is None:
+            raise HTTPException(status_code=404, detail="Test attempt not found")
+        if attempt.status not in session_state.OPEN_STATUSES:
+            raise HTTPException(status_code=409, detail=f"Test attempt is {attempt.status}")
+        state = session_state.seed(attempt)
+    if state["user_id"] != str(user_id):
+        raise HTTPException(status_code=404, detail="Test attempt not found")
+    return state
+
+
+@router.post("/attempt/{attempt_id}/pause", response_model=TestSessionState)
+async def pause_test_attempt(
+    attempt_id: UUID,
+    user_id: UUID = Depends(get_current_user_id),
+    db: Session = Depends(get_db),
+):
+    """Pause a test attempt and checkpoint its session state"""
+    try:
+        state = _session_state(attempt_id, user_id, db)
+        session_state.record_status(attempt_id, "paused")
+        state["status"] = "paused"
+        remaining = section_timers.pause_section(attempt_id, state["section"])
+        if remaining is not None:
+            state["deadline_ms"], state["remaining_ms"] = None, remaining
+        session_state.checkpoint([attempt_id])
+    except RedisError:
+        raise HTTPException(status_code=503, detail="Test session state temporarily unavailable")
+    return state
+
+
+@router.post("/attempt/{attempt_id}/resume", response_model=TestSessionState)
+async def resume_test_attempt(
+    attempt_id: UUID,
+    user_id: UUID = Depends(get_current_user_id),
+    db: Session = Depends(get_db),
+):
+    """Resume a test attempt from its session state (Postgres is only read if the state was lost)"""
+    try:
+        state = _session_state(attempt_id, user_id, db)
+        if state["status"] != "in_progress":
+            session_state.record_status(attempt_id, "in_progress")
+            state["status"] = "in_progress"
+        deadline = section_timers.resume_section(attempt_id, state["section"])
+        if deadline is not None:
+            state["deadline_ms"], state["remaining_ms"] = deadline, None
+    except RedisError:
+        raise HTTPException(status_code=503, detail="Test session state temporarily unavailable")
+    return state
+
+
 @router.get("/attempts", response_model=List[TestAttemptResponse])
 async def get_user_test_attempts(
     current_user: User = Depends(get_current_user),
@@ -112,3 +235,28 @@ async def get_user_test_attempts(
         .all()
     )
     return attempts
+
+
+def _accepts_gzip(accept_encoding: str) -> bool:
+    for coding in accept_encoding.lower().split(","):
+        name, _, params = coding.partition(";")
+        if name.strip() in ("gzip", "*"):
+            return params.replace(" ", "") not in ("q=0", "q=0.0", "q=0.00", "q=0.000")
+    return False
+
+
+@router.get("/{test_id}/bundle", responses={200: {"model": TestBundleResponse}})
+async def get_test_bundle(
+    test_id: UUID,
+    request: Request,
+    db: Session = Depends(get_read_db),
+):
+    """Get a practice test with all sections' questions and passages, in order"""
+    blob = get_bundle(db, test_id)
+    if blob is None:
+        raise HTTPException(status_code=404, detail="Practice test not found")
+    headers = {"Vary": "Accept-Encoding", "Cache-Control": "private, no-cache"}
+    if _accepts_gzip(request.headers.get("accept-encoding", "")):
+        headers["Content-Encoding"] = "gzip"
+        return Response(content=blob, media_type="application/json", headers=headers)
+    return Response(content=gzip.decompress(blob), media_type="application/json", headers=headers)
@@ -1,12 +1,39 @@
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Query
+from fastapi.responses import StreamingResponse
+from sqlalchemy import select
 from sqlalchemy.orm import Session
-from app.core.database import get_db
+from typing import Optional
+from datetime import datetime
+from uuid import UUID
+import csv
+import io
+import json
+from app.core.database import get_db, open_read_session
 from app.api.deps.auth import get_current_user
+from app.api.deps.database import is_pinned_to_primary
 from app.models.user import User
+from app.models.test import UserQuestionAttempt
+from app.models.content import Question
 from app.schemas.user import UserResponse, UserUpdate
 
 router = APIRouter()
 
+EXPORT_BATCH_SIZE = 1000
+
+EXPORT_COLUMNS = [
+    "id",
+    "question_id",
+    "mcat_section",
+    "test_attempt_id",
+    "selected_answer",
+    "is_correct",
+    "time_spent_seconds",
+    "is_flagged",
+    "attempt_mode",
+    "confidence_level",
+    "attempted_at",
+]
+
 
 @router.get("/me", response_model=UserResponse)
 async def get_current_user_profile(current_user: User = Depends(get_current_user)):
@@ -31,3 +58,83 @@ async def update_current_user_profile(
     db.commit()
     db.refresh(current_user)
     return current_user
+
+
+def _export_rows(user_id: UUID, since: Optional[datetime] = None):
+    """Yield batches of the user's attempts from a server-side cursor"""
+    stmt = (
+        select(
+            UserQuestionAttempt.id,
+            UserQuestionAttempt.question_id,
+            Question.mcat_section,
+            UserQuestionAttempt.test_attempt_id,
+            UserQuestionAttempt.selected_answer,
+            UserQuestionAttempt.is_correct,
+            UserQuestionAttempt.time_spent_seconds,
+            UserQuestionAttempt.is_flagged,
+            UserQuestionAttempt.attempt_mode,
+            UserQuestionAttempt.confidence_level,
+            UserQuestionAttempt.attempted_at,
+        )
+        .join(Question, Question.id == UserQuestionAttempt.question_id)
+        .where(UserQuestionAttempt.user_id == user_id)
+        .order_by(UserQuestionAttempt.attempted_at)
+        .execution_options(yield_per=EXPORT_BATCH_SIZE)
+    )
+    if since is not None:
+        # Attempts are partitioned by month on attempted_at, so this skips older partitions entirely
+        stmt = stmt.where(UserQuestionAttempt.attempted_at >= since)
+
+    # The stream outlives the request's own session, so it owns a session for its lifetime
+    db = open_read_session(use_primary=is_pinned_to_primary(user_id))
+    try:
+        for batch in db.execute(stmt).partitions():
+            yield [
+                {
+                    **row._asdict(),
+                    "id": str(row.id),
+                    "question_id": str(row.question_id),
+                    "test_attempt_id": str(row.test_attempt_id) if row.test_attempt_id else None,
+                    "attempted_at": row.attempted_at.isoformat() if row.attempted_at else None,
+                }
+                for row in batch
+            ]
+    finally:
+        db.close()
+
+
+def _ndjson_chunks(user_id: UUID, since: Optional[datetime] = None):
+    for batch in _export_rows(user_id, since):
+        yield "".join(json.dumps(record) + "\n" for record in batch)
+
+
+def _csv_chunks(user_id: UUID, since: Optional[datetime] = None):
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=EXPORT_COLUMNS)
+    writer.writeheader()
+    for batch in _export_rows(user_id, since):
+        writer.writerows(batch)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue()
+
+
+@router.get("/me/attempts/export")
+async def export_attempt_history(
+    format: str = Query("ndjson", pattern="^(ndjson|csv)$"),
+    since: Optional[datetime] = Query(None, description="Only attempts at or after this time"),
+    current_user: User = Depends(get_current_user),
+):
+    """Download the attempt history as NDJSON or CSV, streamed in constant memory"""
+    if format == "csv":
+        chunks, media_type = _csv_chunks(current_user.id, since), "text/csv"
+    else:
+        chunks, media_type = _ndjson_chunks(current_user.id, since), "application/x-ndjson"
+
+    return StreamingResponse(
+        chunks,
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="attempt-history.{format}"'},
+    )
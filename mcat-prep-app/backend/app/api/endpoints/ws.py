@@ -0,0 +1,248 @@
+import asyncio
+import json
+import logging
+import time
+import uuid
+from datetime import datetime, timezone
+from typing import Optional
+from uuid import UUID
+from fastapi import APIRouter, HTTPException, WebSocket, WebSocketDisconnect, status
+from starlette.concurrency import run_in_threadpool
+from app.core.config import settings
+from app.core.timer_wheel import now_ms
+from app.api.deps.auth import user_id_from_token
+from app.models.test import UserQuestionAttempt
+from app.services import section_timers
+from app.services.test_sessions import TestSession, complete_attempt, open_session, persist_answers
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter()
+
+ANSWER_CHOICES = ("A", "B", "C", "D", "X")  # X = omitted
+
+
+def _token(websocket: WebSocket) -> Optional[str]:
+    """Browsers cannot set headers on a WebSocket, so the token may also come as ?token="""
+    authorization = websocket.headers.get("authorization", "")
+    if authorization.lower().startswith("bearer "):
+        return authorization[7:]
+    return websocket.query_params.get("token")
+
+
+def _error(detail: str) -> str:
+    return json.dumps({"type": "error", "detail": detail})
+
+
+async def _flush(session: TestSession) -> bool:
+    """Write buffered answers and the position; on failure answers stay buffered for the next try"""
+    batch, session.pending = session.pending, []
+    if not batch and not session.moved:
+        return True
+    try:
+        await run_in_threadpool(persist_answers, session, batch)
+        return True
+    except Exception:
+        logger.exception("Saving %d answers for test attempt %s failed", len(batch), session.attempt_id)
+        session.pending = batch + session.pending
+        return False
+
+
+def _answer(session: TestSession, message: dict) -> str:
+    question_id = str(message.get("question_id"))
+    question = session.content.questions.get(question_id)
+    if question is None:
+        return _error("Question is not part of this test")
+    problem = session.accepts(question_id, now_ms())
+    if problem is not None:
+        return _error(problem)
+    selected = message.get("selected_answer")
+    if selected not in ANSWER_CHOICES:
+        return _error("selected_answer must be one of A, B, C, D or X")
+    # Defaults to the time the server saw the question on screen
+    seconds = message.get("time_spent_seconds", session.time_on(question_id))
+    if not isinstance(seconds, int) or seconds < 0:
+        return _error("time_spent_seconds must be a non-negative integer")
+    confidence = message.get("confidence_level")
+    if confidence is not None and not isinstance(confidence, int):
+        return _error("confidence_level must be an integer")
+
+    _, correct_answer, mcat_section, concept_id = question
+    attempt = UserQuestionAttempt(
+        id=uuid.uuid4(),
+        user_id=session.user_id,
+        question_id=UUID(question_id),
+        test_attempt_id=session.attempt_id,
+        selected_answer=selected,
+        is_correct=selected == correct_answer,
+        time_spent_seconds=seconds,
+        is_flagged=session.flags.get(question_id, False),
+        attempt_mode="timed",
+        confidence_level=confidence,
+        # Stamped on arrival; the batch may be written several seconds later
+        attempted_at=datetime.now(timezone.utc),
+    )
+    session.pending.append((attempt, mcat_section, concept_id))
+    session.submitted(question_id)  # an expiring section must not submit it again
+    return json.dumps({"type": "ack", "question_id": question_id})
+
+
+def _flag(session: TestSession, message: dict) -> str:
+    question_id = str(message.get("question_id"))
+    if question_id not in session.content.questions:
+        return _error("Question is not part of this test")
+    flagged = bool(message.get("flagged", True))
+    session.flag(question_id, flagged)
+    # Flags also apply to answers still waiting in the buffer
+    for attempt, _, _ in session.pending:
+        if str(attempt.question_id) == question_id:
+            attempt.is_flagged = flagged
+    return json.dumps({"type": "flagged", "question_id": question_id, "flagged": flagged})
+
+
+def _navigate(session: TestSession, message: dict) -> str:
+    section, index = message.get("section"), message.get("index")
+    if not isinstance(section, int) or not isinstance(index, int):
+        return _error("section and index must be integers")
+    if session.content.question_at(section, index) is None:
+        return _error("No question at that position")
+    if session.deadline_ms is not None and section != session.section:
+        return _error("Timed sections are taken in order; end the current section first")
+    session.move_to(section, index)
+    return session.question_message()
+
+
+def _select(session: TestSession, message: dict) -> str:
+    question_id = str(message.get("question_id"))
+    if question_id not in session.content.questions:
+        return _error("Question is not part of this test")
+    choice = message.get("selected_answer")
+    if choice not in ANSWER_CHOICES:
+        return _error("selected_answer must be one of A, B, C, D or X")
+    session.select(question_id, choice)
+    return json.dumps({"type": "selected", "question_id": question_id, "selected_answer": choice})
+
+
+HANDLERS = {"answer": _answer, "flag": _flag, "navigate": _navigate, "select": _select}
+
+
+def _expire_at(session: TestSession) -> Optional[float]:
+    """Monotonic time at which the current section's deadline (plus grace) passes"""
+    if session.deadline_ms is None:
+        return None
+    return time.monotonic() + (session.deadline_ms - now_ms()) / 1000 + settings.SECTION_GRACE_SECONDS
+
+
+async def _end_section(websocket: WebSocket, session: TestSession, force: bool) -> bool:
+    """Expire the current section (unless another worker already is) and move the client on
+
+    Returns False once the attempt is over and the socket has been closed.
+    """
+    section = session.section
+    # Answers that fail to save stay buffered; they are marked submitted, so expiry skips them
+    await _flush(session)
+    await run_in_threadpool(section_timers.end_section, session.attempt_id, section, force)
+    if not await run_in_threadpool(session.refresh):
+        result = await run_in_threadpool(complete_attempt, session)
+        await websocket.send_text(f'{{"type":"completed","attempt":{result or "null"}}}')
+        await websocket.close()
+        return False
+    if session.section != section:
+        await websocket.send_text(json.dumps({"type": "section_ended", "section": section}))
+        await websocket.send_text(session.describe())
+        current = session.question_message()
+        if current is not None:
+            await websocket.send_text(current)
+    return True
+
+
+@router.websocket("/tests/{attempt_id}")
+async def test_session_socket(websocket: WebSocket, attempt_id: UUID):
+    """Live test-taking session: authenticate once, then stream questions and answers
+
+    Client messages (JSON): navigate {section, index}, select {question_id,
+    selected_answer} (tentative), answer {question_id, selected_answer,
+    time_spent_seconds?, confidence_level?}, flag {question_id, flagged},
+    end_section and submit. Navigation, flags and selections go to the Redis
+    session state; answers are acknowledged immediately and written in batches
+    of WS_ANSWER_BATCH_SIZE or every WS_FLUSH_SECONDS. When a timed section runs
+    out the server submits it and sends section_ended followed by the next
+    section, or completed after the last one.
+    """
+    token = _token(websocket)
+    try:
+        if token is None:
+            raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Not authenticated")
+        user_id = user_id_from_token(token)
+    except HTTPException as e:
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION, reason=e.detail)
+        return
+
+    session, problem = await run_in_threadpool(open_session, user_id, attempt_id)
+    if session is None:
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION, reason=problem)
+        return
+
+    await websocket.accept()
+    await websocket.send_text(session.describe())
+    current = session.question_message()
+    if current is not None:
+        await websocket.send_text(current)
+
+    # One coroutine per socket: the flush and section deadlines are receive timeouts, not other tasks
+    flush_at, expire_at = None, _expire_at(session)
+    try:
+        while True:
+            wake_at = min((at for at in (flush_at, expire_at) if at is not None), default=None)
+            timeout = None if wake_at is None else max(0.0, wake_at - time.monotonic())
+            try:
+                raw = await asyncio.wait_for(websocket.receive_text(), timeout)
+            except asyncio.TimeoutError:
+                if expire_at is not None and time.monotonic() >= expire_at:
+                    section = session.section
+                    if not await _end_section(websocket, session, force=False):
+                        return
+                    flush_at = time.monotonic() + settings.WS_FLUSH_SECONDS if session.pending else None
+                    # Still the same section: another worker is expiring it, look again shortly
+                    expire_at = _expire_at(session) if session.section != section else time.monotonic() + 1
+                else:
+                    flush_at = None if await _flush(session) else time.monotonic() + settings.WS_FLUSH_SECONDS
+                continue
+
+            try:
+                message = json.loads(raw)
+                kind = message.get("type")
+            except (ValueError, AttributeError):
+                await websocket.send_text(_error("Messages must be JSON objects"))
+                continue
+
+            if kind in HANDLERS:
+                # Handlers write the Redis session state; a slow call must not stall the other sockets
+                reply = await run_in_threadpool(HANDLERS[kind], session, message)
+            elif kind == "end_section":
+                if not await _end_section(websocket, session, force=True):
+                    return
+                flush_at = time.monotonic() + settings.WS_FLUSH_SECONDS if session.pending else None
+                expire_at = _expire_at(session)
+                continue
+            elif kind == "submit":
+                if not await _flush(session):
+                    await websocket.send_text(_error("Answers could not be saved; try submitting again"))
+                    continue
+                result = await run_in_threadpool(complete_attempt, session)
+                await websocket.send_text(f'{{"type":"completed","attempt":{result or "null"}}}')
+                await websocket.close()
+                return
+            else:
+                reply = _error(f"Unknown message type: {kind}")
+            await websocket.send_text(reply)
+
+            if session.pending:
+                if len(session.pending) >= settings.WS_ANSWER_BATCH_SIZE:
+                    flush_at = None if await _flush(session) else time.monotonic() + settings.WS_FLUSH_SECONDS
+                elif flush_at is None:
+                    flush_at = time.monotonic() + settings.WS_FLUSH_SECONDS
+    except WebSocketDisconnect:
+        await run_in_threadpool(session.suspend)
+    finally:
+        await _flush(session)
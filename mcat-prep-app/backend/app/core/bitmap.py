@@ -0,0 +1,227 @@
+"""
+Compressed integer bitmap (roaring-style)
+
+Non-negative 32-bit integers are split by their high 16 bits into containers
+of up to 65536 values. A container holding at most ARRAY_LIMIT values is a
+sorted array('H') of the low 16 bits (two bytes per value); a fuller one is an
+8 KiB bitset. Set operations work container by container: array against
+array through Python sets, anything involving a bitset as one big-int
+operation on the two 65536-bit masks. Results are converted back to whichever
+form is smaller.
+
+Bitmaps are immutable; operations return new ones. to_bytes/from_bytes give a
+compact, portable encoding for storing them in Redis.
+"""
+import random
+import struct
+import sys
+from array import array
+from bisect import bisect_left
+from typing import Dict, Iterable, Iterator, List, Union
+
+ARRAY_LIMIT = 4096  # above this many values a bitset (8 KiB) is smaller than an array
+BITSET_BYTES = 8192
+
+Container = Union[array, bytes]
+
+# byte value -> positions of its set bits
+_BIT_POSITIONS = [tuple(bit for bit in range(8) if byte >> bit & 1) for byte in range(256)]
+
+_HEADER = struct.Struct("<I")  # container count
+_CONTAINER = struct.Struct("<HI")  # high 16 bits, cardinality
+
+
+def _little_endian(lows: array) -> bytes:
+    if sys.byteorder == "little":
+        return lows.tobytes()
+    swapped = array("H", lows)
+    swapped.byteswap()
+    return swapped.tobytes()
+
+
+def _positions(bitset: bytes) -> array:
+    return array("H", [index * 8 + bit for index, byte in enumerate(bitset) if byte for bit in _BIT_POSITIONS[byte]])
+
+
+def _mask(container: Container) -> int:
+    if isinstance(container, array):
+        bitset = bytearray(BITSET_BYTES)
+        for low in container:
+            bitset[low >> 3] |= 1 << (low & 7)
+        return int.from_bytes(bitset, "little")
+    return int.from_bytes(container, "little")
+
+
+def _from_mask(mask: int) -> Container:
+    """The smaller form of a 65536-bit mask, or an empty array"""
+    bitset = mask.to_bytes(BITSET_BYTES, "little")
+    if mask.bit_count() > ARRAY_LIMIT:
+        return bitset
+    return _positions(bitset)
+
+
+def _from_lows(lows: list) -> Container:
+    """Container for sorted, distinct low halves"""
+    if len(lows) > ARRAY_LIMIT:
+        bitset = bytearray(BITSET_BYTES)
+        for low in lows:
+            bitset[low >> 3] |= 1 << (low & 7)
+        return bytes(bitset)
+    return array("H", lows)
+
+
+def _cardinality(container: Container) -> int:
+    if isinstance(container, array):
+        return len(container)
+    return int.from_bytes(container, "little").bit_count()
+
+
+class Bitmap:
+    """An immutable set of integers in [0, 2**32)"""
+
+    __slots__ = ("_containers",)
+
+    def __init__(self, values: Iterable[int] = ()):
+        self._containers: Dict[int, Container] = {}
+        values = sorted(set(values))
+        if values and (values[0] < 0 or values[-1] >= 1 << 32):
+            raise ValueError("Bitmap values must be in [0, 2**32)")
+        start = 0
+        while start < len(values):
+            high = values[start] >> 16
+            end = bisect_left(values, (high + 1) << 16, start)
+            base = high << 16
+            self._containers[high] = _from_lows([value - base for value in values[start:end]])
+            start = end
+
+    @classmethod
+    def _of(cls, containers: Dict[int, Container]) -> "Bitmap":
+        bitmap = cls.__new__(cls)
+        bitmap._containers = {high: container for high, container in containers.items() if len(container)}
+        return bitmap
+
+    def __len__(self) -> int:
+        return sum(_cardinality(container) for container in self._containers.values())
+
+    def __bool__(self) -> bool:
+        return bool(self._containers)
+
+    def __contains__(self, value: int) -> bool:
+        container = self._containers.get(value >> 16)
+        if container is None:
+            return False
+        low = value & 0xFFFF
+        if isinstance(container, array):
+            index = bisect_left(container, low)
+            return index < len(container) and container[index] == low
+        return bool(container[low >> 3] >> (low & 7) & 1)
+
+    def __iter__(self) -> Iterator[int]:
+        for high in sorted(self._containers):
+            container = self._containers[high]
+            base = high << 16
+            lows = container if isinstance(container, array) else _positions(container)
+            for low in lows:
+                yield base | low
+
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, Bitmap):
+            return NotImplemented
+        return self._containers.keys() == other._containers.keys() and all(
+            _mask(container) == _mask(other._containers[high]) for high, container in self._containers.items()
+        )
+
+    def __repr__(self) -> str:
+        return f"<Bitmap {len(self)} values in {len(self._containers)} containers>"
+
+    def __or__(self, other: "Bitmap") -> "Bitmap":
+        containers = dict(self._containers)
+        for high, theirs in other._containers.items():
+            ours = containers.get(high)
+            if ours is None:
+                containers[high] = theirs
+            elif isinstance(ours, array) and isinstance(theirs, array):
+                containers[high] = _from_lows(sorted(set(ours).union(theirs)))
+            else:
+                containers[high] = _from_mask(_mask(ours) | _mask(theirs))
+        return Bitmap._of(containers)
+
+    def __and__(self, other: "Bitmap") -> "Bitmap":
+        containers = {}
+        for high, ours in self._containers.items():
+            theirs = other._containers.get(high)
+            if theirs is None:
+                continue
+            if isinstance(ours, array) and isinstance(theirs, array):
+                containers[high] = array("H", sorted(set(ours).intersection(theirs)))
+            else:
+                containers[high] = _from_mask(_mask(ours) & _mask(theirs))
+        return Bitmap._of(containers)
+
+    def __sub__(self, other: "Bitmap") -> "Bitmap":
+        containers = {}
+        for high, ours in self._containers.items():
+            theirs = other._containers.get(high)
+            if theirs is None:
+                containers[high] = ours
+            elif isinstance(ours, array):
+                if isinstance(theirs, array):
+                    excluded = set(theirs)
+                    containers[high] = array("H", [low for low in ours if low not in excluded])
+                else:
+                    containers[high] = array("H", [low for low in ours if not theirs[low >> 3] >> (low & 7) & 1])
+            else:
+                containers[high] = _from_mask(_mask(ours) & ~_mask(theirs))
+        return Bitmap._of(containers)
+
+    def sample(self, count: int, rng: random.Random = random) -> List[int]:
+        """count distinct values drawn at random (all of them if there are fewer), ascending
+
+        Picks ranks rather than listing the bitmap, so only containers that are
+        drawn from are expanded.
+        """
+        containers = [(high, self._containers[high]) for high in sorted(self._containers)]
+        sizes = [_cardinality(container) for _, container in containers]
+        total = sum(sizes)
+        ranks = iter(sorted(rng.sample(range(total), min(count, total))))
+        rank = next(ranks, None)
+        values, offset = [], 0
+        for (high, container), size in zip(containers, sizes):
+            if rank is None:
+                break
+            lows = None
+            while rank is not None and rank < offset + size:
+                if lows is None:
+                    lows = container if isinstance(container, array) else _positions(container)
+                values.append(high << 16 | lows[rank - offset])
+                rank = next(ranks, None)
+            offset += size
+        return values
+
+    def to_bytes(self) -> bytes:
+        parts = [_HEADER.pack(len(self._containers))]
+        for high in sorted(self._containers):
+            container = self._containers[high]
+            parts.append(_CONTAINER.pack(high, _cardinality(container)))
+            parts.append(_little_endian(container) if isinstance(container, array) else container)
+        return b"".join(parts)
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "Bitmap":
+        (count,) = _HEADER.unpack_from(data)
+        offset = _HEADER.size
+        containers = {}
+        for _ in range(count):
+            high, cardinality = _CONTAINER.unpack_from(data, offset)
+            offset += _CONTAINER.size
+            if cardinality > ARRAY_LIMIT:
+                containers[high] = bytes(data[offset:offset + BITSET_BYTES])
+                offset += BITSET_BYTES
+            else:
+                lows = array("H")
+                lows.frombytes(data[offset:offset + 2 * cardinality])
+                if sys.byteorder != "little":
+                    lows.byteswap()
+                containers[high] = lows
+                offset += 2 * cardinality
+        return cls._of(containers)
@@ -14,14 +14,22 @@ class Settings(BaseSettings):
     # Database
     DATABASE_URL: str
 
+    # Read replicas (optional, JSON list); read-only endpoints are routed to them
+    DATABASE_REPLICA_URLS: list[str] = []
+    REPLICA_RETRY_SECONDS: int = 30  # how long a failed replica stays out of rotation
+    REPLICA_CONNECT_TIMEOUT_SECONDS: int = 3
+    READ_YOUR_WRITES_SECONDS: int = 10  # reads stay on the primary this long after a write
+
     # Redis
     REDIS_URL: str
+    REDIS_SOCKET_TIMEOUT_SECONDS: float = 1.0
 
     # Security
     SECRET_KEY: str
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
     REFRESH_TOKEN_EXPIRE_DAYS: int = 7
+    BCRYPT_ROUNDS: int = 12
 
     # CORS
     BACKEND_CORS_ORIGINS: list[str] = [
@@ -41,6 +49,79 @@ class Settings(BaseSettings):
     GOOGLE_CLIENT_ID: Optional[str] = None
     GOOGLE_CLIENT_SECRET: Optional[str] = None
 
+    # Metrics
+    METRICS_ENABLED: bool = True
+    METRICS_MULTIPROC_DIR: Optional[str] = None  # shared dir when running several workers
+    METRICS_FLUSH_SECONDS: int = 5
+
+    # Query accounting
+    QUERY_STATS_ENABLED: bool = True
+    QUERY_STATS_HEADERS: bool = True  # X-DB-Query-Count / X-DB-Time-Ms response headers
+    N_PLUS_ONE_THRESHOLD: int = 5  # identical statements per request before warning
+
+    # Slow query log (disabled when the threshold is unset)
+    SLOW_QUERY_THRESHOLD_MS: Optional[int] = None
+    SLOW_QUERY_EXPLAIN_SAMPLE_RATE: float = 0.1
+    SLOW_QUERY_EXPLAIN_TIMEOUT_MS: int = 30000
+    SLOW_QUERY_LOG_PATH: str = "logs/slow_queries.jsonl"
+    SLOW_QUERY_LOG_MAX_BYTES: int = 10 * 1024 * 1024
+    SLOW_QUERY_LOG_BACKUPS: int = 10
+
+    # Cohort percentile sketches
+    COHORT_MIN_ATTEMPTS: int = 10  # attempts on a metric before a user is ranked on it
+    COHORT_SKETCH_SYNC_SECONDS: int = 30
+
+    # Study progress heartbeats
+    STUDY_HEARTBEAT_MAX_SECONDS: int = 60  # credit per ping is capped at this
+    STUDY_PROGRESS_FLUSH_SECONDS: int = 30
+    STUDY_PROGRESS_FLUSH_BATCH: int = 1000  # (user, module) pairs per upsert
+    STUDY_COMPLETION_RATIO: float = 0.9  # share of estimated_time_minutes that completes a module
+
+    # Live test sessions (WebSocket)
+    WS_ANSWER_BATCH_SIZE: int = 20  # answers buffered per socket before they are written
+    WS_FLUSH_SECONDS: int = 15  # longest an answer waits in the buffer
+    TEST_CONTENT_CACHE_SIZE: int = 64  # practice tests whose questions are kept in memory
+    TEST_CONTENT_CACHE_SECONDS: int = 300
+    QUIZ_CANDIDATE_CACHE_SIZE: int = 256  # quiz filters whose candidate bitmaps are kept in memory
+    TEST_BUNDLE_TTL_SECONDS: int = 7 * 24 * 3600  # gzipped bundles in Redis; a content import orphans them sooner
+
+    # Test session state (Redis) and checkpoints to user_test_attempts
+    TEST_SESSION_STATE_TTL_SECONDS: int = 7 * 24 * 3600  # idle sessions are reseeded from their checkpoint
+    TEST_CHECKPOINT_SECONDS: int = 30
+    TEST_CHECKPOINT_BATCH: int = 500
+
+    # Server-enforced section timers
+    SECTION_TIMER_TICK_MS: int = 20  # timer wheel resolution
+    SECTION_TIMER_SYNC_SECONDS: int = 5  # how often each worker reloads deadlines from Redis
+    SECTION_TIMER_HORIZON_SECONDS: int = 60  # deadlines due this soon are held in the wheel
+    SECTION_TIMER_CONCURRENCY: int = 8  # sections expired at once per worker
+    SECTION_GRACE_SECONDS: int = 2  # answers in flight this long after the deadline are still accepted
+
+    # Weekly leaderboards (Redis sorted sets)
+    LEADERBOARD_MIN_ATTEMPTS: int = 50  # answers in the week before a user is ranked by accuracy
+    LEADERBOARD_RETENTION_WEEKS: int = 4  # boards are kept this long after their week ends
+    LEADERBOARD_MAX_PAGE_SIZE: int = 100
+
+    # Seen-question bitmaps (custom quizzes skip questions a user has answered)
+    SEEN_QUESTIONS_TTL_SECONDS: int = 7 * 24 * 3600  # idle users' bitmaps are rebuilt from their attempts
+
+    # Taxonomy snapshot
+    TAXONOMY_REFRESH_SECONDS: int = 30  # how often workers check the content version
+
+    # Rate limits (token buckets): sustained requests per minute and burst size per client
+    RATE_LIMIT_ENABLED: bool = True
+    RATE_LIMIT_REDIS_RETRY_SECONDS: int = 5  # after a Redis error, local buckets are used this long
+    RATE_LIMIT_LOGIN_PER_MINUTE: int = 10  # per IP; each attempt costs a bcrypt verify
+    RATE_LIMIT_LOGIN_BURST: int = 5
+    RATE_LIMIT_QUIZ_CREATE_PER_MINUTE: int = 10  # per user; random sort over the question bank
+    RATE_LIMIT_QUIZ_CREATE_BURST: int = 5
+    RATE_LIMIT_DASHBOARD_PER_MINUTE: int = 30  # per user
+    RATE_LIMIT_DASHBOARD_BURST: int = 10
+
+    # Worker warm-up (lifespan startup)
+    WARMUP_ENABLED: bool = True
+    WARMUP_DB_CONNECTIONS: int = 4  # pooled connections opened per engine before serving
+
     # Sentry (Optional)
     SENTRY_DSN: Optional[str] = None
 
@@ -1,19 +1,160 @@
-from sqlalchemy import create_engine
+import itertools
+import logging
+import time
+from typing import Dict, List
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import Session, sessionmaker
+from sqlalchemy.sql.dml import UpdateBase
+from sqlalchemy.pool import QueuePool
 from app.core.config import settings
+from app.core.metrics import registry
+
+logger = logging.getLogger(__name__)
+
+
+class TimedQueuePool(QueuePool):
+    """QueuePool that records how long each checkout waited for a connection"""
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            registry.observe_pool_wait(time.perf_counter() - started)
+
 
 # Create database engine
 engine = create_engine(
     settings.DATABASE_URL,
+    poolclass=TimedQueuePool,
     pool_pre_ping=True,
     pool_size=10,
     max_overflow=20,
 )
 
+registry.gauge_collectors.append(
+    lambda: {
+        "db_pool_size": engine.pool.size(),
+        "db_pool_checked_out": engine.pool.checkedout(),
+        "db_pool_checked_in": engine.pool.checkedin(),
+        "db_pool_overflow": max(engine.pool.overflow(), 0),
+    }
+)
+
 # Create session factory
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+
+class ReplicaSet:
+    """Round-robin over read replicas, skipping any that recently failed
+
+    A replica is taken out of rotation for REPLICA_RETRY_SECONDS after a
+    connection error; when every replica is out, reads fall back to the primary.
+    """
+
+    def __init__(self, engines: List[Engine], primary: Engine):
+        self.engines = engines
+        self.primary = primary
+        self._turn = itertools.count()
+        self._down_until: Dict[Engine, float] = {}
+
+    def choose(self) -> Engine:
+        now = time.monotonic()
+        for _ in range(len(self.engines)):
+            candidate = self.engines[next(self._turn) % len(self.engines)]
+            if self._down_until.get(candidate, 0.0) <= now:
+                return candidate
+        return self.primary
+
+    def mark_down(self, replica: Engine) -> None:
+        if self._down_until.get(replica, 0.0) <= time.monotonic():
+            logger.warning(
+                "Read replica %s is unavailable, routing around it",
+                replica.url.render_as_string(hide_password=True),
+            )
+        self._down_until[replica] = time.monotonic() + settings.REPLICA_RETRY_SECONDS
+
+    def healthy(self) -> int:
+        now = time.monotonic()
+        return sum(1 for replica in self.engines if self._down_until.get(replica, 0.0) <= now)
+
+
+replica_engines = [
+    create_engine(
+        url,
+        poolclass=TimedQueuePool,
+        pool_pre_ping=True,
+        pool_size=10,
+        max_overflow=20,
+        connect_args={"connect_timeout": settings.REPLICA_CONNECT_TIMEOUT_SECONDS},
+    )
+    for url in settings.DATABASE_REPLICA_URLS
+]
+replicas = ReplicaSet(replica_engines, engine)
+
+
+def _watch_replica(replica: Engine) -> None:
+    @event.listens_for(replica, "handle_error")
+    def _on_error(context):
+        if context.is_disconnect or context.connection is None:
+            replicas.mark_down(replica)
+
+
+for _replica in replica_engines:
+    _watch_replica(_replica)
+
+if replica_engines:
+    registry.gauge_collectors.append(
+        lambda: {
+            "db_replicas_configured": len(replica_engines),
+            "db_replicas_healthy": replicas.healthy(),
+        }
+    )
+
+
+class RoutingSession(Session):
+    """Session that reads from ``info["replica"]`` but always writes to the primary
+
+    Flushes and INSERT/UPDATE/DELETE statements go to the primary, so an
+    endpoint on a read session that does write stays correct (it just loses
+    read-your-writes for anything it reads back in the same request).
+    """
+
+    def get_bind(self, mapper=None, clause=None, **kw):
+        replica = self.info.get("replica")
+        if replica is None or self._flushing or isinstance(clause, UpdateBase):
+            return engine
+        return replica
+
+
+ReadSessionLocal = sessionmaker(autocommit=False, autoflush=False, class_=RoutingSession)
+
+
+def open_read_session(use_primary: bool = False) -> Session:
+    """Session reading from a healthy replica (or the primary when none is usable)
+
+    The connection is checked out up front so that a dead replica is detected
+    here and the next one tried, instead of failing the request's first query.
+    """
+    db = ReadSessionLocal()
+    if use_primary or not replica_engines:
+        return db
+    for _ in range(len(replica_engines)):
+        replica = replicas.choose()
+        if replica is engine:
+            break
+        db.info["replica"] = replica
+        try:
+            db.connection()
+            return db
+        except Exception:
+            db.close()
+            replicas.mark_down(replica)
+            db = ReadSessionLocal()
+    return db
+
 # Base class for models
 Base = declarative_base()
 
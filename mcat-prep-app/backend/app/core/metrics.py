@@ -0,0 +1,274 @@
+"""
+Per-worker request and connection pool metrics in Prometheus text format
+
+Observations are plain integer/float updates on per-worker dictionaries: request
+metrics are recorded from the event loop thread only, so no locks are taken on the
+hot path. With several workers (uvicorn --workers / gunicorn), each worker
+periodically dumps a JSON snapshot into METRICS_MULTIPROC_DIR and /metrics merges
+every snapshot in that directory, so any worker can answer a scrape for all of them.
+"""
+import asyncio
+import json
+import os
+import time
+from bisect import bisect_left
+from typing import Callable, Dict, List, Optional, Tuple
+from app.core.config import settings
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SIZE_BUCKETS = (128, 1024, 8192, 65536, 524288, 4194304, 33554432)
+POOL_WAIT_BUCKETS = (0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 30.0)
+
+UNMATCHED_ROUTE = "<unmatched>"
+
+HELP = {
+    "http_request_duration_seconds": ("histogram", "Request latency by route"),
+    "http_response_size_bytes": ("histogram", "Response body size by route"),
+    "http_requests_total": ("counter", "Requests by route and status code"),
+    "http_requests_in_flight": ("gauge", "Requests currently being served"),
+    "db_pool_wait_seconds": ("histogram", "Time spent waiting for a pooled connection"),
+    "db_pool_size": ("gauge", "Configured connection pool size"),
+    "db_pool_checked_out": ("gauge", "Connections currently checked out"),
+    "db_pool_checked_in": ("gauge", "Idle connections in the pool"),
+    "db_pool_overflow": ("gauge", "Connections open beyond pool_size"),
+    "db_replicas_configured": ("gauge", "Read replicas configured"),
+    "db_replicas_healthy": ("gauge", "Read replicas currently in rotation"),
+    "study_heartbeats_total": ("counter", "Study progress heartbeats received"),
+    "study_progress_rows_written_total": ("counter", "user_study_progress rows written by heartbeat flushes"),
+    "rate_limited_total": ("counter", "Requests rejected by rate limits, by route"),
+    "test_bundle_requests_total": ("counter", "Test bundle requests by result (cached, built, uncached)"),
+}
+
+
+class Histogram:
+    """Fixed-bucket histogram; the last count slot is the +Inf bucket"""
+
+    __slots__ = ("buckets", "counts", "sum")
+
+    def __init__(self, buckets: Tuple[float, ...]):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+
+
+class MetricsRegistry:
+    """Metrics for the current worker process"""
+
+    def __init__(self):
+        self.histograms: Dict[str, Dict[Tuple[str, ...], Histogram]] = {
+            "http_request_duration_seconds": {},
+            "http_response_size_bytes": {},
+            "db_pool_wait_seconds": {(): Histogram(POOL_WAIT_BUCKETS)},
+        }
+        self.counters: Dict[str, Dict[Tuple[str, ...], float]] = {"http_requests_total": {}}
+        self.in_flight = 0
+        self.gauge_collectors: List[Callable[[], Dict[str, float]]] = []
+
+    def observe_request(self, method: str, route: str, status: int, seconds: float, size: int):
+        key = (method, route)
+        latency = self.histograms["http_request_duration_seconds"].get(key)
+        if latency is None:
+            latency = self.histograms["http_request_duration_seconds"][key] = Histogram(LATENCY_BUCKETS)
+            self.histograms["http_response_size_bytes"][key] = Histogram(SIZE_BUCKETS)
+        latency.observe(seconds)
+        self.histograms["http_response_size_bytes"][key].observe(size)
+
+        requests = self.counters["http_requests_total"]
+        status_key = (method, route, str(status))
+        requests[status_key] = requests.get(status_key, 0) + 1
+
+    def observe_pool_wait(self, seconds: float) -> None:
+        self.histograms["db_pool_wait_seconds"][()].observe(seconds)
+
+    def snapshot(self) -> dict:
+        """JSON-serializable view of this worker's metrics"""
+        gauges = {"http_requests_in_flight": self.in_flight}
+        for collect in self.gauge_collectors:
+            gauges.update(collect())
+        return {
+            "pid": os.getpid(),
+            "histograms": {
+                name: [[list(labels), list(h.buckets), list(h.counts), h.sum] for labels, h in series.items()]
+                for name, series in self.histograms.items()
+            },
+            "counters": {
+                name: [[list(labels), value] for labels, value in series.items()]
+                for name, series in self.counters.items()
+            },
+            "gauges": gauges,
+        }
+
+
+registry = MetricsRegistry()
+
+LABEL_NAMES = {
+    "http_request_duration_seconds": ("method", "route"),
+    "http_response_size_bytes": ("method", "route"),
+    "http_requests_total": ("method", "route", "status"),
+    "db_pool_wait_seconds": (),
+    "study_heartbeats_total": (),
+    "study_progress_rows_written_total": (),
+    "rate_limited_total": ("route",),
+    "test_bundle_requests_total": ("result",),
+}
+
+
+class MetricsMiddleware:
+    """Pure ASGI middleware recording latency, status and response size per route"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status_code = 500
+        size = 0
+
+        async def send_wrapper(message):
+            nonlocal status_code, size
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            elif message["type"] == "http.response.body":
+                size += len(message.get("body", b""))
+            await send(message)
+
+        registry.in_flight += 1
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            registry.in_flight -= 1
+            # FastAPI stores the matched route on the scope; use its template to bound cardinality
+            route = getattr(scope.get("route"), "path", UNMATCHED_ROUTE)
+            registry.observe_request(
+                scope["method"], route, status_code, time.perf_counter() - started, size
+            )
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def write_snapshot(directory: str) -> None:
+    """Atomically write this worker's snapshot into the shared directory"""
+    path = os.path.join(directory, f"{os.getpid()}.json")
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(registry.snapshot(), f)
+    os.replace(tmp_path, path)
+
+
+def collect_snapshots() -> List[dict]:
+    directory = settings.METRICS_MULTIPROC_DIR
+    if not directory:
+        return [registry.snapshot()]
+
+    write_snapshot(directory)
+    snapshots = []
+    for name in os.listdir(directory):
+        if not name.endswith(".json"):
+            continue
+        try:
+            with open(os.path.join(directory, name)) as f:
+                snapshots.append(json.load(f))
+        except (OSError, ValueError):
+            continue
+    return snapshots
+
+
+def merge_snapshots(snapshots: List[dict]) -> dict:
+    """Sum counters and histograms across workers; gauges only from live workers"""
+    histograms: Dict[str, Dict[tuple, list]] = {}
+    counters: Dict[str, Dict[tuple, float]] = {}
+    gauges: Dict[str, float] = {}
+
+    for snapshot in snapshots:
+        for name, series in snapshot["histograms"].items():
+            merged = histograms.setdefault(name, {})
+            for labels, buckets, counts, total in series:
+                key = tuple(labels)
+                if key not in merged:
+                    merged[key] = [buckets, [0] * len(counts), 0.0]
+                merged[key][1] = [a + b for a, b in zip(merged[key][1], counts)]
+                merged[key][2] += total
+        for name, series in snapshot["counters"].items():
+            merged = counters.setdefault(name, {})
+            for labels, value in series:
+                merged[tuple(labels)] = merged.get(tuple(labels), 0) + value
+        # Counters of exited workers stay (they must never go backwards); their gauges do not
+        if _pid_alive(snapshot["pid"]):
+            for name, value in snapshot["gauges"].items():
+                gauges[name] = gauges.get(name, 0) + value
+
+    return {"histograms": histograms, "counters": counters, "gauges": gauges}
+
+
+def _labels(names: Tuple[str, ...], values: tuple, extra: Optional[str] = None) -> str:
+    pairs = [f'{name}="{value}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_float(value: float) -> str:
+    return repr(float(value)) if value != int(value) else str(int(value))
+
+
+def render_prometheus() -> str:
+    """Render merged metrics in the Prometheus text exposition format (version 0.0.4)"""
+    merged = merge_snapshots(collect_snapshots())
+    lines = []
+
+    def header(name):
+        kind, description = HELP[name]
+        lines.append(f"# HELP {name} {description}")
+        lines.append(f"# TYPE {name} {kind}")
+
+    for name, series in merged["histograms"].items():
+        header(name)
+        names = LABEL_NAMES[name]
+        for labels, (buckets, counts, total) in sorted(series.items()):
+            cumulative = 0
+            for bound, count in zip(buckets, counts):
+                cumulative += count
+                bucket_labels = _labels(names, labels, 'le="%s"' % bound)
+                lines.append(f"{name}_bucket{bucket_labels} {cumulative}")
+            cumulative += counts[-1]
+            bucket_labels = _labels(names, labels, 'le="+Inf"')
+            lines.append(f"{name}_bucket{bucket_labels} {cumulative}")
+            lines.append(f"{name}_sum{_labels(names, labels)} {_format_float(total)}")
+            lines.append(f"{name}_count{_labels(names, labels)} {cumulative}")
+
+    for name, series in merged["counters"].items():
+        header(name)
+        names = LABEL_NAMES[name]
+        for labels, value in sorted(series.items()):
+            lines.append(f"{name}{_labels(names, labels)} {_format_float(value)}")
+
+    for name, value in sorted(merged["gauges"].items()):
+        header(name)
+        lines.append(f"{name} {_format_float(value)}")
+
+    return "\n".join(lines) + "\n"
+
+
+async def flush_snapshots_periodically() -> None:
+    """Keep this worker's snapshot fresh for scrapes answered by other workers"""
+    directory = settings.METRICS_MULTIPROC_DIR
+    os.makedirs(directory, exist_ok=True)
+    while True:
+        write_snapshot(directory)
+        await asyncio.sleep(settings.METRICS_FLUSH_SECONDS)
@@ -0,0 +1,146 @@
+"""
+Per-request SQL statement accounting and N+1 detection
+
+Engine event hooks time every statement and add it to the QueryStats of the
+request currently being served (tracked in a context variable, which also follows
+the request into threadpool-run dependencies). QueryStatsMiddleware exposes the
+totals as X-DB-Query-Count / X-DB-Time-Ms response headers and log fields, and
+warns when one statement shape repeats often enough to look like an N+1 loop.
+"""
+import logging
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import List, Optional, Tuple
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class QueryStats:
+    """Statements issued while serving one request"""
+
+    __slots__ = ("scope", "count", "seconds", "shapes")
+
+    def __init__(self, scope: Optional[dict] = None):
+        self.scope = scope
+        self.count = 0
+        self.seconds = 0.0
+        self.shapes: Counter = Counter()
+
+    @property
+    def route(self) -> Optional[str]:
+        """Matched route template once routing has happened, else the raw path"""
+        if self.scope is None:
+            return None
+        return getattr(self.scope.get("route"), "path", self.scope["path"])
+
+    def record(self, statement: str, seconds: float) -> None:
+        self.count += 1
+        self.seconds += seconds
+        self.shapes[statement] += 1
+
+    def repeated_shapes(self, threshold: int) -> List[Tuple[str, int]]:
+        """Statement shapes issued at least ``threshold`` times (likely N+1 loops)"""
+        return [(shape, n) for shape, n in self.shapes.most_common() if n >= threshold]
+
+
+_current_stats: ContextVar[Optional[QueryStats]] = ContextVar("query_stats", default=None)
+
+
+def current_query_stats() -> Optional[QueryStats]:
+    return _current_stats.get()
+
+
+def instrument_engine(engine: Engine) -> None:
+    """Attach statement timing hooks to ``engine``"""
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_started_at", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info["query_started_at"].pop()
+        stats = _current_stats.get()
+        if stats is not None:
+            stats.record(statement, elapsed)
+
+
+class QueryStatsMiddleware:
+    """Pure ASGI middleware scoping a QueryStats to each HTTP request"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = QueryStats(scope)
+        token = _current_stats.set(stats)
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start" and settings.QUERY_STATS_HEADERS:
+                message.setdefault("headers", [])
+                message["headers"] = list(message["headers"]) + [
+                    (b"x-db-query-count", str(stats.count).encode()),
+                    (b"x-db-time-ms", f"{stats.seconds * 1000:.2f}".encode()),
+                ]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _current_stats.reset(token)
+            _log_request(scope["method"], stats)
+
+
+def _log_request(method: str, stats: QueryStats) -> None:
+    if stats.count:
+        logger.info(
+            "%s %s issued %d queries in %.2fms",
+            method,
+            stats.route,
+            stats.count,
+            stats.seconds * 1000,
+            extra={"route": stats.route, "db_queries": stats.count, "db_time_ms": stats.seconds * 1000},
+        )
+    for shape, repeats in stats.repeated_shapes(settings.N_PLUS_ONE_THRESHOLD):
+        logger.warning(
+            "Possible N+1 in %s %s: statement ran %d times: %s",
+            method,
+            stats.route,
+            repeats,
+            " ".join(shape.split())[:300],
+            extra={"route": stats.route, "n_plus_one_repeats": repeats},
+        )
+
+
+@contextmanager
+def assert_max_queries(engine: Engine, limit: int):
+    """Fail if more than ``limit`` statements run on ``engine`` inside the block
+
+    Intended for tests, e.g. keeping submit_question_attempt within budget:
+
+        with assert_max_queries(engine, 4):
+            client.post("/api/questions/attempt", json=payload, headers=auth)
+    """
+    stats = QueryStats()
+
+    def _count(conn, cursor, statement, parameters, context, executemany):
+        stats.record(statement, 0.0)
+
+    event.listen(engine, "after_cursor_execute", _count)
+    try:
+        yield stats
+    finally:
+        event.remove(engine, "after_cursor_execute", _count)
+
+    if stats.count > limit:
+        statements = "\n".join(f"  {n}× {' '.join(shape.split())[:200]}" for shape, n in stats.shapes.items())
+        raise AssertionError(f"Expected at most {limit} queries, got {stats.count}:\n{statements}")
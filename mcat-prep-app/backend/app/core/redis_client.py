@@ -0,0 +1,17 @@
+import redis
+from app.core.config import settings
+
+# Shared client; connections are opened lazily on the first command
+redis_client = redis.Redis.from_url(
+    settings.REDIS_URL,
+    decode_responses=True,
+    socket_timeout=settings.REDIS_SOCKET_TIMEOUT_SECONDS,
+    socket_connect_timeout=settings.REDIS_SOCKET_TIMEOUT_SECONDS,
+)
+
+# Same server, for values stored as raw bytes (gzipped test bundles)
+redis_binary_client = redis.Redis.from_url(
+    settings.REDIS_URL,
+    socket_timeout=settings.REDIS_SOCKET_TIMEOUT_SECONDS,
+    socket_connect_timeout=settings.REDIS_SOCKET_TIMEOUT_SECONDS,
+)
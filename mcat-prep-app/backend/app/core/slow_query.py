@@ -0,0 +1,160 @@
+"""
+Slow query log with sampled EXPLAIN (ANALYZE, BUFFERS) capture
+
+Statements slower than SLOW_QUERY_THRESHOLD_MS are written as JSON lines to a
+rotating file: normalized SQL, a stable fingerprint, bind-parameter types, the
+calling route and the duration. For a sampled share of slow SELECTs the plan is
+captured on a background thread with its own connection, so the request that hit
+the slow query never waits for the EXPLAIN. Because records are keyed by
+fingerprint, logs from two releases can be diffed directly.
+"""
+import hashlib
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import random
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from typing import Any, Dict, Optional
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from app.core.config import settings
+from app.core.query_stats import current_query_stats
+
+logger = logging.getLogger("app.slow_query")
+logger.propagate = False
+
+_PLACEHOLDER = re.compile(r"%\(\w+\)s|%s|\$\d+")
+_IN_LIST = re.compile(r"\bIN\s*\((?:\s*\?\s*,?)+\)", re.IGNORECASE)
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_LITERAL = re.compile(r"(?<![\w.])-?\d+(?:\.\d+)?\b")
+_WHITESPACE = re.compile(r"\s+")
+
+MAX_PENDING_EXPLAINS = 4
+
+_explain_executor: Optional[ThreadPoolExecutor] = None
+_pending_explains = threading.BoundedSemaphore(MAX_PENDING_EXPLAINS)
+
+
+def normalize_sql(statement: str) -> str:
+    """Strip literals and placeholders so equivalent statements share one shape"""
+    sql = _PLACEHOLDER.sub("?", statement)
+    sql = _STRING_LITERAL.sub("?", sql)
+    sql = _NUMBER_LITERAL.sub("?", sql)
+    sql = _WHITESPACE.sub(" ", sql).strip()
+    return _IN_LIST.sub("IN (...)", sql)
+
+
+def fingerprint(normalized: str) -> str:
+    return hashlib.sha1(normalized.encode()).hexdigest()[:16]
+
+
+def parameter_shape(parameters: Any, executemany: bool) -> Any:
+    """Types of the bound values, never the values themselves"""
+    if executemany and parameters:
+        return {"rows": len(parameters), "row": parameter_shape(parameters[0], False)}
+    if isinstance(parameters, dict):
+        return {name: type(value).__name__ for name, value in parameters.items()}
+    if isinstance(parameters, (list, tuple)):
+        return [type(value).__name__ for value in parameters]
+    return None
+
+
+def _is_explainable(statement: str) -> bool:
+    head = statement.lstrip().split(None, 1)[0].upper() if statement.strip() else ""
+    return head in ("SELECT", "WITH") and "FOR UPDATE" not in statement.upper()
+
+
+def _write(record: Dict[str, Any]) -> None:
+    logger.info(json.dumps(record, default=str))
+
+
+def _capture_explain(engine: Engine, statement: str, parameters: Any, record_id: str, fp: str):
+    """Run EXPLAIN ANALYZE on a separate raw connection (bypassing engine events) and roll back"""
+    try:
+        connection = engine.raw_connection()
+        try:
+            cursor = connection.cursor()
+            cursor.execute("SET LOCAL statement_timeout = %s", (settings.SLOW_QUERY_EXPLAIN_TIMEOUT_MS,))
+            cursor.execute(f"EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) {statement}", parameters)
+            plan = cursor.fetchone()[0]
+            connection.rollback()
+        finally:
+            connection.close()
+        _write({"type": "explain", "id": record_id, "fingerprint": fp, "plan": plan})
+    except Exception as e:  # a failed EXPLAIN must never affect the application
+        _write({"type": "explain_error", "id": record_id, "fingerprint": fp, "error": str(e)})
+    finally:
+        _pending_explains.release()
+
+
+def _on_slow_statement(engine, statement, parameters, executemany, elapsed):
+    normalized = normalize_sql(statement)
+    fp = fingerprint(normalized)
+    stats = current_query_stats()
+    record_id = f"{fp}-{time.time_ns()}"
+    _write(
+        {
+            "type": "slow_query",
+            "id": record_id,
+            "at": datetime.now(timezone.utc).isoformat(),
+            "fingerprint": fp,
+            "duration_ms": round(elapsed * 1000, 2),
+            "route": stats.route if stats else None,
+            "sql": normalized,
+            "parameters": parameter_shape(parameters, executemany),
+            "release": settings.VERSION,
+        }
+    )
+
+    if (
+        not executemany
+        and _is_explainable(statement)
+        and random.random() < settings.SLOW_QUERY_EXPLAIN_SAMPLE_RATE
+        and _pending_explains.acquire(blocking=False)  # drop samples rather than queue up
+    ):
+        _explain_executor.submit(_capture_explain, engine, statement, parameters, record_id, fp)
+
+
+def configure_slow_query_log(*engines: Engine) -> None:
+    """Start logging statements slower than SLOW_QUERY_THRESHOLD_MS on ``engines``"""
+    global _explain_executor
+    threshold = settings.SLOW_QUERY_THRESHOLD_MS / 1000
+
+    directory = os.path.dirname(settings.SLOW_QUERY_LOG_PATH)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    file_handler = logging.handlers.RotatingFileHandler(
+        settings.SLOW_QUERY_LOG_PATH,
+        maxBytes=settings.SLOW_QUERY_LOG_MAX_BYTES,
+        backupCount=settings.SLOW_QUERY_LOG_BACKUPS,
+    )
+    file_handler.setFormatter(logging.Formatter("%(message)s"))
+    # The request thread only enqueues; a listener thread does the file I/O
+    records: queue.Queue = queue.Queue(-1)
+    logger.addHandler(logging.handlers.QueueHandler(records))
+    logger.setLevel(logging.INFO)
+    logging.handlers.QueueListener(records, file_handler).start()
+
+    _explain_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="slow-query-explain")
+
+    for engine in engines:
+        _watch_engine(engine, threshold)
+
+
+def _watch_engine(engine: Engine, threshold: float) -> None:
+    # EXPLAIN runs on the engine that served the statement, so replica plans come from the replica
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("slow_query_started_at", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info["slow_query_started_at"].pop()
+        if elapsed >= threshold:
+            _on_slow_statement(engine, statement, parameters, executemany, elapsed)
@@ -0,0 +1,91 @@
+"""
+Hierarchical timer wheel
+
+Timers are hashed into ``levels`` wheels of ``slots`` slots each. A level-0 slot
+spans one tick, a level-1 slot spans a whole level-0 revolution, and so on, so
+scheduling and cancelling are O(1) dict operations however many timers are
+pending. Advancing the clock visits one level-0 slot per tick and, when a lower
+wheel wraps, cascades the next higher slot down. Timers further out than the
+top wheel's span wait in its farthest slot and are re-placed as it comes round.
+
+Not thread-safe; drive it from a single event loop.
+"""
+import time
+from typing import Dict, Hashable, List, Optional, Tuple
+
+
+def now_ms() -> int:
+    return int(time.time() * 1000)
+
+
+class TimerWheel:
+    """Keyed one-shot timers on an absolute millisecond clock"""
+
+    def __init__(self, tick_ms: int = 10, slots: int = 256, levels: int = 4, start_ms: Optional[int] = None):
+        self.tick_ms = tick_ms
+        self.slots = slots
+        self.levels = levels
+        self.current = (now_ms() if start_ms is None else start_ms) // tick_ms  # next tick to process
+        self._spans = [slots ** level for level in range(levels + 1)]  # ticks per slot, per level
+        self._wheels: List[List[Dict[Hashable, int]]] = [[{} for _ in range(slots)] for _ in range(levels)]
+        self._where: Dict[Hashable, Tuple[int, int]] = {}
+
+    def __len__(self) -> int:
+        return len(self._where)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._where
+
+    def _place(self, key: Hashable, deadline_ms: int) -> None:
+        target = max(deadline_ms // self.tick_ms, self.current)
+        delta = target - self.current
+        level = 0
+        while level < self.levels - 1 and delta >= self._spans[level + 1]:
+            level += 1
+        if delta >= self._spans[self.levels]:
+            # Beyond the top wheel: park in its farthest slot and re-place on the way down
+            target = self.current + self._spans[self.levels] - self._spans[level]
+        slot = (target // self._spans[level]) % self.slots
+        self._wheels[level][slot][key] = deadline_ms
+        self._where[key] = (level, slot)
+
+    def schedule(self, key: Hashable, deadline_ms: int) -> None:
+        """Fire ``key`` at ``deadline_ms``, replacing any timer already set for it"""
+        self.cancel(key)
+        self._place(key, deadline_ms)
+
+    def cancel(self, key: Hashable) -> bool:
+        where = self._where.pop(key, None)
+        if where is None:
+            return False
+        level, slot = where
+        del self._wheels[level][slot][key]
+        return True
+
+    def advance(self, to_ms: Optional[int] = None) -> List[Hashable]:
+        """Move the clock to ``to_ms`` and return the keys whose deadline has passed"""
+        fired = []
+        last = (now_ms() if to_ms is None else to_ms) // self.tick_ms
+        while self.current <= last:
+            # Cascade higher wheels whose slot boundary is this tick
+            for level in range(1, self.levels):
+                if self.current % self._spans[level]:
+                    break
+                slot = (self.current // self._spans[level]) % self.slots
+                entries, self._wheels[level][slot] = self._wheels[level][slot], {}
+                for key, deadline_ms in entries.items():
+                    del self._where[key]
+                    self._place(key, deadline_ms)
+
+            slot = self.current % self.slots
+            entries = self._wheels[0][slot]
+            if entries:
+                self._wheels[0][slot] = {}
+                for key, deadline_ms in entries.items():
+                    del self._where[key]
+                    if deadline_ms // self.tick_ms > self.current:
+                        self._place(key, deadline_ms)  # parked far-future timer, not due yet
+                    else:
+                        fired.append(key)
+            self.current += 1
+        return fired
@@ -0,0 +1,72 @@
+"""
+Worker warm-up
+
+Everything a cold worker would otherwise do on its first requests: configure
+the SQLAlchemy mappers, open pooled connections to the primary and replicas,
+load the bcrypt backend and run jose once, and connect to Redis. Each step is
+timed and logged; a failing step is logged and skipped so a worker still
+starts when, say, a replica is down.
+"""
+import logging
+import time
+from typing import Callable, Dict, List, Optional
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import configure_mappers
+from app.core.config import settings
+from app.core.database import engine, replica_engines
+from app.core.redis_client import redis_client
+from app.core.security import create_access_token, decode_token, get_password_hash
+
+logger = logging.getLogger(__name__)
+
+
+def configure_all_mappers() -> None:
+    import app.models  # noqa: F401  (registers every model before configuring)
+
+    configure_mappers()
+
+
+def fill_pool(db_engine: Engine, connections: int) -> None:
+    """Open ``connections`` pooled connections at once, then return them to the pool"""
+    opened = []
+    try:
+        for _ in range(min(connections, db_engine.pool.size())):
+            connection = db_engine.connect()
+            opened.append(connection)
+            connection.exec_driver_sql("SELECT 1")
+    finally:
+        for connection in opened:
+            connection.close()
+
+
+def fill_pools() -> None:
+    for db_engine in [engine, *replica_engines]:
+        fill_pool(db_engine, settings.WARMUP_DB_CONNECTIONS)
+
+
+def prime_crypto() -> None:
+    get_password_hash("warm-up")  # loads and self-tests the bcrypt backend
+    decode_token(create_access_token({"sub": "warm-up"}))
+
+
+def connect_redis() -> None:
+    redis_client.ping()
+
+
+def run_steps(steps: List[Callable[[], None]]) -> Dict[str, Optional[float]]:
+    """Run warm-up steps in order; returns milliseconds per step (None if it failed)"""
+    timings = {}
+    for step in steps:
+        started = time.perf_counter()
+        try:
+            step()
+            timings[step.__name__] = round((time.perf_counter() - started) * 1000, 1)
+        except Exception as e:
+            logger.warning("Warm-up step %s failed: %s", step.__name__, e)
+            timings[step.__name__] = None
+    logger.info("Worker warm-up: %s", ", ".join(f"{name} {ms} ms" for name, ms in timings.items()))
+    return timings
+
+
+def warm_up(*extra_steps: Callable[[], None]) -> Dict[str, Optional[float]]:
+    return run_steps([configure_all_mappers, fill_pools, prime_crypto, connect_redis, *extra_steps])
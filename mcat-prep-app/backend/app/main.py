@@ -1,7 +1,56 @@
+import asyncio
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse
 from app.core.config import settings
-from app.api.endpoints import auth, questions, study, tests, analytics, users
+from app.core.database import engine, replica_engines
+from app.core.query_stats import QueryStatsMiddleware, instrument_engine
+from app.core.slow_query import configure_slow_query_log
+from app.core.metrics import MetricsMiddleware, render_prometheus, flush_snapshots_periodically
+from app.core.warmup import warm_up
+from app.services.cohort import cohort, sync_sketches_periodically
+from app.services.study_progress import flush_heartbeats, flush_heartbeats_periodically
+from app.services.session_state import checkpoint, checkpoint_sessions_periodically
+from app.services.section_timers import run_section_timers
+from app.services.taxonomy import load_taxonomy, refresh_taxonomy_periodically
+from app.api.endpoints import auth, questions, study, tests, analytics, users, ws
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Warm the worker up before it accepts requests, run background tasks, flush on the way out"""
+    if settings.WARMUP_ENABLED:
+        await asyncio.to_thread(warm_up, load_taxonomy)
+
+    coroutines = [
+        sync_sketches_periodically(),  # cohort percentile sketches, shared with other workers
+        flush_heartbeats_periodically(),  # coalesced study heartbeats, written in batches
+        checkpoint_sessions_periodically(),  # Redis test-session state into user_test_attempts
+        run_section_timers(),  # submit and advance timed test sections at their deadline
+        refresh_taxonomy_periodically(),  # reload the taxonomy snapshot after content imports
+    ]
+    if settings.METRICS_ENABLED and settings.METRICS_MULTIPROC_DIR:
+        coroutines.append(flush_snapshots_periodically())  # share this worker's metrics with the others
+    background_tasks = [asyncio.create_task(coroutine) for coroutine in coroutines]
+
+    yield
+
+    for task in background_tasks:
+        task.cancel()
+    try:
+        await asyncio.to_thread(cohort.flush)
+    except Exception:
+        pass  # at most one sync interval of deltas is lost; rebuild_aggregates repairs it
+    try:
+        await flush_heartbeats()
+    except Exception:
+        pass  # heartbeats still in Redis are written by the next worker to flush
+    try:
+        await asyncio.to_thread(checkpoint)
+    except Exception:
+        pass  # the state stays in Redis and is checkpointed by another worker
+
 
 # Create FastAPI application
 app = FastAPI(
@@ -10,6 +59,7 @@ app = FastAPI(
     description="MCAT Preparation Platform API",
     docs_url="/docs",
     redoc_url="/redoc",
+    lifespan=lifespan,
 )
 
 # Configure CORS
@@ -21,6 +71,19 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Count statements and DB time per request
+if settings.QUERY_STATS_ENABLED:
+    for db_engine in [engine, *replica_engines]:
+        instrument_engine(db_engine)
+    app.add_middleware(QueryStatsMiddleware)
+
+# Log slow statements with sampled query plans
+if settings.SLOW_QUERY_THRESHOLD_MS is not None:
+    configure_slow_query_log(engine, *replica_engines)
+
+# Record per-route metrics (outermost, so it also times the middleware above)
+if settings.METRICS_ENABLED:
+    app.add_middleware(MetricsMiddleware)
 
 # Health check endpoint
 @app.get("/")
@@ -40,6 +103,12 @@ async def health_check():
     return {"status": "healthy"}
 
 
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    """Prometheus metrics for all workers"""
+    return PlainTextResponse(render_prometheus(), media_type="text/plain; version=0.0.4")
+
+
 # Include routers
 app.include_router(auth.router, prefix="/api/auth", tags=["Authentication"])
 app.include_router(users.router, prefix="/api/users", tags=["Users"])
@@ -47,6 +116,7 @@ app.include_router(study.router, prefix="/api/study", tags=["Study Materials"])
 app.include_router(questions.router, prefix="/api/questions", tags=["Questions"])
 app.include_router(tests.router, prefix="/api/tests", tags=["Tests & Quizzes"])
 app.include_router(analytics.router, prefix="/api/analytics", tags=["Analytics"])
+app.include_router(ws.router, prefix="/ws")
 
 
 if __name__ == "__main__":
@@ -2,24 +2,31 @@ from app.models.user import User
 from app.models.content import (
     AAMCFoundationalConcept,
     Topic,
+    TopicClosure,
     StudyModule,
     Passage,
     Question,
 )
-from app.models.test import PracticeTest, UserTestAttempt, UserQuestionAttempt
+from app.models.test import PracticeTest, UserQuiz, UserTestAttempt, UserQuestionAttempt
 from app.models.progress import UserStudyProgress, UserGoal, ReviewQueue
+from app.models.analytics import UserDailySectionStats, UserMetricTotals, CohortSketchBin
 
 __all__ = [
     "User",
     "AAMCFoundationalConcept",
     "Topic",
+    "TopicClosure",
     "StudyModule",
     "Passage",
     "Question",
     "PracticeTest",
+    "UserQuiz",
     "UserTestAttempt",
     "UserQuestionAttempt",
     "UserStudyProgress",
     "UserGoal",
     "ReviewQueue",
+    "UserDailySectionStats",
+    "UserMetricTotals",
+    "CohortSketchBin",
 ]
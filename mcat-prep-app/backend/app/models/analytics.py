@@ -0,0 +1,47 @@
+from sqlalchemy import Column, String, Integer, BigInteger, Date, ForeignKey
+from sqlalchemy.dialects.postgresql import UUID
+from app.core.database import Base
+
+
+class UserDailySectionStats(Base):
+    """Per-user, per-day, per-section attempt rollup - Maintained on write"""
+
+    __tablename__ = "user_daily_section_stats"
+
+    user_id = Column(UUID(as_uuid=True), ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    day = Column(Date, primary_key=True)  # UTC calendar day of the attempts
+    mcat_section = Column(String(10), primary_key=True)
+
+    attempts = Column(Integer, nullable=False, default=0)
+    correct = Column(Integer, nullable=False, default=0)
+    seconds_spent = Column(BigInteger, nullable=False, default=0)
+
+    def __repr__(self):
+        return f"<UserDailySectionStats User {self.user_id} - {self.day} {self.mcat_section}>"
+
+
+class UserMetricTotals(Base):
+    """Running per-user attempt totals for each cohort-ranked metric"""
+
+    __tablename__ = "user_metric_totals"
+
+    user_id = Column(UUID(as_uuid=True), ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    metric = Column(String(64), primary_key=True)  # 'accuracy:section:CPBS', 'accuracy:concept:12'
+    attempts = Column(Integer, nullable=False, default=0)
+    correct = Column(Integer, nullable=False, default=0)
+
+    def __repr__(self):
+        return f"<UserMetricTotals User {self.user_id} - {self.metric}>"
+
+
+class CohortSketchBin(Base):
+    """One bin of a cohort histogram sketch (see app.services.cohort)"""
+
+    __tablename__ = "cohort_sketch_bins"
+
+    metric = Column(String(64), primary_key=True)
+    bin = Column(Integer, primary_key=True)
+    count = Column(BigInteger, nullable=False, default=0)
+
+    def __repr__(self):
+        return f"<CohortSketchBin {self.metric}[{self.bin}] = {self.count}>"
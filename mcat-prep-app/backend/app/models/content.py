@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, Integer, Text, DateTime, ForeignKey, ARRAY, CheckConstraint
+from sqlalchemy import Column, String, Integer, Text, DateTime, ForeignKey, ARRAY, CheckConstraint, Sequence
 from sqlalchemy.dialects.postgresql import UUID, JSONB
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
@@ -45,6 +45,24 @@ class Topic(Base):
         return f"<Topic {self.name}>"
 
 
+class TopicClosure(Base):
+    """Every (ancestor, descendant) pair of the topic hierarchy, each topic included with itself at depth 0
+
+    Rebuilt by the content importer; see app.services.topic_closure.
+    """
+
+    __tablename__ = "topic_closure"
+
+    ancestor_id = Column(Integer, ForeignKey("topics.id", ondelete="CASCADE"), primary_key=True)
+    descendant_id = Column(
+        Integer, ForeignKey("topics.id", ondelete="CASCADE"), primary_key=True, index=True
+    )
+    depth = Column(Integer, nullable=False)
+
+    def __repr__(self):
+        return f"<TopicClosure {self.ancestor_id} -> {self.descendant_id} ({self.depth})>"
+
+
 class StudyModule(Base):
     """Study Module model"""
 
@@ -85,12 +103,24 @@ class Passage(Base):
         return f"<Passage {self.id}>"
 
 
+questions_ordinal_seq = Sequence("questions_ordinal_seq")
+
+
 class Question(Base):
     """Question model"""
 
     __tablename__ = "questions"
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    # Dense integer id, so sets of questions (e.g. a user's seen questions) fit compressed bitmaps
+    ordinal = Column(
+        Integer,
+        questions_ordinal_seq,
+        server_default=questions_ordinal_seq.next_value(),
+        nullable=False,
+        unique=True,
+        index=True,
+    )
     question_type = Column(String(20), nullable=False, index=True)  # 'passage_based', 'standalone'
     mcat_section = Column(String(10), nullable=False, index=True)
     passage_id = Column(UUID(as_uuid=True), ForeignKey("passages.id"), nullable=True)
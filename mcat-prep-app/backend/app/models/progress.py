@@ -61,7 +61,8 @@ class ReviewQueue(Base):
     question_id = Column(UUID(as_uuid=True), ForeignKey("questions.id"), nullable=False)
     added_at = Column(DateTime(timezone=True), server_default=func.now())
     priority = Column(Integer, default=0, index=True)  # Higher = more urgent to review
-    last_attempt_id = Column(UUID(as_uuid=True), ForeignKey("user_question_attempts.id"), nullable=True)
+    # Not a foreign key: attempts are partitioned and keyed on (id, attempted_at)
+    last_attempt_id = Column(UUID(as_uuid=True), nullable=True)
 
     __table_args__ = (
         UniqueConstraint("user_id", "question_id", name="unique_user_question_review"),
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, Integer, Text, DateTime, ForeignKey, Boolean, CheckConstraint
+from sqlalchemy import Column, String, Integer, Text, DateTime, ForeignKey, Boolean, CheckConstraint, Index
 from sqlalchemy.dialects.postgresql import UUID, JSONB
 from sqlalchemy.sql import func
 import uuid
@@ -28,6 +28,26 @@ class PracticeTest(Base):
         return f"<PracticeTest {self.title}>"
 
 
+class UserQuiz(Base):
+    """User Quiz model - one user's custom quiz
+
+    The questions live in a shared practice_tests row (test_type 'custom_quiz')
+    whose id is derived from its content, so identical quizzes share one row.
+    """
+
+    __tablename__ = "user_quizzes"
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    user_id = Column(UUID(as_uuid=True), ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    practice_test_id = Column(UUID(as_uuid=True), ForeignKey("practice_tests.id"), nullable=False, index=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+
+    __table_args__ = (Index("ix_user_quizzes_user_id_created_at", "user_id", "created_at"),)
+
+    def __repr__(self):
+        return f"<UserQuiz {self.id} - User {self.user_id}>"
+
+
 class UserTestAttempt(Base):
     """User Test Attempt model"""
 
@@ -35,7 +55,7 @@ class UserTestAttempt(Base):
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     user_id = Column(UUID(as_uuid=True), ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)
-    practice_test_id = Column(UUID(as_uuid=True), ForeignKey("practice_tests.id"), nullable=False)
+    practice_test_id = Column(UUID(as_uuid=True), ForeignKey("practice_tests.id"), nullable=False, index=True)
 
     # Attempt metadata
     started_at = Column(DateTime(timezone=True), server_default=func.now())
@@ -72,18 +92,22 @@ class UserTestAttempt(Base):
 
 
 class UserQuestionAttempt(Base):
-    """User Question Attempt model - Critical for analytics"""
+    """User Question Attempt model - Critical for analytics
+
+    Range-partitioned by month on attempted_at (see the partitioning migration),
+    so attempted_at is part of the primary key.
+    """
 
     __tablename__ = "user_question_attempts"
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
-    user_id = Column(UUID(as_uuid=True), ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)
+    user_id = Column(UUID(as_uuid=True), ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
     question_id = Column(UUID(as_uuid=True), ForeignKey("questions.id"), nullable=False, index=True)
     test_attempt_id = Column(UUID(as_uuid=True), ForeignKey("user_test_attempts.id"), nullable=True, index=True)
 
     # Attempt details
     selected_answer = Column(String(1), nullable=False)  # A, B, C, D, or X for omitted
-    is_correct = Column(Boolean, nullable=False, index=True)
+    is_correct = Column(Boolean, nullable=False)
     time_spent_seconds = Column(Integer, nullable=False)
 
     # Flagging for review
@@ -92,7 +116,7 @@ class UserQuestionAttempt(Base):
 
     # Context
     attempt_mode = Column(String(20), nullable=False)  # 'timed', 'untimed', 'review'
-    attempted_at = Column(DateTime(timezone=True), server_default=func.now(), index=True)
+    attempted_at = Column(DateTime(timezone=True), primary_key=True, server_default=func.now())
 
     # Metadata for analytics
     confidence_level = Column(Integer, nullable=True)  # Optional self-rating 1-5
@@ -101,6 +125,8 @@ class UserQuestionAttempt(Base):
     __table_args__ = (
         CheckConstraint("selected_answer IN ('A', 'B', 'C', 'D', 'X')", name="check_selected_answer"),
         CheckConstraint("confidence_level >= 1 AND confidence_level <= 5 OR confidence_level IS NULL", name="check_confidence"),
+        Index("ix_user_question_attempts_user_id_attempted_at", "user_id", "attempted_at"),
+        {"postgresql_partition_by": "RANGE (attempted_at)"},
     )
 
     def __repr__(self):
@@ -0,0 +1,68 @@
+from pydantic import BaseModel
+from typing import Dict, List, Optional
+from datetime import date
+from uuid import UUID
+
+
+class TrendCounts(BaseModel):
+    """Attempt totals for one bucket"""
+
+    attempts: int
+    correct: int
+    accuracy: float
+    seconds_spent: int
+
+
+class TrendPoint(TrendCounts):
+    """One time bucket, overall and per MCAT section"""
+
+    start: date
+    sections: Dict[str, TrendCounts]
+
+
+class TrendResponse(BaseModel):
+    """Schema for performance trend response"""
+
+    range_days: int
+    bucket: str
+    start: date
+    end: date
+    points: List[TrendPoint]
+
+
+class PercentileRank(BaseModel):
+    """Where the user's value sits within the cohort for one metric"""
+
+    metric: str
+    label: str
+    value: float
+    percentile: Optional[float]
+    cohort_size: int
+
+
+class PercentileResponse(BaseModel):
+    """Schema for cohort percentile response"""
+
+    metrics: List[PercentileRank]
+
+
+class LeaderboardEntry(BaseModel):
+    """One ranked student on a leaderboard"""
+
+    rank: int
+    user_id: UUID
+    display_name: str
+    score: float
+
+
+class LeaderboardResponse(BaseModel):
+    """Schema for weekly leaderboard response"""
+
+    board: str
+    week: str
+    page: int
+    page_size: int
+    total: int
+    min_attempts: Optional[int] = None
+    entries: List[LeaderboardEntry]
+    me: Optional[LeaderboardEntry] = None
@@ -1,5 +1,5 @@
-from pydantic import BaseModel
-from typing import Optional, Dict, Any
+from pydantic import BaseModel, Field
+from typing import Optional, Dict, Any, List
 from datetime import datetime
 
 
@@ -46,6 +46,41 @@ class AAMCConceptResponse(BaseModel):
         from_attributes = True
 
 
+class TaxonomyTopic(BaseModel):
+    """Schema for a topic and its subtopics in the taxonomy tree"""
+
+    id: int
+    name: str
+    description: Optional[str]
+    difficulty_level: Optional[int]
+    children: List["TaxonomyTopic"] = []
+
+
+class TaxonomyConcept(BaseModel):
+    """Schema for a foundational concept, its sub-concepts and its topics"""
+
+    id: int
+    concept_code: str
+    title: str
+    description: Optional[str]
+    children: List["TaxonomyConcept"] = []
+    topics: List[TaxonomyTopic] = []
+
+
+class TaxonomySection(BaseModel):
+    """Schema for one MCAT section of the taxonomy tree"""
+
+    mcat_section: str
+    concepts: List[TaxonomyConcept]
+    topics: List[TaxonomyTopic]  # top-level topics not linked to a concept
+
+
+class TaxonomyResponse(BaseModel):
+    """Schema for the concept/topic tree"""
+
+    sections: List[TaxonomySection]
+
+
 class UserStudyProgressResponse(BaseModel):
     """Schema for user study progress response"""
 
@@ -54,6 +89,15 @@ class UserStudyProgressResponse(BaseModel):
     time_spent_seconds: int
     completed_at: Optional[datetime]
     last_accessed_at: datetime
+    bookmark_position: Optional[Dict[str, Any]] = None
 
     class Config:
         from_attributes = True
+
+
+class StudyHeartbeat(BaseModel):
+    """Schema for a study reader heartbeat"""
+
+    seconds: int = Field(..., ge=0, description="Seconds spent reading since the previous heartbeat")
+    bookmark_position: Optional[Dict[str, Any]] = None
+    completed: bool = False  # reader reached the end of the module
@@ -2,6 +2,7 @@ from pydantic import BaseModel
 from typing import Optional, List, Dict, Any
 from datetime import datetime
 from uuid import UUID
+from app.schemas.question import PassageResponse, QuestionResponse
 
 
 class QuizCreateRequest(BaseModel):
@@ -9,6 +10,8 @@ class QuizCreateRequest(BaseModel):
 
     mcat_section: Optional[str] = None  # None = all sections
     topic_ids: Optional[List[int]] = None
+    include_subtopics: bool = True  # a topic also matches every topic under it
+    exclude_seen: bool = True  # answered questions are used only when too few others match
     difficulty_level: Optional[int] = None
     num_questions: int = 10
     question_type: Optional[str] = None  # 'passage_based', 'standalone', None = mixed
@@ -51,6 +54,38 @@ class PracticeTestResponse(BaseModel):
         from_attributes = True
 
 
+class CustomQuizResponse(PracticeTestResponse):
+    """Schema for a created custom quiz; id is the practice test to start attempts on"""
+
+    quiz_id: UUID
+    created_at: datetime
+
+
+class TestBundleSection(BaseModel):
+    """Schema for one section of a test bundle"""
+
+    section: Optional[str]
+    duration_minutes: Optional[int]
+    questions: List[QuestionResponse]
+    passages: List[PassageResponse]  # passages of this section's questions, in order of first use
+
+
+class TestBundleResponse(BaseModel):
+    """Schema for a practice test with all of its questions and passages"""
+
+    id: UUID
+    test_type: str
+    title: str
+    description: Optional[str]
+    is_official_aamc: bool
+    total_questions: int
+    total_duration_minutes: int
+    sections: List[TestBundleSection]
+
+    class Config:
+        from_attributes = True
+
+
 class TestAttemptStart(BaseModel):
     """Schema for starting a test attempt"""
 
@@ -61,3 +96,18 @@ class TestAttemptComplete(BaseModel):
     """Schema for completing a test attempt"""
 
     test_attempt_id: UUID
+
+
+class TestSessionState(BaseModel):
+    """Schema for a test attempt's live session state"""
+
+    attempt_id: UUID
+    status: str
+    section: int
+    index: int
+    elapsed_seconds: Dict[str, int]  # question id -> seconds spent on it
+    total_elapsed_seconds: int
+    flags: List[str]
+    answers: Dict[str, str]  # tentative answers not yet submitted
+    deadline_ms: Optional[int] = None  # when the running section's time is up (epoch ms)
+    remaining_ms: Optional[int] = None  # time left in the section while paused
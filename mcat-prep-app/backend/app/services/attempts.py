@@ -0,0 +1,109 @@
+"""
+Recording graded question attempts
+
+Shared by the HTTP answer endpoint and the test-taking WebSocket, which saves
+answers in batches: a batch of any size is written with a fixed number of
+statements (answer counts, attempts, daily rollups, metric totals, review queue).
+"""
+import uuid
+from collections import Counter
+from typing import Iterable, List, Optional, Set, Tuple
+from uuid import UUID
+from sqlalchemy import case, func, update
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+from app.models.content import Question
+from app.models.progress import ReviewQueue
+from app.models.test import UserQuestionAttempt, UserTestAttempt
+from app.services.cohort import update_metric_totals
+from app.services.rollups import record_daily_stats
+
+# (attempt, mcat_section, foundational_concept_id) of an already graded attempt
+GradedAttempt = Tuple[UserQuestionAttempt, str, Optional[int]]
+
+
+def answered_questions(db: Session, attempt: UserTestAttempt) -> Set[str]:
+    """Ids of the questions already answered in a test attempt; each may only be answered once"""
+    return {
+        str(question_id)
+        for question_id, in db.query(UserQuestionAttempt.question_id).filter(
+            UserQuestionAttempt.test_attempt_id == attempt.id,
+            UserQuestionAttempt.attempted_at >= attempt.started_at,  # partition pruning
+        )
+    }
+
+
+def count_answers(db: Session, question_ids: Iterable[UUID]) -> List[int]:
+    """Bump times_answered once per answer with a single UPDATE; returns the questions' ordinals"""
+    counts = Counter(question_ids)
+    if not counts:
+        return []
+    return db.execute(
+        update(Question)
+        .where(Question.id.in_(list(counts)))
+        .values(
+            times_answered=func.coalesce(Question.times_answered, 0) + case(counts, value=Question.id, else_=0)
+        )
+        .returning(Question.ordinal)
+    ).scalars().all()
+
+
+def record_question_attempts(db: Session, user_id: UUID, attempts: List[GradedAttempt]):
+    """Save graded attempts and update the aggregates built from them
+
+    Returns the cohort accuracy moves; hand them to apply_accuracy_moves once
+    the transaction has committed.
+    """
+    if not attempts:
+        return []
+    db.add_all([attempt for attempt, _, _ in attempts])
+    record_daily_stats(
+        db,
+        [
+            (user_id, section, attempt.is_correct, attempt.time_spent_seconds or 0)
+            for attempt, section, _ in attempts
+        ],
+    )
+    accuracy_moves = update_metric_totals(
+        db, user_id, [(section, concept_id, attempt.is_correct) for attempt, section, concept_id in attempts]
+    )
+
+    # Add to review queue if incorrect or flagged; bump priority if already queued and incorrect.
+    # One row per question: ON CONFLICT cannot touch the same row twice in a statement.
+    incorrect, flagged = {}, {}
+    for attempt, _, _ in attempts:
+        if not attempt.is_correct:
+            incorrect[attempt.question_id] = attempt.id
+        elif attempt.is_flagged:
+            flagged[attempt.question_id] = attempt.id
+    for question_id in incorrect:
+        flagged.pop(question_id, None)
+    if incorrect or flagged:
+        db.flush()
+    if incorrect:
+        stmt = insert(ReviewQueue).values(
+            [
+                {"id": uuid.uuid4(), "user_id": user_id, "question_id": question_id, "priority": 5,
+                 "last_attempt_id": attempt_id}
+                for question_id, attempt_id in sorted(incorrect.items())
+            ]
+        )
+        db.execute(
+            stmt.on_conflict_do_update(
+                constraint="unique_user_question_review",
+                set_={"priority": func.least(ReviewQueue.priority + 1, 10)},
+            )
+        )
+    if flagged:
+        db.execute(
+            insert(ReviewQueue)
+            .values(
+                [
+                    {"id": uuid.uuid4(), "user_id": user_id, "question_id": question_id, "priority": 3,
+                     "last_attempt_id": attempt_id}
+                    for question_id, attempt_id in sorted(flagged.items())
+                ]
+            )
+            .on_conflict_do_nothing(constraint="unique_user_question_review")
+        )
+    return accuracy_moves
@@ -0,0 +1,249 @@
+"""
+Cohort percentile ranks from mergeable histogram sketches
+
+Every ranked metric lives on a small bounded domain (accuracy 0-100%, scaled
+scores 118-132 and 472-528), so each cohort distribution is kept as a
+fixed-resolution histogram rather than a t-digest/KLL: the error is bounded by
+the bin width, sketches from different workers merge by adding counts, and,
+unlike rank sketches, a value can be removed when a student's accuracy moves.
+
+Per-user accuracy totals live in user_metric_totals and are updated on write;
+the resulting bin moves are buffered per worker and flushed into
+cohort_sketch_bins as count deltas. Each worker periodically reloads the merged
+bins and answers percentile lookups from memory in O(1).
+"""
+import asyncio
+import logging
+import threading
+from collections import defaultdict
+from typing import Dict, Iterable, List, Optional, Tuple
+from uuid import UUID
+from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.core.database import engine
+from app.models.analytics import CohortSketchBin, UserMetricTotals
+
+logger = logging.getLogger(__name__)
+
+SCORE_SECTIONS = ("cpbs", "cars", "bbls", "psbb")
+
+
+class SketchSpec:
+    """Bounded domain and resolution of one kind of metric"""
+
+    __slots__ = ("lo", "hi", "step", "bins")
+
+    def __init__(self, lo: float, hi: float, step: float):
+        self.lo = lo
+        self.hi = hi
+        self.step = step
+        self.bins = int(round((hi - lo) / step)) + 1
+
+    def bin(self, value: float) -> int:
+        return min(max(int((value - self.lo) / self.step), 0), self.bins - 1)
+
+
+ACCURACY = SketchSpec(0, 100, 0.5)
+SECTION_SCORE = SketchSpec(118, 132, 1)
+TOTAL_SCORE = SketchSpec(472, 528, 1)
+
+
+def spec_for(metric: str) -> SketchSpec:
+    if metric.startswith("accuracy:"):
+        return ACCURACY
+    return TOTAL_SCORE if metric == "score:total" else SECTION_SCORE
+
+
+def section_metric(section: str) -> str:
+    return f"accuracy:section:{section}"
+
+
+def concept_metric(concept_id: int) -> str:
+    return f"accuracy:concept:{concept_id}"
+
+
+class HistogramSketch:
+    """Fixed-bin histogram with O(1) rank lookups once built"""
+
+    __slots__ = ("spec", "counts", "total", "_below")
+
+    def __init__(self, spec: SketchSpec, counts: Optional[List[int]] = None):
+        self.spec = spec
+        self.counts = counts or [0] * spec.bins
+        self._below: Optional[List[int]] = None
+        self.total = sum(self.counts)
+
+    def add(self, value: float, weight: int = 1) -> None:
+        self.counts[self.spec.bin(value)] += weight
+        self.total += weight
+        self._below = None
+
+    def merge(self, other: "HistogramSketch") -> None:
+        self.counts = [a + b for a, b in zip(self.counts, other.counts)]
+        self.total += other.total
+        self._below = None
+
+    def rank(self, value: float) -> Optional[float]:
+        """Percent of the cohort below ``value``, counting half of its own bin"""
+        if self.total <= 0:
+            return None
+        if self._below is None:
+            below, running = [], 0
+            for count in self.counts:
+                below.append(running)
+                running += count
+            self._below = below
+        index = self.spec.bin(value)
+        return round((self._below[index] + self.counts[index] / 2) / self.total * 100, 1)
+
+
+class CohortSketches:
+    """This worker's view of the merged sketches plus its unflushed bin deltas"""
+
+    def __init__(self):
+        self.sketches: Dict[str, HistogramSketch] = {}
+        self._pending: Dict[str, Dict[int, int]] = defaultdict(lambda: defaultdict(int))
+        self._lock = threading.Lock()
+
+    def record_move(self, metric: str, old: Optional[float], new: Optional[float]) -> None:
+        """Move one member of the cohort from ``old`` to ``new`` (None = not in the cohort)"""
+        spec = spec_for(metric)
+        with self._lock:
+            pending = self._pending[metric]
+            if old is not None:
+                pending[spec.bin(old)] -= 1
+            if new is not None:
+                pending[spec.bin(new)] += 1
+
+    def rank(self, metric: str, value: float) -> Tuple[Optional[float], int]:
+        sketch = self.sketches.get(metric)
+        if sketch is None:
+            return None, 0
+        return sketch.rank(value), sketch.total
+
+    def flush(self) -> int:
+        """Add buffered deltas to cohort_sketch_bins; they are kept for retry if the write fails"""
+        with self._lock:
+            pending, self._pending = self._pending, defaultdict(lambda: defaultdict(int))
+        rows = [
+            {"metric": metric, "bin": index, "count": delta}
+            for metric, bins in sorted(pending.items())
+            for index, delta in sorted(bins.items())
+            if delta
+        ]
+        if not rows:
+            return 0
+        stmt = insert(CohortSketchBin).values(rows)
+        try:
+            with engine.begin() as connection:
+                connection.execute(
+                    stmt.on_conflict_do_update(
+                        index_elements=["metric", "bin"],
+                        set_={"count": CohortSketchBin.count + stmt.excluded.count},
+                    )
+                )
+        except Exception:
+            with self._lock:
+                for row in rows:
+                    self._pending[row["metric"]][row["bin"]] += row["count"]
+            raise
+        return len(rows)
+
+    def refresh(self) -> None:
+        """Reload the merged sketches written by every worker"""
+        counts: Dict[str, List[int]] = {}
+        with engine.connect() as connection:
+            for metric, index, count in connection.execute(
+                select(CohortSketchBin.metric, CohortSketchBin.bin, CohortSketchBin.count).where(
+                    CohortSketchBin.count > 0
+                )
+            ):
+                spec = spec_for(metric)
+                if index < spec.bins:
+                    counts.setdefault(metric, [0] * spec.bins)[index] = count
+        self.sketches = {metric: HistogramSketch(spec_for(metric), bins) for metric, bins in counts.items()}
+
+
+cohort = CohortSketches()
+
+
+def update_metric_totals(
+    db: Session, user_id: UUID, attempts: Iterable[Tuple[str, Optional[int], bool]]
+) -> List[Tuple[str, Optional[float], Optional[float]]]:
+    """Add (section, concept_id, is_correct) attempts to the user's running totals
+
+    Returns (metric, old accuracy or None, new accuracy or None) for every
+    metric whose cohort membership or value changed; hand them to
+    apply_accuracy_moves once the transaction has committed.
+    """
+    deltas: Dict[str, List[int]] = defaultdict(lambda: [0, 0])
+    for section, concept_id, is_correct in attempts:
+        metrics = [section_metric(section)]
+        if concept_id is not None:
+            metrics.append(concept_metric(concept_id))
+        for metric in metrics:
+            deltas[metric][0] += 1
+            deltas[metric][1] += int(is_correct)
+    if not deltas:
+        return []
+
+    stmt = insert(UserMetricTotals).values(
+        [
+            {"user_id": user_id, "metric": metric, "attempts": added, "correct": correct}
+            for metric, (added, correct) in sorted(deltas.items())
+        ]
+    )
+    updated = db.execute(
+        stmt.on_conflict_do_update(
+            index_elements=["user_id", "metric"],
+            set_={
+                "attempts": UserMetricTotals.attempts + stmt.excluded.attempts,
+                "correct": UserMetricTotals.correct + stmt.excluded.correct,
+            },
+        ).returning(UserMetricTotals.metric, UserMetricTotals.attempts, UserMetricTotals.correct)
+    ).all()
+
+    moves = []
+    for metric, attempts_now, correct_now in updated:
+        added, correct = deltas[metric]
+        old = cohort_accuracy(attempts_now - added, correct_now - correct)
+        new = cohort_accuracy(attempts_now, correct_now)
+        if old != new:
+            moves.append((metric, old, new))
+    return moves
+
+
+def cohort_accuracy(attempts: int, correct: int) -> Optional[float]:
+    """Accuracy used for ranking, or None until the user has enough attempts to be ranked"""
+    if attempts < settings.COHORT_MIN_ATTEMPTS:
+        return None
+    return correct / attempts * 100
+
+
+def apply_accuracy_moves(moves: Iterable[Tuple[str, Optional[float], Optional[float]]]) -> None:
+    for metric, old, new in moves:
+        if old is None or new is None or spec_for(metric).bin(old) != spec_for(metric).bin(new):
+            cohort.record_move(metric, old, new)
+
+
+def record_test_scores(attempt) -> None:
+    """Add a completed test attempt's scaled scores to the score cohorts"""
+    if attempt.total_score is not None:
+        cohort.record_move("score:total", None, attempt.total_score)
+    for section in SCORE_SECTIONS:
+        score = getattr(attempt, f"{section}_score")
+        if score is not None:
+            cohort.record_move(f"score:{section}", None, score)
+
+
+async def sync_sketches_periodically() -> None:
+    """Flush this worker's deltas and reload the merged sketches"""
+    while True:
+        try:
+            await asyncio.to_thread(cohort.flush)
+            await asyncio.to_thread(cohort.refresh)
+        except Exception:
+            logger.exception("Cohort sketch sync failed")
+        await asyncio.sleep(settings.COHORT_SKETCH_SYNC_SECONDS)
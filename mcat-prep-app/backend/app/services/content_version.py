@@ -0,0 +1,19 @@
+"""
+Content version
+
+A counter in Redis that every content import bumps. Workers keep in-memory
+copies of content (the taxonomy snapshot) tagged with the version they were
+built from and rebuild them when the counter moves.
+"""
+from app.core.redis_client import redis_client
+
+CONTENT_VERSION_KEY = "content:version"
+
+
+def current_version() -> int:
+    return int(redis_client.get(CONTENT_VERSION_KEY) or 0)
+
+
+def bump_version() -> int:
+    """Call after committing a content change"""
+    return redis_client.incr(CONTENT_VERSION_KEY)
@@ -0,0 +1,218 @@
+"""
+Weekly leaderboards kept in Redis sorted sets
+
+Each ISO week (UTC) has three boards: questions answered, accuracy and best
+practice-test total score. Scores are updated by small Lua scripts after the
+attempt or test has committed, so one round trip keeps the volume count, the
+correct count and the derived accuracy consistent. Accuracy only enters its
+board once the user reaches LEADERBOARD_MIN_ATTEMPTS that week.
+
+All keys of a week share a hash tag (lb:{2026-W42}:...) and expire
+LEADERBOARD_RETENTION_WEEKS after the week ends, so nothing has to clean up old
+boards. Reads never touch Postgres; scripts/rebuild_aggregates.py rebuilds the
+retained weeks from the database after a Redis loss.
+"""
+import logging
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional, Tuple
+from uuid import UUID
+from redis.exceptions import RedisError
+from app.core.config import settings
+from app.core.redis_client import redis_client
+
+logger = logging.getLogger(__name__)
+
+BOARDS = ("volume", "accuracy", "score")
+
+# KEYS: volume, accuracy, correct counts, names
+# ARGV: user id, 1 if correct else 0, accuracy floor, expire-at, display name
+_RECORD_ATTEMPT = redis_client.register_script(
+    """
+    local attempts = tonumber(redis.call('ZINCRBY', KEYS[1], 1, ARGV[1]))
+    local correct = redis.call('HINCRBY', KEYS[3], ARGV[1], ARGV[2])
+    if attempts >= tonumber(ARGV[3]) then
+        redis.call('ZADD', KEYS[2], math.floor(correct * 10000 / attempts) / 100, ARGV[1])
+    end
+    redis.call('HSET', KEYS[4], ARGV[1], ARGV[5])
+    for i = 1, #KEYS do
+        redis.call('EXPIREAT', KEYS[i], ARGV[4])
+    end
+    """
+)
+
+# KEYS: score, names
+# ARGV: user id, total score, expire-at, display name
+_RECORD_SCORE = redis_client.register_script(
+    """
+    local best = redis.call('ZSCORE', KEYS[1], ARGV[1])
+    if not best or tonumber(best) < tonumber(ARGV[2]) then
+        redis.call('ZADD', KEYS[1], ARGV[2], ARGV[1])
+    end
+    redis.call('HSET', KEYS[2], ARGV[1], ARGV[4])
+    for i = 1, #KEYS do
+        redis.call('EXPIREAT', KEYS[i], ARGV[3])
+    end
+    """
+)
+
+
+def week_id(moment: datetime) -> str:
+    year, week, _ = moment.astimezone(timezone.utc).isocalendar()
+    return f"{year}-W{week:02d}"
+
+
+def current_week(offset: int = 0) -> str:
+    """This ISO week, or ``offset`` weeks before it"""
+    return week_id(datetime.now(timezone.utc) - timedelta(weeks=offset))
+
+
+def week_bounds(week: str) -> Tuple[datetime, datetime]:
+    """UTC start (Monday 00:00) and end of an ISO week id"""
+    start = datetime.strptime(f"{week}-1", "%G-W%V-%u").replace(tzinfo=timezone.utc)
+    return start, start + timedelta(weeks=1)
+
+
+def _expire_at(week: str) -> int:
+    _, end = week_bounds(week)
+    return int((end + timedelta(weeks=settings.LEADERBOARD_RETENTION_WEEKS)).timestamp())
+
+
+def board_key(week: str, board: str) -> str:
+    return f"lb:{{{week}}}:{board}"
+
+
+def display_name(full_name: str) -> str:
+    """First name and last initial; full names are not shown to other students"""
+    parts = full_name.split()
+    if not parts:
+        return "Student"
+    if len(parts) == 1:
+        return parts[0]
+    return f"{parts[0]} {parts[-1][0]}."
+
+
+def record_attempt(user_id: UUID, full_name: str, is_correct: bool) -> None:
+    """Count one answered question on this week's boards (best effort)"""
+    week = current_week()
+    try:
+        _RECORD_ATTEMPT(
+            keys=[
+                board_key(week, "volume"),
+                board_key(week, "accuracy"),
+                board_key(week, "correct"),
+                board_key(week, "names"),
+            ],
+            args=[
+                str(user_id),
+                int(is_correct),
+                settings.LEADERBOARD_MIN_ATTEMPTS,
+                _expire_at(week),
+                display_name(full_name),
+            ],
+        )
+    except RedisError as e:
+        logger.warning("Leaderboard update failed: %s", e)
+
+
+def record_test_score(user_id: UUID, full_name: str, total_score: Optional[int], completed_at: datetime) -> None:
+    """Keep the user's best practice-test total score for the week it was completed in (best effort)"""
+    if total_score is None:
+        return
+    week = week_id(completed_at)
+    try:
+        _RECORD_SCORE(
+            keys=[board_key(week, "score"), board_key(week, "names")],
+            args=[str(user_id), total_score, _expire_at(week), display_name(full_name)],
+        )
+    except RedisError as e:
+        logger.warning("Leaderboard update failed: %s", e)
+
+
+def read_board(week: str, board: str, offset: int, limit: int, user_id: UUID) -> Dict:
+    """One page of a board plus the caller's own standing, in two round trips"""
+    key = board_key(week, board)
+    member = str(user_id)
+    pipe = redis_client.pipeline(transaction=False)
+    pipe.zrevrange(key, offset, offset + limit - 1, withscores=True)
+    pipe.zcard(key)
+    pipe.zrevrank(key, member)
+    pipe.zscore(key, member)
+    rows, total, my_rank, my_score = pipe.execute()
+
+    members = [name for name, _ in rows]
+    if my_rank is not None:
+        members.append(member)
+    names = dict(zip(members, redis_client.hmget(board_key(week, "names"), members))) if members else {}
+
+    def entry(rank: int, name: str, score: float) -> Dict:
+        return {
+            "rank": rank,
+            "user_id": name,
+            "display_name": names.get(name) or "Student",
+            "score": score,
+        }
+
+    return {
+        "total": total,
+        "entries": [entry(offset + index + 1, name, score) for index, (name, score) in enumerate(rows)],
+        "me": entry(my_rank + 1, member, my_score) if my_rank is not None else None,
+    }
+
+
+def replace_week(
+    week: str,
+    counts: Dict[str, Tuple[int, int]],
+    scores: Dict[str, int],
+    names: Dict[str, str],
+) -> None:
+    """Swap in a week's boards rebuilt from the database
+
+    ``counts`` maps user id to (attempts, correct) and ``scores`` to the best
+    total score. The new boards are staged under temporary keys and renamed over
+    the live ones in one transaction; updates that land while the rebuild runs
+    are overwritten, so reconcile at a quiet time.
+    """
+    volume = {user: attempts for user, (attempts, _) in counts.items()}
+    correct = {user: right for user, (_, right) in counts.items()}
+    accuracy = {
+        user: int(right * 10000 / attempts) / 100
+        for user, (attempts, right) in counts.items()
+        if attempts >= settings.LEADERBOARD_MIN_ATTEMPTS
+    }
+    staged = {
+        "volume": volume,
+        "accuracy": accuracy,
+        "score": scores,
+        "correct": correct,
+        "names": {user: display_name(full_name) for user, full_name in names.items()},
+    }
+    expire_at = _expire_at(week)
+
+    pipe = redis_client.pipeline(transaction=False)
+    for kind, values in staged.items():
+        staging = f"{board_key(week, kind)}:rebuild"
+        pipe.delete(staging)
+        if not values:
+            continue
+        items = list(values.items())
+        for start in range(0, len(items), 1000):
+            chunk = dict(items[start:start + 1000])
+            if kind in ("correct", "names"):
+                pipe.hset(staging, mapping=chunk)
+            else:
+                pipe.zadd(staging, chunk)
+    pipe.execute()
+
+    swap = redis_client.pipeline(transaction=True)
+    for kind, values in staged.items():
+        if values:
+            swap.rename(f"{board_key(week, kind)}:rebuild", board_key(week, kind))
+            swap.expireat(board_key(week, kind), expire_at)
+        else:
+            swap.delete(board_key(week, kind))
+    swap.execute()
+
+
+def retained_weeks() -> List[str]:
+    """Weeks whose boards have not expired yet, newest first"""
+    return [current_week(offset) for offset in range(settings.LEADERBOARD_RETENTION_WEEKS + 1)]
@@ -0,0 +1,61 @@
+"""
+Content-addressed custom quiz question sets
+
+A custom quiz's questions are stored as a practice_tests row (test_type
+'custom_quiz') whose id is a UUIDv5 of its section label and question ids, in
+id order. Creating a quiz whose set already exists reuses that row, so only a
+small user_quizzes row is written per quiz; attempts, sessions and bundles
+keep working off practice_test_id and are shared by everyone on the same set.
+
+Sets referenced by neither a quiz nor an attempt are deleted by
+scripts/prune_quiz_sets.py. Creation locks an existing set row (ON CONFLICT DO
+UPDATE), which the prune skips, and user_quizzes references sets without ON
+DELETE CASCADE, so a prune that still races a creation fails instead of
+deleting a quiz's questions.
+"""
+import uuid
+from typing import List, Optional
+from uuid import UUID
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+from app.models.test import PracticeTest, UserQuiz
+
+QUIZ_SET_NAMESPACE = uuid.UUID("b2c5de30-cad6-46e1-b49c-6101984a4d24")
+
+MINUTES_PER_QUESTION = 2
+
+
+def quiz_set_id(section: str, question_ids: List[UUID]) -> UUID:
+    """The set's id; question_ids must already be in canonical (sorted) order"""
+    return uuid.uuid5(QUIZ_SET_NAMESPACE, f"{section}:{','.join(str(question_id) for question_id in question_ids)}")
+
+
+def create_quiz(db: Session, user_id: UUID, mcat_section: Optional[str], question_ids: List[UUID]) -> dict:
+    """Record a user's quiz on the shared set of these questions; the caller commits"""
+    question_ids = sorted(question_ids)
+    section = mcat_section or "mixed"
+    duration_minutes = len(question_ids) * MINUTES_PER_QUESTION
+    quiz_set = {
+        "id": quiz_set_id(section, question_ids),
+        "test_type": "custom_quiz",
+        "title": f"Custom Quiz - {mcat_section or 'Mixed Sections'}",
+        "description": f"{len(question_ids)} questions",
+        "is_official_aamc": False,
+        "sections": [
+            {
+                "section": section,
+                "duration_minutes": duration_minutes,
+                "question_ids": [str(question_id) for question_id in question_ids],
+            }
+        ],
+        "total_questions": len(question_ids),
+        "total_duration_minutes": duration_minutes,
+        "is_active": True,
+    }
+    stmt = insert(PracticeTest).values(quiz_set)
+    db.execute(stmt.on_conflict_do_update(index_elements=[PracticeTest.id], set_={"is_active": True}))
+
+    quiz = UserQuiz(id=uuid.uuid4(), user_id=user_id, practice_test_id=quiz_set["id"])
+    db.add(quiz)
+    db.flush()
+    return {**quiz_set, "quiz_id": quiz.id, "created_at": quiz.created_at}
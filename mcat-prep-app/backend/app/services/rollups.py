@@ -0,0 +1,97 @@
+"""
+Daily per-user, per-section attempt rollups
+
+Attempts are added to user_daily_section_stats in the same transaction that
+records them, so trend queries read one row per day and section instead of
+scanning attempt history. scripts/rebuild_aggregates.py recomputes the rollup
+from user_question_attempts if it ever drifts.
+"""
+from collections import defaultdict
+from datetime import date, timedelta
+from typing import Dict, Iterable, List, Tuple
+from uuid import UUID
+from sqlalchemy import Date, cast, func
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+from app.models.analytics import UserDailySectionStats
+
+BUCKETS = ("day", "week", "month")
+MAX_TREND_POINTS = 120  # coarser buckets are used beyond this many points
+
+# (user_id, mcat_section, is_correct, time_spent_seconds)
+AttemptFact = Tuple[UUID, str, bool, int]
+
+
+def utc_today_expr():
+    """Today's UTC date as of the transaction start, matching attempted_at's now() default"""
+    return cast(func.timezone("UTC", func.now()), Date)
+
+
+def record_daily_stats(db: Session, attempts: Iterable[AttemptFact]) -> None:
+    """Add attempts to today's rollup rows with a single upsert"""
+    totals: Dict[Tuple[UUID, str], List[int]] = defaultdict(lambda: [0, 0, 0])
+    for user_id, section, is_correct, seconds in attempts:
+        counts = totals[(user_id, section)]
+        counts[0] += 1
+        counts[1] += int(is_correct)
+        counts[2] += seconds
+    if not totals:
+        return
+
+    # Sorted so concurrent batch writers lock rows in the same order
+    ordered = sorted(totals.items(), key=lambda item: (str(item[0][0]), item[0][1]))
+    rows = [
+        {
+            "user_id": user_id,
+            "day": utc_today_expr(),
+            "mcat_section": section,
+            "attempts": count,
+            "correct": correct,
+            "seconds_spent": seconds,
+        }
+        for (user_id, section), (count, correct, seconds) in ordered
+    ]
+    stmt = insert(UserDailySectionStats).values(rows)
+    db.execute(
+        stmt.on_conflict_do_update(
+            index_elements=["user_id", "day", "mcat_section"],
+            set_={
+                "attempts": UserDailySectionStats.attempts + stmt.excluded.attempts,
+                "correct": UserDailySectionStats.correct + stmt.excluded.correct,
+                "seconds_spent": UserDailySectionStats.seconds_spent + stmt.excluded.seconds_spent,
+            },
+        )
+    )
+
+
+def bucket_start(day: date, bucket: str) -> date:
+    """First day of the bucket containing ``day`` (weeks start on Monday, like date_trunc)"""
+    if bucket == "week":
+        return day - timedelta(days=day.weekday())
+    if bucket == "month":
+        return day.replace(day=1)
+    return day
+
+
+def next_bucket(start: date, bucket: str) -> date:
+    if bucket == "week":
+        return start + timedelta(days=7)
+    if bucket == "month":
+        return (start + timedelta(days=32)).replace(day=1)
+    return start + timedelta(days=1)
+
+
+def bucket_starts(first: date, last: date, bucket: str) -> List[date]:
+    starts, current = [], bucket_start(first, bucket)
+    while current <= last:
+        starts.append(current)
+        current = next_bucket(current, bucket)
+    return starts
+
+
+def choose_bucket(first: date, last: date, requested: str) -> str:
+    """The requested bucket, coarsened until the range fits in MAX_TREND_POINTS"""
+    for bucket in BUCKETS[BUCKETS.index(requested):]:
+        if len(bucket_starts(first, last, bucket)) <= MAX_TREND_POINTS:
+            return bucket
+    return BUCKETS[-1]
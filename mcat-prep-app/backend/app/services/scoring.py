@@ -0,0 +1,103 @@
+"""
+Scaled scoring for completed test attempts
+
+Section scores map raw accuracy linearly onto the 118-132 MCAT scale. Real AAMC
+conversions are equated per form; a linear map is the placeholder until forms
+carry their own tables. Accuracy is out of every question of the section in
+the practice test, so unanswered questions count as incorrect. The total
+(472-528) is only reported when the test covers all four sections.
+"""
+from typing import Dict, Optional, Set
+from sqlalchemy import case, func
+from sqlalchemy.orm import Session
+from app.models.content import Question
+from app.models.test import PracticeTest, UserQuestionAttempt, UserTestAttempt
+
+SECTION_MIN_SCORE = 118
+SECTION_MAX_SCORE = 132
+SECTION_COLUMNS = {"CPBS": "cpbs_score", "CARS": "cars_score", "BBLS": "bbls_score", "PSBB": "psbb_score"}
+
+
+def scaled_section_score(correct: int, total: int) -> Optional[int]:
+    if not total:
+        return None
+    return SECTION_MIN_SCORE + round((SECTION_MAX_SCORE - SECTION_MIN_SCORE) * correct / total)
+
+
+def test_question_ids(db: Session, practice_test_id) -> Set[str]:
+    practice_test = db.query(PracticeTest.sections).filter(PracticeTest.id == practice_test_id).first()
+    return {
+        question_id
+        for section in (practice_test.sections if practice_test else [])
+        for question_id in section.get("question_ids", [])
+    }
+
+
+def section_question_counts(db: Session, question_ids: Set[str]) -> Dict[str, int]:
+    """Questions per MCAT section among question_ids"""
+    if not question_ids:
+        return {}
+    return dict(
+        db.query(Question.mcat_section, func.count(Question.id))
+        .filter(Question.id.in_(question_ids))
+        .group_by(Question.mcat_section)
+        .all()
+    )
+
+
+def score_attempt(db: Session, attempt: UserTestAttempt) -> None:
+    """Fill in scores and totals from the attempt's answers and mark it completed
+
+    Only the latest answer to each of the test's questions counts, so answers
+    repeated or sent for questions outside the test cannot raise the score.
+    """
+    question_ids = test_question_ids(db, attempt.practice_test_id)
+    question_counts = section_question_counts(db, question_ids)
+    latest = (
+        db.query(
+            UserQuestionAttempt.question_id,
+            UserQuestionAttempt.is_correct,
+            UserQuestionAttempt.time_spent_seconds,
+        )
+        .filter(
+            UserQuestionAttempt.test_attempt_id == attempt.id,
+            UserQuestionAttempt.user_id == attempt.user_id,
+            UserQuestionAttempt.question_id.in_(question_ids),
+            # Lets Postgres skip attempt partitions older than the test
+            UserQuestionAttempt.attempted_at >= attempt.started_at,
+        )
+        .distinct(UserQuestionAttempt.question_id)
+        .order_by(UserQuestionAttempt.question_id, UserQuestionAttempt.attempted_at.desc())
+        .subquery()
+    )
+    sections = (
+        db.query(
+            Question.mcat_section,
+            func.count(latest.c.question_id).label("answered"),
+            func.sum(case((latest.c.is_correct == True, 1), else_=0)).label("correct"),
+            func.coalesce(func.sum(latest.c.time_spent_seconds), 0).label("seconds"),
+        )
+        .join(Question, Question.id == latest.c.question_id)
+        .group_by(Question.mcat_section)
+        .all()
+    )
+
+    answers = {section.mcat_section: section for section in sections}
+    scores: Dict[str, Optional[int]] = {}
+    for mcat_section, column in SECTION_COLUMNS.items():
+        total = question_counts.get(mcat_section, 0)
+        if total:
+            section = answers.get(mcat_section)
+            scores[column] = scaled_section_score(section.correct if section else 0, total)
+            setattr(attempt, column, scores[column])
+
+    correct = sum(section.correct for section in sections)
+    total_questions = sum(question_counts.values())
+
+    attempt.total_score = sum(scores.values()) if len(scores) == len(SECTION_COLUMNS) else None
+    attempt.total_correct = correct
+    attempt.total_questions = total_questions
+    attempt.accuracy_percentage = round(correct / total_questions * 100) if total_questions else 0
+    attempt.total_time_spent_seconds = sum(section.seconds for section in sections)
+    attempt.status = "completed"
+    attempt.completed_at = func.now()
@@ -0,0 +1,266 @@
+"""
+Server-enforced section timers
+
+Every running section has a deadline in one Redis sorted set (member
+"{attempt_id}:{section}", score = deadline in epoch ms), mirrored into the
+attempt's session state so clients can show the countdown. Because the set is
+the source of truth, timers survive worker restarts and are shared by all
+workers.
+
+Each worker loads the deadlines due within SECTION_TIMER_HORIZON_SECONDS into a
+hierarchical timer wheel every SECTION_TIMER_SYNC_SECONDS and ticks it every
+SECTION_TIMER_TICK_MS, so tens of thousands of running sections cost one range
+read per sync rather than a sleeping task each. When a timer fires, the worker
+that atomically removes it from the set expires the section: tentative answers
+of that section that were never submitted are recorded (unanswered questions
+as omitted), then the attempt advances to the next section or, after the last
+one, is scored.
+
+Deadlines left behind by attempts completed early simply fire and are ignored.
+"""
+import asyncio
+import logging
+import uuid
+from datetime import datetime, timezone
+from typing import Optional, Tuple
+from uuid import UUID
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.core.redis_client import redis_client
+from app.core.timer_wheel import TimerWheel, now_ms
+from app.api.deps.database import pin_to_primary
+from app.models.test import UserQuestionAttempt, UserTestAttempt
+from app.models.user import User
+from app.services import leaderboard, seen_questions, session_state
+from app.services.attempts import answered_questions, count_answers, record_question_attempts
+from app.services.cohort import apply_accuracy_moves, record_test_scores
+from app.services.scoring import score_attempt
+
+logger = logging.getLogger(__name__)
+
+DEADLINES_KEY = "test:deadlines"
+
+# Remove a deadline only if it is due (or unconditionally when ARGV[2] is empty),
+# so exactly one worker or socket expires each section.
+_CLAIM = redis_client.register_script(
+    """
+local score = redis.call('ZSCORE', KEYS[1], ARGV[1])
+if not score then
+    return 0
+end
+if ARGV[2] ~= '' and tonumber(score) > tonumber(ARGV[2]) then
+    return 0
+end
+redis.call('ZREM', KEYS[1], ARGV[1])
+return 1
+"""
+)
+
+
+def timer_member(attempt_id, section: int) -> str:
+    return f"{attempt_id}:{section}"
+
+
+def parse_member(member: str) -> Tuple[UUID, int]:
+    attempt_id, _, section = member.rpartition(":")
+    return UUID(attempt_id), int(section)
+
+
+def start_section(attempt_id, section: int, duration_minutes: Optional[int]) -> Optional[int]:
+    """Start the section's countdown; untimed sections (no duration) get no deadline"""
+    if not duration_minutes:
+        return None
+    deadline = now_ms() + int(duration_minutes * 60_000)
+    pipe = redis_client.pipeline(transaction=True)
+    pipe.zadd(DEADLINES_KEY, {timer_member(attempt_id, section): deadline})
+    pipe.hset(session_state.state_key(attempt_id), "deadline", deadline)
+    pipe.hdel(session_state.state_key(attempt_id), "remaining")
+    pipe.execute()
+    return deadline
+
+
+def pause_section(attempt_id, section: int) -> Optional[int]:
+    """Stop the countdown and keep the time remaining in the session state"""
+    key = session_state.state_key(attempt_id)
+    deadline = redis_client.hget(key, "deadline")
+    if deadline is None:
+        return None
+    remaining = max(0, int(deadline) - now_ms())
+    pipe = redis_client.pipeline(transaction=True)
+    pipe.zrem(DEADLINES_KEY, timer_member(attempt_id, section))
+    pipe.hset(key, "remaining", remaining)
+    pipe.hdel(key, "deadline")
+    pipe.execute()
+    return remaining
+
+
+def resume_section(attempt_id, section: int) -> Optional[int]:
+    """Restart a paused countdown from the time that was remaining"""
+    key = session_state.state_key(attempt_id)
+    remaining = redis_client.hget(key, "remaining")
+    if remaining is None:
+        return None
+    deadline = now_ms() + int(remaining)
+    pipe = redis_client.pipeline(transaction=True)
+    pipe.zadd(DEADLINES_KEY, {timer_member(attempt_id, section): deadline})
+    pipe.hset(key, "deadline", deadline)
+    pipe.hdel(key, "remaining")
+    pipe.execute()
+    return deadline
+
+
+def claim(member: str, due_by_ms: Optional[int] = None) -> bool:
+    """Take a deadline out of the set; only the caller that succeeds may expire it"""
+    return bool(_CLAIM(keys=[DEADLINES_KEY], args=[member, "" if due_by_ms is None else due_by_ms]))
+
+
+def expire_section(attempt_id: UUID, section: int) -> Optional[str]:
+    """Submit what the section has and move on
+
+    Returns "advanced", "completed", or None if there was nothing to expire.
+    """
+    from app.services.test_sessions import test_contents  # test_sessions imports this module
+
+    db = SessionLocal()
+    try:
+        attempt = (
+            db.query(UserTestAttempt)
+            .filter(UserTestAttempt.id == attempt_id)
+            .with_for_update()
+            .first()
+        )
+        if attempt is None or attempt.status not in session_state.OPEN_STATUSES:
+            return None
+        state = session_state.load(attempt_id) or {}  # read under the row lock, after any racing expiry
+        if state.get("section", attempt.current_section or 0) != section:
+            return None  # already ended early, or a stale timer
+        content = test_contents.get(db, attempt.practice_test_id)
+        if content is None or section >= len(content.sections):
+            return None
+
+        # Submitted answers may still be buffered on a socket (state) or already written (table)
+        submitted = set(state.get("submitted", [])) | answered_questions(db, attempt)
+        answers, flags = state.get("answers", {}), set(state.get("flags", []))
+        elapsed = state.get("elapsed_seconds", {})
+        now = datetime.now(timezone.utc)
+        graded = []
+        for question_id in content.sections[section]["question_ids"]:
+            if question_id in submitted:
+                continue
+            _, correct_answer, mcat_section, concept_id = content.questions[question_id]
+            selected = answers.get(question_id, "X")  # X = omitted
+            graded.append(
+                (
+                    UserQuestionAttempt(
+                        id=uuid.uuid4(),
+                        user_id=attempt.user_id,
+                        question_id=UUID(question_id),
+                        test_attempt_id=attempt.id,
+                        selected_answer=selected,
+                        is_correct=selected == correct_answer,
+                        time_spent_seconds=elapsed.get(question_id, 0),
+                        is_flagged=question_id in flags,
+                        attempt_mode="timed",
+                        attempted_at=now,
+                    ),
+                    mcat_section,
+                    concept_id,
+                )
+            )
+        ordinals = count_answers(db, [graded_attempt.question_id for graded_attempt, _, _ in graded])
+        accuracy_moves = record_question_attempts(db, attempt.user_id, graded)
+
+        next_section = section + 1
+        finished = next_section >= len(content.sections)
+        if finished:
+            score_attempt(db, attempt)
+        else:
+            attempt.current_section, attempt.current_question_index = next_section, 0
+        db.commit()
+        if finished:
+            db.refresh(attempt)
+        full_name = db.query(User.full_name).filter(User.id == attempt.user_id).scalar()
+    finally:
+        db.close()
+
+    apply_accuracy_moves(accuracy_moves)
+    seen_questions.record_seen(attempt.user_id, ordinals)
+    for graded_attempt, _, _ in graded:
+        leaderboard.record_attempt(attempt.user_id, full_name, graded_attempt.is_correct)
+    if finished:
+        session_state.clear(attempt.id)
+        record_test_scores(attempt)
+        leaderboard.record_test_score(attempt.user_id, full_name, attempt.total_score, attempt.completed_at)
+    else:
+        session_state.record_position(attempt.id, next_section, 0)
+        start_section(attempt.id, next_section, content.sections[next_section]["duration_minutes"])
+    pin_to_primary(attempt.user_id)
+    return "completed" if finished else "advanced"
+
+
+def end_section(attempt_id: UUID, section: int, force: bool = False) -> Optional[str]:
+    """Expire a section if its deadline has passed (or, with ``force``, right away)
+
+    Returns None when another worker holds the claim; it will advance the attempt.
+    """
+    member = timer_member(attempt_id, section)
+    if claim(member, None if force else now_ms()):
+        return _expire_claimed(member, attempt_id, section)
+    if force and redis_client.zscore(DEADLINES_KEY, member) is None:
+        return expire_section(attempt_id, section)  # untimed section
+    return None
+
+
+def _expire_claimed(member: str, attempt_id: UUID, section: int) -> Optional[str]:
+    try:
+        return expire_section(attempt_id, section)
+    except Exception:
+        redis_client.zadd(DEADLINES_KEY, {member: now_ms()})  # put it back for the next sync
+        raise
+
+
+class SectionTimers:
+    """A worker's timer wheel over the shared deadline set"""
+
+    def __init__(self):
+        self.wheel = TimerWheel(tick_ms=settings.SECTION_TIMER_TICK_MS)
+        self._expiring = asyncio.Semaphore(settings.SECTION_TIMER_CONCURRENCY)
+        self._tasks = set()
+
+    def sync(self) -> int:
+        """Load deadlines due within the horizon into the wheel"""
+        due = redis_client.zrangebyscore(
+            DEADLINES_KEY, "-inf", now_ms() + settings.SECTION_TIMER_HORIZON_SECONDS * 1000, withscores=True
+        )
+        for member, deadline in due:
+            self.wheel.schedule(member, int(deadline))
+        return len(due)
+
+    async def _expire(self, member: str) -> None:
+        async with self._expiring:
+            try:
+                attempt_id, section = parse_member(member)
+                if await asyncio.to_thread(claim, member, now_ms()):
+                    await asyncio.to_thread(_expire_claimed, member, attempt_id, section)
+            except Exception:
+                logger.exception("Expiring section timer %s failed", member)
+
+    async def run(self) -> None:
+        loop = asyncio.get_running_loop()
+        next_sync = loop.time()
+        while True:
+            if loop.time() >= next_sync:
+                try:
+                    await asyncio.to_thread(self.sync)
+                except Exception:
+                    logger.exception("Section timer sync failed")
+                next_sync = loop.time() + settings.SECTION_TIMER_SYNC_SECONDS
+            for member in self.wheel.advance():
+                task = asyncio.create_task(self._expire(member))
+                self._tasks.add(task)
+                task.add_done_callback(self._tasks.discard)
+            await asyncio.sleep(settings.SECTION_TIMER_TICK_MS / 1000)
+
+
+async def run_section_timers() -> None:
+    await SectionTimers().run()
@@ -0,0 +1,150 @@
+"""
+Questions each user has already answered
+
+A user's seen set is a compressed bitmap (app.core.bitmap) of question
+ordinals, stored in Redis as two keys:
+
+    seen:{user_id}       the bitmap, serialized
+    seen:{user_id}:new   a set of ordinals answered since it was written
+
+Recording answers only SADDs to the second key, so concurrent writers never
+overwrite each other. Reading folds the new ordinals into the bitmap and writes
+it back under WATCH; writers fold too once the set grows past
+SEEN_QUESTIONS_PENDING_LIMIT. user_question_attempts stays the source of truth:
+a missing bitmap is rebuilt from it, so both keys simply expire after
+SEEN_QUESTIONS_TTL_SECONDS without activity. If Redis is unavailable reads go
+to the database and updates are dropped; at worst a question is offered again.
+
+The candidate side of quiz sampling, the ordinals matching a quiz filter, is
+the same for every user, so each worker keeps an LRU of candidate bitmaps per
+filter, valid for the content version (app.services.content_version) they were
+loaded at.
+"""
+import logging
+import threading
+from collections import OrderedDict
+from typing import Callable, Hashable, Iterable, List, Optional, Tuple
+from uuid import UUID
+from redis.exceptions import RedisError, WatchError
+from sqlalchemy.orm import Session
+from app.core.bitmap import Bitmap
+from app.core.config import settings
+from app.core.redis_client import redis_binary_client
+from app.models.content import Question
+from app.models.test import UserQuestionAttempt
+from app.services.content_version import current_version
+
+logger = logging.getLogger(__name__)
+
+SEEN_QUESTIONS_PENDING_LIMIT = 512  # Redis keeps sets of up to 512 integers compact (intset)
+
+
+def bitmap_key(user_id: UUID) -> str:
+    return f"seen:{user_id}"
+
+
+def pending_key(user_id: UUID) -> str:
+    return f"seen:{user_id}:new"
+
+
+def load_from_attempts(db: Session, user_id: UUID) -> Bitmap:
+    rows = (
+        db.query(Question.ordinal)
+        .join(UserQuestionAttempt, UserQuestionAttempt.question_id == Question.id)
+        .filter(UserQuestionAttempt.user_id == user_id)
+        .distinct()
+    )
+    return Bitmap(ordinal for (ordinal,) in rows)
+
+
+def _fold(user_id: UUID, rebuild: Optional[Callable[[], Bitmap]]) -> Optional[Bitmap]:
+    """Merge the pending ordinals into the stored bitmap and return it
+
+    A missing bitmap comes from rebuild(); without one nothing is written and
+    None is returned.
+    """
+    with redis_binary_client.pipeline() as pipe:
+        pipe.watch(bitmap_key(user_id))
+        blob = pipe.get(bitmap_key(user_id))
+        if blob is None and rebuild is None:
+            return None
+        pending = pipe.smembers(pending_key(user_id))
+        if blob is not None and not pending:
+            return Bitmap.from_bytes(blob)
+
+        seen = Bitmap.from_bytes(blob) if blob is not None else rebuild()
+        seen = seen | Bitmap(int(ordinal) for ordinal in pending)
+        try:
+            pipe.multi()
+            pipe.set(bitmap_key(user_id), seen.to_bytes(), ex=settings.SEEN_QUESTIONS_TTL_SECONDS)
+            if pending:
+                pipe.srem(pending_key(user_id), *pending)  # only what was merged; later SADDs stay
+            pipe.expire(pending_key(user_id), settings.SEEN_QUESTIONS_TTL_SECONDS)
+            pipe.execute()
+        except WatchError:
+            pass  # folded concurrently; what we read is complete either way
+        return seen
+
+
+def seen_questions(db: Session, user_id: UUID) -> Bitmap:
+    """Ordinals of every question the user has answered"""
+    try:
+        return _fold(user_id, lambda: load_from_attempts(db, user_id))
+    except RedisError as e:
+        logger.warning("Seen questions unavailable in Redis, reading attempts: %s", e)
+        return load_from_attempts(db, user_id)
+
+
+def record_seen(user_id: UUID, ordinals: Iterable[int]) -> None:
+    """Add answered questions to the user's seen set (best effort; call after commit)"""
+    ordinals = list(ordinals)
+    if not ordinals:
+        return
+    try:
+        with redis_binary_client.pipeline(transaction=False) as pipe:
+            pipe.sadd(pending_key(user_id), *ordinals)
+            pipe.expire(pending_key(user_id), settings.SEEN_QUESTIONS_TTL_SECONDS)
+            pipe.scard(pending_key(user_id))
+            pending = pipe.execute()[-1]
+        if pending > SEEN_QUESTIONS_PENDING_LIMIT:
+            _fold(user_id, None)
+    except RedisError as e:
+        logger.warning("Seen questions update failed: %s", e)
+
+
+def sample_questions(candidates: Bitmap, seen: Bitmap, count: int) -> List[int]:
+    """Up to count random ordinals from candidates, topped up with seen ones only if too few are unseen"""
+    unseen = candidates - seen
+    if len(unseen) >= count:
+        return unseen.sample(count)
+    return list(unseen) + (candidates & seen).sample(count - len(unseen))
+
+
+class CandidateCache:
+    """LRU of candidate bitmaps per quiz filter, tagged with the content version they were loaded at"""
+
+    def __init__(self):
+        self._entries: "OrderedDict[Hashable, Tuple[int, Bitmap]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable, load: Callable[[], Bitmap]) -> Bitmap:
+        try:
+            version = current_version()
+        except RedisError as e:
+            logger.warning("Content version unavailable, loading quiz candidates uncached: %s", e)
+            return load()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] == version:
+                self._entries.move_to_end(key)
+                return entry[1]
+        candidates = load()
+        with self._lock:
+            self._entries[key] = (version, candidates)
+            self._entries.move_to_end(key)
+            while len(self._entries) > settings.QUIZ_CANDIDATE_CACHE_SIZE:
+                self._entries.popitem(last=False)
+        return candidates
+
+
+quiz_candidates = CandidateCache()
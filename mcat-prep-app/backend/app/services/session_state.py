@@ -0,0 +1,205 @@
+"""
+Hot test-session state in Redis
+
+While a test is being taken its position, per-question elapsed time, flags and
+tentative answers live in one Redis hash per attempt, so navigation clicks never
+write Postgres. Changed attempts are added to a dirty set; a background task
+checkpoints them into user_test_attempts (position, status, total time) every
+TEST_CHECKPOINT_SECONDS, and pausing checkpoints immediately.
+
+Because the state is in Redis rather than in a worker, resuming, even on
+another worker or after a restart, is a single HGETALL. If the hash is gone
+(expired, or Redis lost its data) it is reseeded from the last checkpoint.
+"""
+import asyncio
+import logging
+import time
+from typing import Dict, Iterable, List, Optional
+from uuid import UUID
+from sqlalchemy import bindparam, update
+from app.core.config import settings
+from app.core.database import engine
+from app.core.redis_client import redis_client
+from app.models.test import UserTestAttempt
+
+logger = logging.getLogger(__name__)
+
+DIRTY_KEY = "test:session:dirty"
+OPEN_STATUSES = ("in_progress", "paused")
+
+
+def state_key(attempt_id) -> str:
+    return f"test:session:{attempt_id}"
+
+
+def parse_state(attempt_id, fields: Dict[str, str]) -> Dict:
+    """Shape a raw hash into position, status, elapsed seconds, flags and tentative answers"""
+    elapsed, flags, answers, submitted = {}, [], {}, []
+    for field, value in fields.items():
+        kind, _, question_id = field.partition(":")
+        if kind == "elapsed":
+            elapsed[question_id] = int(value)
+        elif kind == "flag" and value == "1":
+            flags.append(question_id)
+        elif kind == "answer":
+            answers[question_id] = value
+        elif kind == "submitted":
+            submitted.append(question_id)
+    return {
+        "attempt_id": str(attempt_id),
+        "user_id": fields.get("user_id"),
+        "status": fields.get("status", "in_progress"),
+        "section": int(fields.get("section", 0)),
+        "index": int(fields.get("index", 0)),
+        "elapsed_seconds": elapsed,
+        "total_elapsed_seconds": sum(elapsed.values()),
+        "flags": sorted(flags),
+        "answers": answers,
+        "submitted": submitted,
+        # Server-enforced section timer (see section_timers): running deadline or paused remainder
+        "deadline_ms": int(fields["deadline"]) if "deadline" in fields else None,
+        "remaining_ms": int(fields["remaining"]) if "remaining" in fields else None,
+    }
+
+
+def load(attempt_id) -> Optional[Dict]:
+    fields = redis_client.hgetall(state_key(attempt_id))
+    return parse_state(attempt_id, fields) if fields else None
+
+
+def seed(attempt: UserTestAttempt) -> Dict:
+    """Recreate the hash from the attempt's last checkpoint"""
+    fields = {
+        "user_id": str(attempt.user_id),
+        "status": attempt.status,
+        "section": attempt.current_section or 0,
+        "index": attempt.current_question_index or 0,
+    }
+    key = state_key(attempt.id)
+    pipe = redis_client.pipeline(transaction=True)
+    for name, value in fields.items():
+        pipe.hsetnx(key, name, value)  # never overwrite state another worker wrote meanwhile
+    pipe.expire(key, settings.TEST_SESSION_STATE_TTL_SECONDS)
+    pipe.hgetall(key)
+    return parse_state(attempt.id, pipe.execute()[-1])
+
+
+def load_or_seed(attempt: UserTestAttempt) -> Dict:
+    return load(attempt.id) or seed(attempt)
+
+
+def _write(attempt_id, mapping: Optional[Dict] = None, elapsed: Optional[Dict[str, int]] = None) -> None:
+    key = state_key(attempt_id)
+    pipe = redis_client.pipeline(transaction=True)
+    if mapping:
+        pipe.hset(key, mapping=mapping)
+    for question_id, seconds in (elapsed or {}).items():
+        if seconds > 0:
+            pipe.hincrby(key, f"elapsed:{question_id}", seconds)
+    pipe.hset(key, "updated", int(time.time()))
+    pipe.expire(key, settings.TEST_SESSION_STATE_TTL_SECONDS)
+    pipe.sadd(DIRTY_KEY, str(attempt_id))
+    pipe.execute()
+
+
+def record_position(
+    attempt_id, section: int, index: int, question_id: Optional[str] = None, seconds: int = 0
+) -> None:
+    """Move to a new position, crediting ``seconds`` to the question being left"""
+    _write(attempt_id, {"section": section, "index": index}, {question_id: seconds} if question_id else None)
+
+
+def record_flag(attempt_id, question_id: str, flagged: bool) -> None:
+    _write(attempt_id, {f"flag:{question_id}": int(flagged)})
+
+
+def record_tentative_answer(attempt_id, question_id: str, choice: str) -> None:
+    _write(attempt_id, {f"answer:{question_id}": choice})
+
+
+def record_submitted(attempt_id, question_id: str) -> None:
+    """Mark a question as answered for real, so an expiring section does not submit it again"""
+    _write(attempt_id, {f"submitted:{question_id}": 1})
+
+
+def record_status(attempt_id, status: str) -> None:
+    _write(attempt_id, {"status": status})
+
+
+def clear(attempt_id) -> None:
+    pipe = redis_client.pipeline(transaction=True)
+    pipe.delete(state_key(attempt_id))
+    pipe.srem(DIRTY_KEY, str(attempt_id))
+    pipe.execute()
+
+
+def write_checkpoints(states: List[Dict]) -> int:
+    """Copy session states into user_test_attempts with one executemany UPDATE"""
+    rows = [
+        {
+            "b_id": UUID(state["attempt_id"]),
+            "b_section": state["section"],
+            "b_index": state["index"],
+            "b_status": state["status"] if state["status"] in OPEN_STATUSES else "in_progress",
+            "b_seconds": state["total_elapsed_seconds"],
+        }
+        for state in sorted(states, key=lambda state: state["attempt_id"])
+    ]
+    if not rows:
+        return 0
+    with engine.begin() as connection:
+        connection.execute(
+            update(UserTestAttempt)
+            .where(
+                UserTestAttempt.id == bindparam("b_id"),
+                # A completed attempt is final; a late checkpoint must not reopen it
+                UserTestAttempt.status.in_(OPEN_STATUSES),
+            )
+            .values(
+                current_section=bindparam("b_section"),
+                current_question_index=bindparam("b_index"),
+                status=bindparam("b_status"),
+                total_time_spent_seconds=bindparam("b_seconds"),
+            ),
+            rows,
+        )
+    return len(rows)
+
+
+def checkpoint(attempt_ids: Optional[Iterable] = None) -> int:
+    """Checkpoint the given attempts, or drain the dirty set in batches"""
+    if attempt_ids is not None:
+        members = [str(attempt_id) for attempt_id in attempt_ids]
+        if members:
+            redis_client.srem(DIRTY_KEY, *members)
+        return _checkpoint_members(members)
+
+    written = 0
+    while True:
+        members = redis_client.spop(DIRTY_KEY, settings.TEST_CHECKPOINT_BATCH) or []
+        written += _checkpoint_members(members)
+        if len(members) < settings.TEST_CHECKPOINT_BATCH:
+            return written
+
+
+def _checkpoint_members(members: List[str]) -> int:
+    if not members:
+        return 0
+    pipe = redis_client.pipeline(transaction=False)
+    for member in members:
+        pipe.hgetall(state_key(member))
+    states = [parse_state(member, fields) for member, fields in zip(members, pipe.execute()) if fields]
+    try:
+        return write_checkpoints(states)
+    except Exception:
+        redis_client.sadd(DIRTY_KEY, *members)  # retried on the next run
+        raise
+
+
+async def checkpoint_sessions_periodically() -> None:
+    while True:
+        await asyncio.sleep(settings.TEST_CHECKPOINT_SECONDS)
+        try:
+            await asyncio.to_thread(checkpoint)
+        except Exception:
+            logger.exception("Test session checkpoint failed")
@@ -0,0 +1,230 @@
+"""
+Coalesced study-progress heartbeats
+
+Readers ping about every 15 seconds while a module is open. A ping never touches
+Postgres: it adds its seconds to a Redis hash per (user, module) and marks the
+pair dirty. Each worker periodically drains dirty pairs and writes them to
+user_study_progress in one batched upsert, so a module read for ten minutes
+costs one row write per flush interval instead of forty UPDATEs.
+
+When Redis is unavailable pings are coalesced in this worker's memory instead,
+and batches that fail to write are kept there for the next flush.
+"""
+import asyncio
+import json
+import logging
+import threading
+import time
+import uuid
+from datetime import datetime, timezone
+from typing import Any, Dict, Optional, Tuple
+from uuid import UUID
+from redis.exceptions import RedisError
+from sqlalchemy import and_, func, null, or_, select, update
+from sqlalchemy.dialects.postgresql import insert
+from app.core.config import settings
+from app.core.database import engine
+from app.core.metrics import registry
+from app.core.redis_client import redis_client
+from app.models.content import StudyModule
+from app.models.progress import UserStudyProgress
+from app.models.user import User
+
+logger = logging.getLogger(__name__)
+
+DIRTY_KEY = "study:hb:dirty"
+
+# (user_id, module_id) -> [seconds, last accessed (epoch), bookmark json or None, completed]
+Pending = Dict[Tuple[str, int], list]
+
+registry.counters.setdefault("study_heartbeats_total", {})
+registry.counters.setdefault("study_progress_rows_written_total", {})
+
+
+def _pair_key(user_id: str, module_id: int) -> str:
+    return f"study:hb:{user_id}:{module_id}"
+
+
+def _merge(pending: Pending, user_id: str, module_id: int, seconds: int, accessed: float,
+           bookmark: Optional[str], completed: bool) -> None:
+    entry = pending.setdefault((user_id, module_id), [0, 0.0, None, False])
+    entry[0] += seconds
+    entry[1] = max(entry[1], accessed)
+    if bookmark is not None and accessed >= entry[1]:
+        entry[2] = bookmark
+    entry[3] = entry[3] or completed
+
+
+class HeartbeatBuffer:
+    """Per-(user, module) heartbeat totals waiting to be written"""
+
+    def __init__(self):
+        self._local: Pending = {}
+        self._lock = threading.Lock()
+
+    def record(self, user_id: UUID, module_id: int, seconds: int,
+               bookmark: Optional[Dict[str, Any]] = None, completed: bool = False) -> None:
+        seconds = max(0, min(seconds, settings.STUDY_HEARTBEAT_MAX_SECONDS))
+        accessed = time.time()
+        bookmark_json = json.dumps(bookmark) if bookmark is not None else None
+        registry.counters["study_heartbeats_total"][()] = (
+            registry.counters["study_heartbeats_total"].get((), 0) + 1
+        )
+
+        key = _pair_key(str(user_id), module_id)
+        fields = {"accessed": accessed}
+        if bookmark_json is not None:
+            fields["bookmark"] = bookmark_json
+        if completed:
+            fields["completed"] = 1
+        try:
+            pipe = redis_client.pipeline(transaction=True)
+            pipe.hincrby(key, "seconds", seconds)
+            pipe.hset(key, mapping=fields)
+            pipe.sadd(DIRTY_KEY, f"{user_id}:{module_id}")
+            pipe.execute()
+        except RedisError:
+            with self._lock:
+                _merge(self._local, str(user_id), module_id, seconds, accessed, bookmark_json, completed)
+
+    def _drain_redis(self, pending: Pending) -> int:
+        members = redis_client.spop(DIRTY_KEY, settings.STUDY_PROGRESS_FLUSH_BATCH) or []
+        if not members:
+            return 0
+        # HGETALL + DEL in one MULTI so a ping landing mid-drain goes to a fresh hash
+        pipe = redis_client.pipeline(transaction=True)
+        pairs = []
+        for member in members:
+            user_id, module_id = member.rsplit(":", 1)
+            pairs.append((user_id, int(module_id)))
+            key = _pair_key(user_id, int(module_id))
+            pipe.hgetall(key)
+            pipe.delete(key)
+        values = pipe.execute()[::2]
+        for (user_id, module_id), fields in zip(pairs, values):
+            if fields:
+                _merge(pending, user_id, module_id, int(fields.get("seconds", 0)),
+                       float(fields.get("accessed", 0)), fields.get("bookmark"), "completed" in fields)
+        return len(members)
+
+    def _write(self, pending: Pending) -> int:
+        try:
+            return write_progress(pending)
+        except Exception:
+            with self._lock:
+                for (user_id, module_id), (seconds, accessed, bookmark, completed) in pending.items():
+                    _merge(self._local, user_id, module_id, seconds, accessed, bookmark, completed)
+            raise
+
+    def flush(self) -> int:
+        """Write coalesced heartbeats batch by batch; returns the number of progress rows written"""
+        with self._lock:
+            pending, self._local = self._local, {}
+        written = 0
+        while True:
+            try:
+                drained = self._drain_redis(pending)
+            except RedisError as e:
+                logger.warning("Could not drain study heartbeats from Redis: %s", e)
+                drained = 0
+            if pending:
+                written += self._write(pending)
+            if drained < settings.STUDY_PROGRESS_FLUSH_BATCH:
+                return written
+            pending = {}
+
+
+def write_progress(pending: Pending) -> int:
+    """Upsert coalesced totals and complete modules that were finished or read long enough"""
+    with engine.begin() as connection:
+        module_ids = {module_id for _, module_id in pending}
+        user_ids = {UUID(user_id) for user_id, _ in pending}
+        # Pings are not validated when they arrive; drop unknown modules and deleted users here
+        known_modules = set(
+            connection.execute(select(StudyModule.id).where(StudyModule.id.in_(module_ids))).scalars()
+        )
+        known_users = {
+            str(user_id)
+            for user_id in connection.execute(select(User.id).where(User.id.in_(user_ids))).scalars()
+        }
+
+        rows = [
+            {
+                "id": uuid.uuid4(),
+                "user_id": UUID(user_id),
+                "study_module_id": module_id,
+                "status": "in_progress",
+                "time_spent_seconds": seconds,
+                "last_accessed_at": datetime.fromtimestamp(accessed, timezone.utc),
+                # SQL NULL rather than JSON null, so the upsert keeps the stored bookmark
+                "bookmark_position": json.loads(bookmark) if bookmark is not None else null(),
+            }
+            # Sorted so concurrent flushes lock rows in the same order
+            for (user_id, module_id), (seconds, accessed, bookmark, _) in sorted(pending.items())
+            if user_id in known_users and module_id in known_modules
+        ]
+        if not rows:
+            return 0
+
+        stmt = insert(UserStudyProgress).values(rows)
+        written = connection.execute(
+            stmt.on_conflict_do_update(
+                constraint="unique_user_study_module",
+                set_={
+                    "time_spent_seconds": func.coalesce(UserStudyProgress.time_spent_seconds, 0)
+                    + stmt.excluded.time_spent_seconds,
+                    "last_accessed_at": func.greatest(
+                        UserStudyProgress.last_accessed_at, stmt.excluded.last_accessed_at
+                    ),
+                    "bookmark_position": func.coalesce(
+                        stmt.excluded.bookmark_position, UserStudyProgress.bookmark_position
+                    ),
+                    "status": func.coalesce(
+                        func.nullif(UserStudyProgress.status, "not_started"), "in_progress"
+                    ),
+                },
+            ).returning(UserStudyProgress.id, UserStudyProgress.user_id, UserStudyProgress.study_module_id)
+        ).all()
+
+        finished = [
+            row.id for row in written if pending[(str(row.user_id), row.study_module_id)][3]
+        ]
+        connection.execute(
+            update(UserStudyProgress)
+            .where(
+                UserStudyProgress.id.in_([row.id for row in written]),
+                UserStudyProgress.status != "completed",
+                StudyModule.id == UserStudyProgress.study_module_id,
+                or_(
+                    UserStudyProgress.id.in_(finished),
+                    and_(
+                        StudyModule.estimated_time_minutes.isnot(None),
+                        UserStudyProgress.time_spent_seconds
+                        >= StudyModule.estimated_time_minutes * 60 * settings.STUDY_COMPLETION_RATIO,
+                    ),
+                ),
+            )
+            .values(status="completed", completed_at=func.now())
+        )
+    return len(written)
+
+
+heartbeats = HeartbeatBuffer()
+
+
+def _count_writes(rows: int) -> None:
+    counter = registry.counters["study_progress_rows_written_total"]
+    counter[()] = counter.get((), 0) + rows
+
+
+async def flush_heartbeats() -> None:
+    _count_writes(await asyncio.to_thread(heartbeats.flush))
+
+
+async def flush_heartbeats_periodically() -> None:
+    while True:
+        await asyncio.sleep(settings.STUDY_PROGRESS_FLUSH_SECONDS)
+        try:
+            await flush_heartbeats()
+        except Exception:
+            logger.exception("Study progress flush failed")
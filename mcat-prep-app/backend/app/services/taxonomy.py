@@ -0,0 +1,170 @@
+"""
+Content taxonomy snapshot
+
+AAMC foundational concepts and topics are small and change only with content
+releases, so each worker holds them as an immutable in-memory snapshot, loaded
+during warm-up. Readers take a reference to the current snapshot; reloading
+builds a new one and swaps the reference.
+
+The snapshot records the content version (see content_version) it was built
+from; a background task polls the version every TAXONOMY_REFRESH_SECONDS and
+reloads when an import has bumped it. The concept/topic tree is serialized
+once per snapshot and tagged with a hash of its content, so serving it, or a
+304 for it, touches neither Postgres nor Redis.
+"""
+import asyncio
+import hashlib
+import logging
+import time
+from typing import Dict, List, Optional
+from redis.exceptions import RedisError
+from sqlalchemy import select
+from app.core.config import settings
+from app.core.database import engine
+from app.models.content import AAMCFoundationalConcept, Topic
+from app.schemas.study import TaxonomyResponse
+from app.services.content_version import current_version
+
+logger = logging.getLogger(__name__)
+
+SECTION_ORDER = ("CPBS", "CARS", "BBLS", "PSBB")
+
+
+class TaxonomySnapshot:
+    """Concepts and topics as plain dicts keyed by id, plus the serialized tree"""
+
+    __slots__ = ("concepts", "topics", "version", "tree_json", "etag", "loaded_at")
+
+    def __init__(self, concepts: Dict[int, dict], topics: Dict[int, dict], version: Optional[int] = None):
+        self.concepts = concepts
+        self.topics = topics
+        self.version = version
+        self.tree_json = TaxonomyResponse(sections=build_tree(concepts, topics)).model_dump_json().encode()
+        self.etag = '"%s"' % hashlib.sha256(self.tree_json).hexdigest()[:32]
+        self.loaded_at = time.time()
+
+
+def _roots_of(rows: Dict[int, dict], parent_field: str) -> Dict[int, Optional[int]]:
+    """Each row's usable parent id: None for roots, missing parents and rows on a cycle"""
+    parents = {}
+    for row_id, row in rows.items():
+        parent_id = row[parent_field] if row[parent_field] in rows else None
+        seen = {row_id}
+        ancestor = parent_id
+        while ancestor is not None:
+            if ancestor in seen:
+                parent_id = None  # bad data; show the row at the top level rather than drop it
+                break
+            seen.add(ancestor)
+            grandparent = rows[ancestor][parent_field]
+            ancestor = grandparent if grandparent in rows else None
+        parents[row_id] = parent_id
+    return parents
+
+
+def build_tree(concepts: Dict[int, dict], topics: Dict[int, dict]) -> List[dict]:
+    """Sections of nested concepts, each with its nested topics"""
+    concept_nodes = {
+        concept_id: {
+            "id": concept_id,
+            "concept_code": concept["concept_code"],
+            "title": concept["title"],
+            "description": concept["description"],
+            "children": [],
+            "topics": [],
+        }
+        for concept_id, concept in sorted(concepts.items(), key=lambda item: item[1]["concept_code"])
+    }
+    topic_nodes = {
+        topic_id: {
+            "id": topic_id,
+            "name": topic["name"],
+            "description": topic["description"],
+            "difficulty_level": topic["difficulty_level"],
+            "children": [],
+        }
+        for topic_id, topic in sorted(topics.items())
+    }
+    section_names = {row["mcat_section"] for row in [*concepts.values(), *topics.values()]}
+    sections = {
+        name: {"mcat_section": name, "concepts": [], "topics": []}
+        for name in sorted(
+            section_names,
+            key=lambda name: (SECTION_ORDER.index(name) if name in SECTION_ORDER else len(SECTION_ORDER), name),
+        )
+    }
+
+    concept_parents = _roots_of(concepts, "parent_concept_id")
+    for concept_id, node in concept_nodes.items():
+        parent_id = concept_parents[concept_id]
+        if parent_id is not None:
+            concept_nodes[parent_id]["children"].append(node)
+        else:
+            sections[concepts[concept_id]["mcat_section"]]["concepts"].append(node)
+
+    topic_parents = _roots_of(topics, "parent_topic_id")
+    for topic_id, node in topic_nodes.items():
+        parent_id = topic_parents[topic_id]
+        concept_id = topics[topic_id]["foundational_concept_id"]
+        if parent_id is not None:
+            topic_nodes[parent_id]["children"].append(node)
+        elif concept_id in concept_nodes:
+            concept_nodes[concept_id]["topics"].append(node)
+        else:
+            sections[topics[topic_id]["mcat_section"]]["topics"].append(node)
+    return list(sections.values())
+
+
+def _rows(connection, model) -> Dict[int, dict]:
+    table = model.__table__
+    return {row["id"]: dict(row) for row in connection.execute(select(table).order_by(table.c.id)).mappings()}
+
+
+def load_snapshot() -> TaxonomySnapshot:
+    try:
+        version = current_version()  # read first: a bump during the load triggers another reload
+    except RedisError as e:
+        logger.warning("Content version unavailable, taxonomy snapshot is unversioned: %s", e)
+        version = None
+    with engine.connect() as connection:
+        return TaxonomySnapshot(_rows(connection, AAMCFoundationalConcept), _rows(connection, Topic), version)
+
+
+class Taxonomy:
+    """This worker's current snapshot"""
+
+    def __init__(self):
+        self._snapshot: Optional[TaxonomySnapshot] = None
+
+    def load(self) -> TaxonomySnapshot:
+        self._snapshot = load_snapshot()
+        return self._snapshot
+
+    def snapshot(self) -> TaxonomySnapshot:
+        return self._snapshot or self.load()
+
+    def refresh(self) -> bool:
+        """Reload if the content version moved since the snapshot was built (always, if it has none)"""
+        snapshot = self._snapshot
+        if snapshot is not None and snapshot.version is not None and snapshot.version == current_version():
+            return False
+        self.load()
+        return True
+
+
+taxonomy = Taxonomy()
+
+
+def load_taxonomy() -> None:
+    snapshot = taxonomy.load()
+    logger.info("Loaded taxonomy snapshot: %d concepts, %d topics", len(snapshot.concepts), len(snapshot.topics))
+
+
+async def refresh_taxonomy_periodically() -> None:
+    while True:
+        await asyncio.sleep(settings.TAXONOMY_REFRESH_SECONDS)
+        try:
+            if await asyncio.to_thread(taxonomy.refresh):
+                logger.info("Reloaded taxonomy snapshot for content version %s", taxonomy.snapshot().version)
+        except Exception:
+            logger.exception("Taxonomy refresh failed")
@@ -0,0 +1,112 @@
+"""
+Practice test bundles
+
+A bundle is a whole practice test in one document: its sections in order, each
+with its questions (without answers) and the passages they use. It is built
+with a single query over the test's question ids, serialized and gzipped once,
+and stored in Redis under the test id and the content version it was built
+from. Every later request, on any worker, gets the stored bytes as they are.
+
+A content import bumps the version, so bundles built before it are no longer
+read and simply expire after TEST_BUNDLE_TTL_SECONDS. If Redis is unavailable
+bundles are built per request and not stored.
+"""
+import gzip
+import logging
+from typing import Optional
+from uuid import UUID
+from redis.exceptions import RedisError
+from app.core.config import settings
+from app.core.metrics import registry
+from app.core.redis_client import redis_binary_client
+from app.models.content import Passage, Question
+from app.models.test import PracticeTest
+from app.schemas.test import TestBundleResponse
+from app.services.content_version import current_version
+
+logger = logging.getLogger(__name__)
+
+registry.counters.setdefault("test_bundle_requests_total", {})
+
+
+def bundle_key(practice_test_id: UUID, version: int) -> str:
+    return f"test:bundle:{practice_test_id}:{version}"
+
+
+def build_bundle(db, practice_test: PracticeTest) -> bytes:
+    """The test's bundle as gzipped JSON; questions that no longer exist are left out"""
+    question_ids = [
+        question_id for section in practice_test.sections for question_id in section.get("question_ids", [])
+    ]
+    rows = []
+    if question_ids:
+        rows = (
+            db.query(Question, Passage)
+            .outerjoin(Passage, Question.passage_id == Passage.id)
+            .filter(Question.id.in_(question_ids))
+            .all()
+        )
+    found = {str(question.id): (question, passage) for question, passage in rows}
+
+    sections = []
+    for section in practice_test.sections:
+        pairs = [found[question_id] for question_id in section.get("question_ids", []) if question_id in found]
+        passages = {}
+        for _, passage in pairs:
+            if passage is not None:
+                passages.setdefault(passage.id, passage)
+        sections.append(
+            {
+                "section": section.get("section"),
+                "duration_minutes": section.get("duration_minutes"),
+                "questions": [question for question, _ in pairs],
+                "passages": list(passages.values()),
+            }
+        )
+
+    bundle = TestBundleResponse(
+        id=practice_test.id,
+        test_type=practice_test.test_type,
+        title=practice_test.title,
+        description=practice_test.description,
+        is_official_aamc=practice_test.is_official_aamc,
+        total_questions=practice_test.total_questions,
+        total_duration_minutes=practice_test.total_duration_minutes,
+        sections=sections,
+    )
+    # mtime=0 keeps the bytes identical across builds of the same content
+    return gzip.compress(bundle.model_dump_json().encode(), compresslevel=9, mtime=0)
+
+
+def _count(result: str) -> None:
+    requests = registry.counters["test_bundle_requests_total"]
+    requests[(result,)] = requests.get((result,), 0) + 1
+
+
+def get_bundle(db, practice_test_id: UUID) -> Optional[bytes]:
+    """The gzipped bundle for a practice test, or None if the test does not exist"""
+    try:
+        # Read the version before building: a bump during the build leaves the
+        # bundle under the old key, which is no longer read
+        key = bundle_key(practice_test_id, current_version())
+        blob = redis_binary_client.get(key)
+        if blob is not None:
+            _count("cached")
+            return blob
+    except RedisError as e:
+        logger.warning("Test bundle cache unavailable, building %s uncached: %s", practice_test_id, e)
+        key = None
+
+    practice_test = db.query(PracticeTest).filter(PracticeTest.id == practice_test_id).first()
+    if practice_test is None:
+        return None
+    blob = build_bundle(db, practice_test)
+    if key is None:
+        _count("uncached")
+        return blob
+    try:
+        redis_binary_client.set(key, blob, ex=settings.TEST_BUNDLE_TTL_SECONDS)
+    except RedisError as e:
+        logger.warning("Could not store test bundle %s: %s", key, e)
+    _count("built")
+    return blob
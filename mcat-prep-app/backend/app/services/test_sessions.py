@@ -0,0 +1,340 @@
+"""
+Live test-taking sessions
+
+A session is opened once per connection: the user, the attempt and every
+question of its practice test are loaded up front, with each question payload
+serialized to JSON once. Afterwards answers are graded in memory and handed to
+persist_answers in batches; no database session is held between batches, so
+an idle socket costs only its small in-memory state.
+
+Test content is shared between sessions through a small LRU, so thousands of
+sockets on the same full-length test hold one copy of its questions.
+"""
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+from uuid import UUID
+from redis.exceptions import RedisError
+from sqlalchemy import update
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.api.deps.database import pin_to_primary
+from app.models.content import Question
+from app.models.test import PracticeTest, UserTestAttempt
+from app.models.user import User
+from app.schemas.question import QuestionResponse
+from app.schemas.test import TestAttemptResponse
+from app.services import leaderboard, section_timers, seen_questions, session_state
+from app.services.attempts import GradedAttempt, answered_questions, count_answers, record_question_attempts
+from app.services.cohort import apply_accuracy_moves, record_test_scores
+from app.services.scoring import score_attempt
+
+logger = logging.getLogger(__name__)
+
+
+class TestContent:
+    """Sections and pre-serialized questions of one practice test"""
+
+    __slots__ = ("practice_test_id", "sections", "questions", "positions", "loaded_at")
+
+    def __init__(self, practice_test_id: UUID, sections: List[dict], questions: Dict[str, tuple]):
+        self.practice_test_id = practice_test_id
+        self.sections = sections
+        # question id -> (payload json, correct answer, mcat_section, foundational_concept_id)
+        self.questions = questions
+        # question id -> (section, index)
+        self.positions = {
+            question_id: (section_index, index)
+            for section_index, section in enumerate(sections)
+            for index, question_id in enumerate(section["question_ids"])
+        }
+        self.loaded_at = time.monotonic()
+
+    def question_at(self, section: int, index: int) -> Optional[str]:
+        try:
+            return self.sections[section]["question_ids"][index]
+        except (IndexError, KeyError, TypeError):
+            return None
+
+
+class TestContentCache:
+    """LRU of loaded practice tests, expiring entries after TEST_CONTENT_CACHE_SECONDS"""
+
+    def __init__(self):
+        self._entries: "OrderedDict[UUID, TestContent]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, db, practice_test_id: UUID) -> Optional[TestContent]:
+        with self._lock:
+            content = self._entries.get(practice_test_id)
+            if content is not None and time.monotonic() - content.loaded_at < settings.TEST_CONTENT_CACHE_SECONDS:
+                self._entries.move_to_end(practice_test_id)
+                return content
+        content = load_test_content(db, practice_test_id)
+        if content is not None:
+            with self._lock:
+                self._entries[practice_test_id] = content
+                self._entries.move_to_end(practice_test_id)
+                while len(self._entries) > settings.TEST_CONTENT_CACHE_SIZE:
+                    self._entries.popitem(last=False)
+        return content
+
+
+def load_test_content(db, practice_test_id: UUID) -> Optional[TestContent]:
+    practice_test = db.query(PracticeTest).filter(PracticeTest.id == practice_test_id).first()
+    if practice_test is None:
+        return None
+    question_ids = [
+        question_id for section in practice_test.sections for question_id in section.get("question_ids", [])
+    ]
+    questions = {}
+    for question in db.query(Question).filter(Question.id.in_(question_ids)).all():
+        payload = QuestionResponse.model_validate(question).model_dump_json()
+        questions[str(question.id)] = (
+            payload,
+            question.correct_answer,
+            question.mcat_section,
+            question.foundational_concept_id,
+        )
+    sections = [
+        {
+            "section": section.get("section"),
+            "duration_minutes": section.get("duration_minutes"),
+            "question_ids": [
+                question_id for question_id in section.get("question_ids", []) if question_id in questions
+            ],
+        }
+        for section in practice_test.sections
+    ]
+    return TestContent(practice_test.id, sections, questions)
+
+
+test_contents = TestContentCache()
+
+
+class TestSession:
+    """One connection's view of a test attempt
+
+    Position, flags, tentative answers and time per question are mirrored into
+    the attempt's Redis state (see session_state) as they change. If Redis is
+    unavailable the position is written with the next batch of answers instead.
+    Sections with a deadline (see section_timers) are taken in order.
+    """
+
+    def __init__(self, user_id: UUID, full_name: str, attempt: UserTestAttempt, content: TestContent,
+                 state: Optional[Dict] = None, answered: Iterable[str] = ()):
+        self.user_id = user_id
+        self.full_name = full_name
+        self.attempt_id = attempt.id
+        self.content = content
+        state = state or {}
+        self.section = state.get("section", attempt.current_section or 0)
+        self.index = state.get("index", attempt.current_question_index or 0)
+        self.flags: Dict[str, bool] = {question_id: True for question_id in state.get("flags", [])}
+        self.answers: Dict[str, str] = dict(state.get("answers", {}))
+        self.elapsed: Dict[str, int] = dict(state.get("elapsed_seconds", {}))
+        self.deadline_ms: Optional[int] = state.get("deadline_ms")
+        # Written answers plus those only marked submitted so far (still buffered on some socket)
+        self.answered: Set[str] = set(answered) | set(state.get("submitted", []))
+        self.viewing_since = time.monotonic()
+        self.moved = False  # position changed but could not be saved to Redis
+        self.pending: List[GradedAttempt] = []
+
+    def _remember(self, write, *args) -> None:
+        try:
+            write(self.attempt_id, *args)
+        except RedisError as e:
+            logger.warning("Test session state for %s not saved: %s", self.attempt_id, e)
+            self.moved = True
+
+    def current_question(self) -> Optional[str]:
+        return self.content.question_at(self.section, self.index)
+
+    def _leave_question(self) -> Tuple[Optional[str], int]:
+        """Credit the time since the last move to the question on screen"""
+        now = time.monotonic()
+        question_id, seconds = self.current_question(), int(now - self.viewing_since)
+        self.viewing_since = now
+        if question_id is not None and seconds > 0:
+            self.elapsed[question_id] = self.elapsed.get(question_id, 0) + seconds
+        return question_id, seconds
+
+    def time_on(self, question_id: str) -> int:
+        seconds = self.elapsed.get(question_id, 0)
+        if question_id == self.current_question():
+            seconds += int(time.monotonic() - self.viewing_since)
+        return seconds
+
+    def move_to(self, section: int, index: int) -> None:
+        question_id, seconds = self._leave_question()
+        self.section, self.index = section, index
+        self._remember(session_state.record_position, section, index, question_id, seconds)
+
+    def flag(self, question_id: str, flagged: bool) -> None:
+        self.flags[question_id] = flagged
+        self._remember(session_state.record_flag, question_id, flagged)
+
+    def select(self, question_id: str, choice: str) -> None:
+        self.answers[question_id] = choice
+        self._remember(session_state.record_tentative_answer, question_id, choice)
+
+    def submitted(self, question_id: str) -> None:
+        self.answered.add(question_id)
+        try:
+            session_state.record_submitted(self.attempt_id, question_id)
+        except RedisError as e:
+            logger.warning("Test session state for %s not saved: %s", self.attempt_id, e)
+
+    def accepts(self, question_id: str, now_ms: int) -> Optional[str]:
+        """Why an answer to this question can no longer be taken, if it cannot"""
+        if question_id in self.answered:
+            return "Question was already answered"
+        if self.deadline_ms is None:
+            return None
+        if self.content.positions[question_id][0] != self.section:
+            return "Question is not in the current section"
+        if now_ms > self.deadline_ms + settings.SECTION_GRACE_SECONDS * 1000:
+            return "Time is up for this section"
+        return None
+
+    def refresh(self) -> bool:
+        """Pick up a section change made by the timer; False once the attempt is over"""
+        state = session_state.load(self.attempt_id)
+        if state is None:
+            db = SessionLocal()
+            try:
+                attempt = db.query(UserTestAttempt).filter(UserTestAttempt.id == self.attempt_id).first()
+                if attempt is None or attempt.status not in session_state.OPEN_STATUSES:
+                    return False
+                state = session_state.seed(attempt)  # the state was lost, not cleared
+            finally:
+                db.close()
+        if state["section"] != self.section:
+            self.section, self.index = state["section"], state["index"]
+            self.viewing_since = time.monotonic()
+        self.deadline_ms = state["deadline_ms"]
+        return True
+
+    def suspend(self) -> None:
+        """Save the time spent on the current question when the connection ends"""
+        self.move_to(self.section, self.index)
+
+    def describe(self) -> str:
+        return json.dumps(
+            {
+                "type": "session",
+                "attempt_id": str(self.attempt_id),
+                "sections": [
+                    {
+                        "section": section["section"],
+                        "duration_minutes": section["duration_minutes"],
+                        "question_count": len(section["question_ids"]),
+                    }
+                    for section in self.content.sections
+                ],
+                "section": self.section,
+                "index": self.index,
+                "deadline_ms": self.deadline_ms,
+            }
+        )
+
+    def question_message(self) -> Optional[str]:
+        question_id = self.content.question_at(self.section, self.index)
+        if question_id is None:
+            return None
+        payload = self.content.questions[question_id][0]
+        return f'{{"type":"question","section":{self.section},"index":{self.index},"question":{payload}}}'
+
+
+def open_session(user_id: UUID, attempt_id: UUID) -> Tuple[Optional[TestSession], Optional[str]]:
+    """Load everything a connection needs, or return why it cannot be opened"""
+    db = SessionLocal()
+    try:
+        user = db.query(User).filter(User.id == user_id).first()
+        if user is None or not user.is_active:
+            return None, "User not found or inactive"
+        attempt = (
+            db.query(UserTestAttempt)
+            .filter(UserTestAttempt.id == attempt_id, UserTestAttempt.user_id == user_id)
+            .first()
+        )
+        if attempt is None:
+            return None, "Test attempt not found"
+        if attempt.status not in session_state.OPEN_STATUSES:
+            return None, f"Test attempt is {attempt.status}"
+        content = test_contents.get(db, attempt.practice_test_id)
+        if content is None:
+            return None, "Practice test not found"
+        try:
+            state = session_state.load_or_seed(attempt)
+            if state["status"] != "in_progress":
+                session_state.record_status(attempt.id, "in_progress")  # connecting resumes a paused attempt
+                deadline = section_timers.resume_section(attempt.id, state["section"])
+                if deadline is not None:
+                    state["deadline_ms"] = deadline
+        except RedisError as e:
+            logger.warning("Test session state for %s unavailable: %s", attempt.id, e)
+            state = None
+        answered = answered_questions(db, attempt)
+        return TestSession(user.id, user.full_name, attempt, content, state, answered), None
+    finally:
+        db.close()
+
+
+def persist_answers(session: TestSession, attempts: List[GradedAttempt]) -> None:
+    """Write a batch of answers, plus the position if Redis could not hold it, in one transaction"""
+    db = SessionLocal()
+    try:
+        ordinals = count_answers(db, [attempt.question_id for attempt, _, _ in attempts])
+        accuracy_moves = record_question_attempts(db, session.user_id, attempts)
+        if session.moved:
+            db.execute(
+                update(UserTestAttempt)
+                .where(UserTestAttempt.id == session.attempt_id)
+                .values(current_section=session.section, current_question_index=session.index)
+            )
+        db.commit()
+        session.moved = False
+    finally:
+        db.close()
+    if not attempts:
+        return
+    apply_accuracy_moves(accuracy_moves)
+    seen_questions.record_seen(session.user_id, ordinals)
+    pin_to_primary(session.user_id)
+    for attempt, _, _ in attempts:
+        leaderboard.record_attempt(session.user_id, session.full_name, attempt.is_correct)
+
+
+def complete_attempt(session: TestSession) -> Optional[str]:
+    """Score the attempt (once) and return it as JSON, or None if it no longer exists"""
+    db = SessionLocal()
+    try:
+        attempt = (
+            db.query(UserTestAttempt)
+            .filter(UserTestAttempt.id == session.attempt_id)
+            .with_for_update()
+            .first()
+        )
+        if attempt is None:
+            return None
+        newly_completed = attempt.status != "completed"
+        if newly_completed:
+            score_attempt(db, attempt)
+            db.commit()
+            db.refresh(attempt)
+        result = TestAttemptResponse.model_validate(attempt).model_dump_json()
+    finally:
+        db.close()
+    try:
+        session_state.clear(session.attempt_id)
+    except RedisError:
+        pass  # the state expires on its own and checkpoints never reopen a completed attempt
+    if newly_completed:
+        record_test_scores(attempt)
+        leaderboard.record_test_score(session.user_id, session.full_name, attempt.total_score, attempt.completed_at)
+        pin_to_primary(session.user_id)
+    return result
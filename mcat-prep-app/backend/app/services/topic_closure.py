@@ -0,0 +1,63 @@
+"""
+Topic closure table
+
+topic_closure holds every (ancestor, descendant) pair of the topic hierarchy,
+including each topic paired with itself, so "this topic and everything under
+it" is one lookup on the table's primary key instead of a recursive CTE per
+request. The hierarchy changes only when content is loaded, so the importer
+and the seed/dataset scripts rebuild the whole table in their transaction;
+DELETE rather than TRUNCATE keeps concurrent readers on the old rows until it
+commits.
+"""
+from typing import Iterable
+from sqlalchemy import Integer, func, select, union
+from sqlalchemy.dialects.postgresql import array
+from sqlalchemy.orm import Session
+from app.models.content import TopicClosure
+
+# Plain SQL so the importer can run it on its raw DB-API cursor. The path array stops
+# the recursion on a parent cycle in bad data.
+REBUILD_STATEMENTS = (
+    "DELETE FROM topic_closure",
+    """
+    INSERT INTO topic_closure (ancestor_id, descendant_id, depth)
+    WITH RECURSIVE closure (ancestor_id, descendant_id, depth, path) AS (
+        SELECT id, id, 0, ARRAY[id] FROM topics
+        UNION ALL
+        SELECT c.ancestor_id, t.id, c.depth + 1, c.path || t.id
+        FROM closure c
+        JOIN topics t ON t.parent_topic_id = c.descendant_id
+        WHERE t.id <> ALL (c.path)
+    )
+    SELECT ancestor_id, descendant_id, min(depth) FROM closure GROUP BY ancestor_id, descendant_id
+    """,
+)
+
+
+def rebuild_topic_closure(cursor) -> int:
+    """Recompute the table from topics.parent_topic_id; returns the number of pairs"""
+    for statement in REBUILD_STATEMENTS:
+        cursor.execute(statement)
+    return cursor.rowcount
+
+
+def rebuild_topic_closure_in_session(db: Session) -> int:
+    """rebuild_topic_closure in an ORM session's transaction (the caller commits)"""
+    cursor = db.connection().connection.cursor()
+    try:
+        return rebuild_topic_closure(cursor)
+    finally:
+        cursor.close()
+
+
+def topic_and_descendants(topic_ids: Iterable[int]):
+    """Subquery of the ids of the given topics and all topics under them
+
+    The given ids are always included, so a stale or unbuilt closure still
+    matches the topics themselves.
+    """
+    topic_ids = list(topic_ids)
+    return union(
+        select(func.unnest(array(topic_ids, type_=Integer))),
+        select(TopicClosure.descendant_id).where(TopicClosure.ancestor_id.in_(topic_ids)),
+    )
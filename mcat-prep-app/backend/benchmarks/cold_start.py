@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""
+Cold-start benchmark
+Starts a fresh uvicorn worker, polls /health until it answers, then times the
+first and second request to a few routes (login, dashboard, topics). The gap
+between first and second call is what a cold worker costs the users who land
+on it right after a deploy or autoscale event. Each run is repeated with
+lifespan warm-up on and off (WARMUP_ENABLED) so the two can be compared:
+warm-up moves work from first requests into time-to-ready.
+
+Needs Postgres and Redis as configured in .env and a user from
+scripts/generate_dataset.py (loadtest+<n>@mcatprep.dev).
+
+Usage:
+    python benchmarks/cold_start.py --runs 5
+    python benchmarks/cold_start.py --modes warm --port 8123
+"""
+import sys
+import os
+import json
+import time
+import argparse
+import statistics
+import subprocess
+from datetime import datetime
+
+import httpx
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "results")
+
+
+def _timed(client, method, url, **kwargs):
+    started = time.perf_counter()
+    response = client.request(method, url, **kwargs)
+    elapsed_ms = (time.perf_counter() - started) * 1000
+    response.raise_for_status()
+    return response, elapsed_ms
+
+
+def cold_start(args, warmup):
+    """Start one worker and time it up to its second round of requests"""
+    env = dict(os.environ, WARMUP_ENABLED=str(warmup).lower(), RATE_LIMIT_ENABLED="false")
+    started = time.perf_counter()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(args.port), "--log-level", "warning"],
+        cwd=BACKEND_DIR, env=env,
+    )
+    base_url = f"http://127.0.0.1:{args.port}"
+    timings = {}
+    try:
+        with httpx.Client(base_url=base_url, timeout=args.timeout) as client:
+            while True:
+                if server.poll() is not None:
+                    sys.exit(f"❌ uvicorn exited with {server.returncode}")
+                try:
+                    if client.get("/health").status_code == 200:
+                        break
+                except httpx.TransportError:
+                    pass
+                if time.perf_counter() - started > args.timeout:
+                    sys.exit("❌ Server did not become ready")
+                time.sleep(0.01)
+            timings["ready_ms"] = (time.perf_counter() - started) * 1000
+
+            credentials = {"email": args.email, "password": args.password}
+            for attempt in ("first", "second"):
+                response, timings[f"login_{attempt}_ms"] = _timed(
+                    client, "POST", "/api/auth/login", json=credentials
+                )
+                headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+                _, timings[f"dashboard_{attempt}_ms"] = _timed(
+                    client, "GET", "/api/analytics/dashboard", headers=headers
+                )
+                _, timings[f"topics_{attempt}_ms"] = _timed(client, "GET", "/api/study/topics", headers=headers)
+            timings["first_success_ms"] = timings["ready_ms"] + timings["login_first_ms"]
+    finally:
+        server.terminate()
+        server.wait(timeout=30)
+    return timings
+
+
+def run(args):
+    results = {}
+    for mode in args.modes:
+        runs = [cold_start(args, warmup=mode == "warm") for _ in range(args.runs)]
+        results[mode] = {
+            name: round(statistics.median(run[name] for run in runs), 1) for name in runs[0]
+        }
+        print(f"   {mode:<5} " + "  ".join(f"{name} {value}" for name, value in results[mode].items()))
+    return results
+
+
+def print_report(results):
+    names = list(next(iter(results.values())))
+    print(f"\n{'':<22}" + "".join(f"{mode:>12}" for mode in results))
+    for name in names:
+        print(f"   {name:<19}" + "".join(f"{results[mode][name]:>10.1f}ms" for mode in results))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Measure time to first successful request on a fresh worker")
+    parser.add_argument("--runs", type=int, default=3, help="Worker starts per mode (medians are reported)")
+    parser.add_argument("--modes", nargs="+", choices=["warm", "cold"], default=["warm", "cold"],
+                        help="warm = lifespan warm-up on, cold = off")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--email", default="loadtest+0@mcatprep.dev")
+    parser.add_argument("--password", default="loadtest123")
+    parser.add_argument("--timeout", type=float, default=60.0)
+    parser.add_argument("--output", help="Result file (default: benchmarks/results/cold-start-<timestamp>.json)")
+    args = parser.parse_args()
+
+    print("MCAT Prep - Cold Start")
+    print("=" * 50)
+    results = run(args)
+    print_report(results)
+
+    os.makedirs(RESULTS_DIR, exist_ok=True)
+    output = args.output or os.path.join(
+        RESULTS_DIR, f"cold-start-{datetime.now().strftime('%Y%m%d-%H%M%S')}.json"
+    )
+    with open(output, "w") as f:
+        json.dump(results, f, indent=2)
+    print(f"\n💾 Results saved to {output}")
@@ -0,0 +1,361 @@
+#!/usr/bin/env python3
+"""
+End-to-end load benchmark for the MCAT Prep API
+Each virtual user logs in and then repeatedly walks the core student journey:
+
+    dashboard → create quiz → start attempt → (get question → answer) × N → review queue → trends
+    → study module heartbeats × M
+
+Requests go either to a running server (--base-url, e.g. uvicorn against a local
+Postgres/Redis) or straight into app.main:app in-process (--in-process), which
+removes network and server overhead from the numbers. In-process runs start the app
+lifespan (warm-up, periodic flushes, section timers) like a server would, and also
+report how many study heartbeats the periodic flush coalesced into each progress row
+write during the measured run. Per-route p50/p95/p99 latency, throughput and error
+rates are printed and saved as JSON; pass --compare with an earlier result file to
+diff two commits.
+
+Rate limits would turn most of the journey into 429s, so in-process runs switch
+them off unless --rate-limits is given; start a server under test with
+RATE_LIMIT_ENABLED=false.
+
+Users come from scripts/generate_dataset.py (loadtest+<n>@mcatprep.dev).
+
+Usage:
+    python benchmarks/load_test.py --concurrency 50 --duration 60
+    python benchmarks/load_test.py --in-process --concurrency 10 --duration 30
+    python benchmarks/load_test.py --compare benchmarks/results/<earlier>.json
+"""
+import sys
+import os
+import json
+import time
+import random
+import asyncio
+import argparse
+import contextlib
+import subprocess
+from collections import defaultdict
+from datetime import datetime, timezone
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import httpx
+
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "results")
+
+
+class Recorder:
+    """Collects latencies and errors per route label"""
+
+    def __init__(self):
+        self.latencies = defaultdict(list)
+        self.errors = defaultdict(int)
+        self.statuses = defaultdict(lambda: defaultdict(int))
+        self.recording = False
+
+    async def request(self, client, method, label, url, return_errors=False, **kwargs):
+        """The response, or None on a transport error or (unless return_errors) an error status"""
+        started = time.perf_counter()
+        try:
+            response = await client.request(method, url, **kwargs)
+            status = response.status_code
+        except httpx.HTTPError:
+            response, status = None, "exception"
+        elapsed_ms = (time.perf_counter() - started) * 1000
+
+        if self.recording:
+            route = f"{method} {label}"
+            self.latencies[route].append(elapsed_ms)
+            self.statuses[route][str(status)] += 1
+            if response is None or response.status_code >= 400:
+                self.errors[route] += 1
+        if response is None or (response.status_code >= 400 and not return_errors):
+            return None
+        return response
+
+
+def _retry_delay(response, default):
+    """Seconds to wait before retrying: the response's Retry-After if it has one"""
+    if response is not None:
+        try:
+            return max(0.0, float(response.headers["Retry-After"]))
+        except (KeyError, ValueError):
+            pass
+    return default
+
+
+def _percentile(sorted_values, pct):
+    if not sorted_values:
+        return None
+    index = min(len(sorted_values) - 1, max(0, round(pct / 100 * len(sorted_values)) - 1))
+    return round(sorted_values[index], 2)
+
+
+async def virtual_user(client, recorder, user_n, args, deadline):
+    rng = random.Random(args.seed + user_n)
+    email = args.email_template.format(n=user_n % args.user_pool)
+    response = await recorder.request(
+        client, "POST", "/api/auth/login", "/api/auth/login",
+        json={"email": email, "password": args.password},
+    )
+    if response is None:
+        return
+    headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+    modules = await recorder.request(client, "GET", "/api/study/modules", "/api/study/modules", headers=headers)
+    module_ids = [module["id"] for module in modules.json()] if modules is not None else []
+
+    while time.perf_counter() < deadline:
+        await recorder.request(client, "GET", "/api/analytics/dashboard", "/api/analytics/dashboard", headers=headers)
+
+        quiz = await recorder.request(
+            client, "POST", "/api/tests/quiz/create", "/api/tests/quiz/create",
+            headers=headers, json={"num_questions": args.questions_per_quiz}, return_errors=True,
+        )
+        if quiz is None or quiz.status_code >= 400:
+            # Back off rather than spin on a failing endpoint; a 429 says for how long
+            delay = _retry_delay(quiz, args.retry_delay)
+            await asyncio.sleep(max(0.0, min(delay, deadline - time.perf_counter())))
+            continue
+        quiz = quiz.json()
+
+        attempt = await recorder.request(
+            client, "POST", "/api/tests/attempt/start", "/api/tests/attempt/start",
+            headers=headers, json={"practice_test_id": quiz["id"]},
+        )
+        test_attempt_id = attempt.json()["id"] if attempt is not None else None
+
+        for section in quiz["sections"]:
+            for question_id in section["question_ids"]:
+                if time.perf_counter() >= deadline:
+                    return
+                await recorder.request(
+                    client, "GET", "/api/questions/{question_id}", f"/api/questions/{question_id}",
+                    headers=headers,
+                )
+                await recorder.request(
+                    client, "POST", "/api/questions/attempt", "/api/questions/attempt",
+                    headers=headers,
+                    json={
+                        "question_id": question_id,
+                        "selected_answer": rng.choice("ABCD"),
+                        "time_spent_seconds": rng.randint(30, 150),
+                        "test_attempt_id": test_attempt_id,
+                    },
+                )
+
+        await recorder.request(client, "GET", "/api/analytics/review-queue", "/api/analytics/review-queue", headers=headers)
+        await recorder.request(
+            client, "GET", "/api/analytics/trends", "/api/analytics/trends?range=90d&bucket=day", headers=headers
+        )
+
+        if module_ids:
+            module_id = rng.choice(module_ids)
+            for _ in range(args.heartbeats):
+                await recorder.request(
+                    client, "POST", "/api/study/modules/{module_id}/heartbeat",
+                    f"/api/study/modules/{module_id}/heartbeat",
+                    headers=headers, json={"seconds": 15, "bookmark_position": {"offset": rng.randint(0, 100)}},
+                )
+
+
+def _client(args):
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    timeout = httpx.Timeout(args.timeout)
+    if args.in_process:
+        from app.core.config import settings
+        from app.main import app
+
+        settings.RATE_LIMIT_ENABLED = args.rate_limits
+
+        return httpx.AsyncClient(
+            transport=httpx.ASGITransport(app=app, raise_app_exceptions=False),
+            base_url="http://loadtest", timeout=timeout
+        )
+    return httpx.AsyncClient(base_url=args.base_url, limits=limits, timeout=timeout)
+
+
+async def run(args):
+    recorder = Recorder()
+    async with contextlib.AsyncExitStack() as stack:
+        client = await stack.enter_async_context(_client(args))
+        if args.in_process:
+            # ASGITransport skips the lifespan, so start warm-up, flushes and section timers ourselves
+            from app.main import app
+
+            await stack.enter_async_context(app.router.lifespan_context(app))
+
+        if args.warmup:
+            print(f"🔥 Warming up for {args.warmup}s...")
+            deadline = time.perf_counter() + args.warmup
+            await asyncio.gather(
+                *(virtual_user(client, recorder, n, args, deadline) for n in range(args.concurrency))
+            )
+
+        study_before = await _study_counters(flush=True) if args.in_process else None
+        print(f"🚀 Running {args.concurrency} virtual users for {args.duration}s...")
+        recorder.recording = True
+        started = time.perf_counter()
+        deadline = started + args.duration
+        await asyncio.gather(
+            *(virtual_user(client, recorder, n, args, deadline) for n in range(args.concurrency))
+        )
+        elapsed = time.perf_counter() - started
+        # Leaving the lifespan flushes what the periodic flush has not written yet
+    results = summarize(recorder, elapsed, args)
+    if args.in_process:
+        results["study_progress"] = _heartbeat_write_amplification(study_before, await _study_counters())
+    return results
+
+
+async def _study_counters(flush=False):
+    """(heartbeats received, progress rows written) so far, optionally after writing pending heartbeats"""
+    from app.core.metrics import registry
+    from app.services.study_progress import flush_heartbeats
+
+    if flush:
+        await flush_heartbeats()
+    return (
+        registry.counters["study_heartbeats_total"].get((), 0),
+        registry.counters["study_progress_rows_written_total"].get((), 0),
+    )
+
+
+def _heartbeat_write_amplification(before, after):
+    """Heartbeats received vs progress rows written by the periodic flushes during the measured run"""
+    from app.core.config import settings
+
+    heartbeats, rows = after[0] - before[0], after[1] - before[1]
+    return {
+        "heartbeats": heartbeats,
+        "rows_written": rows,
+        "heartbeats_per_write": round(heartbeats / rows, 1) if rows else None,
+        "flush_seconds": settings.STUDY_PROGRESS_FLUSH_SECONDS,
+    }
+
+
+def summarize(recorder, elapsed, args):
+    routes = {}
+    for route, values in sorted(recorder.latencies.items()):
+        values.sort()
+        routes[route] = {
+            "requests": len(values),
+            "errors": recorder.errors[route],
+            "error_rate": round(recorder.errors[route] / len(values), 4),
+            "throughput_rps": round(len(values) / elapsed, 2),
+            "p50_ms": _percentile(values, 50),
+            "p95_ms": _percentile(values, 95),
+            "p99_ms": _percentile(values, 99),
+            "max_ms": round(values[-1], 2),
+            "statuses": dict(recorder.statuses[route]),
+        }
+    total_requests = sum(route["requests"] for route in routes.values())
+    total_errors = sum(route["errors"] for route in routes.values())
+    return {
+        "meta": {
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "git_commit": _git_commit(),
+            "target": "in-process" if args.in_process else args.base_url,
+            "concurrency": args.concurrency,
+            "duration_seconds": round(elapsed, 2),
+            "questions_per_quiz": args.questions_per_quiz,
+        },
+        "totals": {
+            "requests": total_requests,
+            "errors": total_errors,
+            "error_rate": round(total_errors / total_requests, 4) if total_requests else 0,
+            "throughput_rps": round(total_requests / elapsed, 2),
+        },
+        "routes": routes,
+    }
+
+
+def _git_commit():
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"], stderr=subprocess.DEVNULL, text=True
+        ).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def print_report(results):
+    print(f"\n📊 {'route':<38} {'reqs':>7} {'err%':>6} {'rps':>8} {'p50':>8} {'p95':>8} {'p99':>8}")
+    for route, stats in results["routes"].items():
+        print(
+            f"   {route:<38} {stats['requests']:>7} {stats['error_rate'] * 100:>6.1f} "
+            f"{stats['throughput_rps']:>8.1f} {stats['p50_ms']:>8.1f} {stats['p95_ms']:>8.1f} "
+            f"{stats['p99_ms']:>8.1f}"
+        )
+    totals = results["totals"]
+    print(
+        f"   {'total':<38} {totals['requests']:>7} {totals['error_rate'] * 100:>6.1f} "
+        f"{totals['throughput_rps']:>8.1f}"
+    )
+    study = results.get("study_progress")
+    if study:
+        print(
+            f"\n📚 {study['heartbeats']:,} study heartbeats → {study['rows_written']:,} progress row writes"
+            f" ({study['heartbeats_per_write'] or 0}x coalesced, flushed every {study['flush_seconds']}s)"
+        )
+
+
+def print_comparison(baseline, results, threshold):
+    """Print per-route latency deltas against an earlier run; returns True on regression"""
+    print(f"\n🔍 Compared with {baseline['meta'].get('git_commit')} ({baseline['meta']['timestamp']})")
+    regressed = False
+    for route, stats in results["routes"].items():
+        before = baseline["routes"].get(route)
+        if before is None:
+            print(f"   {route:<38} (new route)")
+            continue
+        deltas = []
+        for key in ("p50_ms", "p95_ms", "p99_ms"):
+            change = (stats[key] - before[key]) / before[key] * 100 if before[key] else 0
+            flag = " ⚠️" if change > threshold else ""
+            regressed |= change > threshold
+            deltas.append(f"{key[:3]} {before[key]:.1f}→{stats[key]:.1f} ({change:+.0f}%){flag}")
+        print(f"   {route:<38} " + "  ".join(deltas))
+    return regressed
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Load test the MCAT Prep API")
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--in-process", action="store_true", help="Drive app.main:app via ASGI")
+    parser.add_argument("--rate-limits", action="store_true", help="Keep rate limits on for --in-process runs")
+    parser.add_argument("--concurrency", type=int, default=20, help="Concurrent virtual users")
+    parser.add_argument("--duration", type=int, default=60, help="Measured seconds")
+    parser.add_argument("--warmup", type=int, default=5, help="Unmeasured warm-up seconds")
+    parser.add_argument("--questions-per-quiz", type=int, default=10)
+    parser.add_argument("--heartbeats", type=int, default=8, help="Study heartbeats per journey")
+    parser.add_argument("--email-template", default="loadtest+{n}@mcatprep.dev")
+    parser.add_argument("--password", default="loadtest123")
+    parser.add_argument("--user-pool", type=int, default=1000, help="Distinct accounts to log in as")
+    parser.add_argument("--timeout", type=float, default=30.0)
+    parser.add_argument("--retry-delay", type=float, default=1.0,
+                        help="Seconds a user waits after quiz creation fails without Retry-After")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", help="Result file (default: benchmarks/results/<time>-<commit>.json)")
+    parser.add_argument("--compare", help="Earlier result file to diff against")
+    parser.add_argument("--regression-threshold", type=float, default=20.0, help="Percent slowdown flagged as a regression")
+    args = parser.parse_args()
+
+    print("MCAT Prep - API Load Benchmark")
+    print("=" * 50)
+    results = asyncio.run(run(args))
+    print_report(results)
+
+    output = args.output
+    if output is None:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+        output = os.path.join(RESULTS_DIR, f"{stamp}-{results['meta']['git_commit'] or 'nogit'}.json")
+    with open(output, "w") as f:
+        json.dump(results, f, indent=2)
+    print(f"\n💾 Results written to {output}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            if print_comparison(json.load(f), results, args.regression_threshold):
+                sys.exit(1)
@@ -0,0 +1,203 @@
+#!/usr/bin/env python3
+"""
+Partition pruning benchmark for user_question_attempts
+Runs the dashboard and attempt-export queries for a sample of users twice, once
+with enable_partition_pruning on and once off, on the same data, and reports
+execution time, buffers touched and how many partitions each plan visited
+(from EXPLAIN (ANALYZE, BUFFERS)). Only the export's ?since= is time-bounded and
+should touch just its months. The dashboard's queries cover a user's whole history,
+so pruning does nothing for them: they read every partition, through each
+partition's (user_id, attempted_at) index, and are here to show what that costs.
+
+Meant for a production-scale dataset (50M+ attempts):
+    python scripts/generate_dataset.py --truncate --attempts 50000000
+    python benchmarks/partition_pruning.py --users 20 --repeat 3
+"""
+import sys
+import os
+import json
+import argparse
+import statistics
+from datetime import datetime, timedelta, timezone
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import text
+from app.core.database import engine
+
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "results")
+PARTITION_PREFIX = "user_question_attempts_"
+
+# Mirrors the statements issued by /api/analytics/dashboard and /api/users/me/attempts/export
+QUERIES = {
+    "dashboard.total_answered": """
+        SELECT count(id) FROM user_question_attempts WHERE user_id = :user_id
+    """,
+    "dashboard.total_correct": """
+        SELECT count(id) FROM user_question_attempts WHERE user_id = :user_id AND is_correct = true
+    """,
+    "dashboard.concept_mastery": """
+        SELECT c.concept_code, c.title, c.mcat_section, count(a.id),
+               sum(CASE WHEN a.is_correct THEN 1 ELSE 0 END)
+        FROM aamc_foundational_concepts c
+        JOIN questions q ON q.foundational_concept_id = c.id
+        JOIN user_question_attempts a ON a.question_id = q.id
+        WHERE a.user_id = :user_id
+        GROUP BY c.id, c.concept_code, c.title, c.mcat_section
+    """,
+    "export.full_history": """
+        SELECT a.id, a.question_id, q.mcat_section, a.test_attempt_id, a.selected_answer, a.is_correct,
+               a.time_spent_seconds, a.is_flagged, a.attempt_mode, a.confidence_level, a.attempted_at
+        FROM user_question_attempts a JOIN questions q ON q.id = a.question_id
+        WHERE a.user_id = :user_id
+        ORDER BY a.attempted_at
+    """,
+    "export.since_90_days": """
+        SELECT a.id, a.question_id, q.mcat_section, a.test_attempt_id, a.selected_answer, a.is_correct,
+               a.time_spent_seconds, a.is_flagged, a.attempt_mode, a.confidence_level, a.attempted_at
+        FROM user_question_attempts a JOIN questions q ON q.id = a.question_id
+        WHERE a.user_id = :user_id AND a.attempted_at >= :export_since
+        ORDER BY a.attempted_at
+    """,
+}
+
+
+def _walk(node):
+    yield node
+    for child in node.get("Plans", []):
+        yield from _walk(child)
+
+
+def summarize_plan(plan):
+    """Execution time, buffers and partitions visited for one EXPLAIN (FORMAT JSON) result"""
+    root = plan[0]
+    nodes = list(_walk(root["Plan"]))
+    partitions = {
+        node["Relation Name"]
+        for node in nodes
+        if node.get("Relation Name", "").startswith(PARTITION_PREFIX)
+    }
+    return {
+        "ms": root["Execution Time"],
+        "buffers": root["Plan"].get("Shared Hit Blocks", 0) + root["Plan"].get("Shared Read Blocks", 0),
+        "partitions": len(partitions),
+    }
+
+
+def sample_users(connection, count):
+    """Users spread across the activity distribution, from the heaviest down"""
+    rows = connection.execute(
+        text(
+            """
+            SELECT DISTINCT ON (bucket) user_id FROM (
+                SELECT user_id, ntile(:count) OVER (ORDER BY count(*) DESC) AS bucket
+                FROM user_question_attempts TABLESAMPLE SYSTEM (1)
+                GROUP BY user_id
+            ) ranked
+            ORDER BY bucket, user_id
+            """
+        ),
+        {"count": count},
+    ).all()
+    return [user_id for (user_id,) in rows]
+
+
+def table_overview(connection):
+    row = connection.execute(
+        text(
+            """
+            SELECT count(*), sum(c.reltuples)::bigint
+            FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid
+            WHERE i.inhparent = 'user_question_attempts'::regclass
+            """
+        )
+    ).one()
+    return {"partitions": row[0], "estimated_rows": row[1] or 0}
+
+
+def run(user_count, repeat):
+    now = datetime.now(timezone.utc)
+    results = {name: {"on": [], "off": []} for name in QUERIES}
+
+    with engine.connect() as connection:
+        overview = table_overview(connection)
+        if overview["partitions"] == 0:
+            raise SystemExit("❌ user_question_attempts is not partitioned; run alembic upgrade head first")
+        latest = connection.execute(text("SELECT max(attempted_at) FROM user_question_attempts")).scalar() or now
+        users = sample_users(connection, user_count)
+        params_base = {
+            # Relative to the newest attempt so generated (back-dated) datasets still have recent rows
+            "export_since": latest.replace(hour=0, minute=0, second=0, microsecond=0) - timedelta(days=90),
+        }
+
+        for pruning in ("on", "off"):
+            connection.execute(text(f"SET enable_partition_pruning = {pruning}"))
+            for user_id in users:
+                for name, sql in QUERIES.items():
+                    for _ in range(repeat):
+                        plan = connection.execute(
+                            text(f"EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) {sql}"),
+                            {**params_base, "user_id": user_id},
+                        ).scalar()
+                        results[name][pruning].append(summarize_plan(plan))
+        connection.rollback()
+
+    return {
+        "started_at": now.isoformat(),
+        "table": overview,
+        "users": len(users),
+        "repeat": repeat,
+        "queries": {
+            name: {pruning: _aggregate(samples) for pruning, samples in by_mode.items()}
+            for name, by_mode in results.items()
+        },
+    }
+
+
+def _aggregate(samples):
+    times = sorted(sample["ms"] for sample in samples)
+    return {
+        "p50_ms": round(statistics.median(times), 3),
+        "p95_ms": round(times[min(len(times) - 1, int(len(times) * 0.95))], 3),
+        "buffers": round(statistics.mean(sample["buffers"] for sample in samples)),
+        "partitions": round(statistics.mean(sample["partitions"] for sample in samples), 1),
+    }
+
+
+def print_report(report):
+    table = report["table"]
+    print(f"\n📊 {table['estimated_rows']:,} rows (est.) in {table['partitions']} partitions, "
+          f"{report['users']} users × {report['repeat']} runs")
+    if table["estimated_rows"] < 50_000_000:
+        print("⚠️  Fewer than 50M rows: pruning gains will be understated")
+    print(f"\n   {'query':<28} {'pruning':>8} {'p50 ms':>9} {'p95 ms':>9} {'buffers':>10} {'partitions':>11}")
+    for name, modes in report["queries"].items():
+        for pruning in ("on", "off"):
+            stats = modes[pruning]
+            print(
+                f"   {name if pruning == 'on' else '':<28} {pruning:>8} {stats['p50_ms']:>9.2f} "
+                f"{stats['p95_ms']:>9.2f} {stats['buffers']:>10,} {stats['partitions']:>11}"
+            )
+        on, off = modes["on"]["p50_ms"], modes["off"]["p50_ms"]
+        print(f"   {'':<28} {'speedup':>8} {off / on if on else 0:>8.1f}x")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Measure partition pruning on dashboard and export queries")
+    parser.add_argument("--users", type=int, default=20, help="Users to sample across the activity distribution")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per query, user and mode")
+    parser.add_argument("--output", help="Result file (default: benchmarks/results/partition-pruning-<timestamp>.json)")
+    args = parser.parse_args()
+
+    print("MCAT Prep - Partition Pruning Benchmark")
+    print("=" * 50)
+    report = run(args.users, args.repeat)
+    print_report(report)
+
+    os.makedirs(RESULTS_DIR, exist_ok=True)
+    output = args.output or os.path.join(
+        RESULTS_DIR, f"partition-pruning-{datetime.now().strftime('%Y%m%d-%H%M%S')}.json"
+    )
+    with open(output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"\n💾 Results saved to {output}")
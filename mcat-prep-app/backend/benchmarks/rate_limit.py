@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+Rate-limit overhead benchmark
+Times check_rate_limit, the body of the rate-limit dependencies, against the
+configured Redis (one EVALSHA per request) and with the in-process fallback,
+over a pool of distinct clients so buckets are created, refilled and emptied
+as in production. Reports p50/p95/p99 per check and whether p99 stays within
+the --budget-ms overhead budget (exit status 1 if not).
+
+Needs a running Redis (REDIS_URL); the fallback numbers need nothing.
+
+Usage:
+    python benchmarks/rate_limit.py --requests 20000 --clients 2000
+"""
+import sys
+import os
+import argparse
+import random
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi import HTTPException, Response
+from redis.exceptions import RedisError
+from app.core.config import settings
+from app.core.redis_client import redis_client
+from app.api.deps import rate_limit
+
+
+def _percentile(sorted_values, pct):
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * pct / 100))]
+
+
+def measure(requests, clients, seed):
+    """Per-check latencies in microseconds and how many were rejected"""
+    rng = random.Random(seed)
+    latencies, limited = [], 0
+    for _ in range(requests):
+        client = f"user:bench-{rng.randrange(clients)}"
+        started = time.perf_counter()
+        try:
+            rate_limit.check_rate_limit("dashboard", client, Response())
+        except HTTPException:
+            limited += 1
+        latencies.append((time.perf_counter() - started) * 1e6)
+    latencies.sort()
+    return {
+        "p50_us": round(_percentile(latencies, 50), 1),
+        "p95_us": round(_percentile(latencies, 95), 1),
+        "p99_us": round(_percentile(latencies, 99), 1),
+        "limited": limited,
+    }
+
+
+def run_fallback(requests, clients, seed):
+    """Same checks with Redis forced to fail, so every one uses the local buckets"""
+
+    def unavailable(*args, **kwargs):
+        raise RedisError("benchmark: Redis disabled")
+
+    script = rate_limit._TOKEN_BUCKET
+    rate_limit._TOKEN_BUCKET = unavailable
+    try:
+        return measure(requests, clients, seed)
+    finally:
+        rate_limit._TOKEN_BUCKET = script
+        rate_limit._local_buckets.clear()
+
+
+def cleanup():
+    keys = list(redis_client.scan_iter("ratelimit:dashboard:user:bench-*", count=1000))
+    for start in range(0, len(keys), 1000):
+        redis_client.delete(*keys[start:start + 1000])
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Measure the per-request cost of rate limiting")
+    parser.add_argument("--requests", type=int, default=20000)
+    parser.add_argument("--clients", type=int, default=2000, help="Distinct users sending requests")
+    parser.add_argument("--budget-ms", type=float, default=1.0, help="Allowed p99 overhead per request")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    settings.RATE_LIMIT_ENABLED = True
+    print("MCAT Prep - Rate Limit Overhead")
+    print("=" * 50)
+    results = {}
+    try:
+        redis_client.ping()
+        cleanup()
+        results["redis"] = measure(args.requests, args.clients, args.seed)
+        cleanup()
+    except RedisError as e:
+        print(f"⚠️  Redis unavailable ({e}); measuring the fallback only")
+    results["fallback"] = run_fallback(args.requests, args.clients, args.seed)
+
+    over_budget = False
+    for mode, stats in results.items():
+        ok = stats["p99_us"] <= args.budget_ms * 1000
+        over_budget |= not ok
+        print(
+            f"   {mode:<10} p50 {stats['p50_us']:>8.1f} µs   p95 {stats['p95_us']:>8.1f} µs   "
+            f"p99 {stats['p99_us']:>8.1f} µs   {stats['limited']} limited  {'✅' if ok else '❌'}"
+        )
+    if over_budget:
+        print(f"\n❌ p99 overhead above {args.budget_ms} ms")
+        sys.exit(1)
+    print(f"\n✅ p99 overhead within {args.budget_ms} ms")
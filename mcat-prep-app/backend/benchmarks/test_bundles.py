@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""
+Practice test bundle benchmark
+Times three ways of delivering one practice test (by default the largest in
+the database) with all of its questions and passages:
+
+    fanout  one question query per id plus one per passage, as clients did
+            through GET /api/questions/{id}
+    build   get_bundle on an empty cache: one IN query, serialize, gzip, store
+    cached  get_bundle on a warm cache: one Redis GET of the stored bytes
+
+and reports the bundle size raw and gzipped. The bundle's Redis key is deleted
+before and after the run.
+
+Needs Postgres and Redis as configured in .env and at least one practice test
+(scripts/generate_dataset.py creates some).
+
+Usage:
+    python benchmarks/test_bundles.py
+    python benchmarks/test_bundles.py --test-id <uuid> --repeat 20
+"""
+import sys
+import os
+import gzip
+import json
+import time
+import argparse
+import statistics
+from datetime import datetime
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.core.database import SessionLocal
+from app.core.redis_client import redis_binary_client
+from app.models.content import Passage, Question
+from app.models.test import PracticeTest
+from app.schemas.question import PassageResponse, QuestionResponse
+from app.services.content_version import current_version
+from app.services.test_bundles import bundle_key, get_bundle
+
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "results")
+
+
+def fanout(db, practice_test):
+    payloads, passages = [], set()
+    for section in practice_test.sections:
+        for question_id in section.get("question_ids", []):
+            question = db.query(Question).filter(Question.id == question_id).first()
+            if question is None:
+                continue
+            payloads.append(QuestionResponse.model_validate(question).model_dump_json())
+            if question.passage_id is not None and question.passage_id not in passages:
+                passages.add(question.passage_id)
+                passage = db.query(Passage).filter(Passage.id == question.passage_id).first()
+                payloads.append(PassageResponse.model_validate(passage).model_dump_json())
+    return payloads
+
+
+def timed(func, repeat, before=None):
+    timings = []
+    for _ in range(repeat):
+        if before is not None:
+            before()
+        started = time.perf_counter()
+        func()
+        timings.append((time.perf_counter() - started) * 1000)
+    return round(statistics.median(timings), 3)
+
+
+def run(args):
+    db = SessionLocal()
+    try:
+        query = db.query(PracticeTest)
+        if args.test_id:
+            practice_test = query.filter(PracticeTest.id == args.test_id).first()
+        else:
+            practice_test = query.order_by(PracticeTest.total_questions.desc()).first()
+        if practice_test is None:
+            sys.exit("❌ No practice test found")
+        key = bundle_key(practice_test.id, current_version())
+
+        def evict():
+            redis_binary_client.delete(key)
+            db.expire_all()  # build from the database, not the session's identity map
+
+        results = {
+            "test_id": str(practice_test.id),
+            "title": practice_test.title,
+            "questions": practice_test.total_questions,
+            "fanout_ms": timed(lambda: fanout(db, practice_test), args.repeat, before=db.expire_all),
+            "build_ms": timed(lambda: get_bundle(db, practice_test.id), args.repeat, before=evict),
+            "cached_ms": timed(lambda: get_bundle(db, practice_test.id), args.repeat),
+        }
+        blob = get_bundle(db, practice_test.id)
+        results["gzip_bytes"] = len(blob)
+        results["raw_bytes"] = len(gzip.decompress(blob))
+        redis_binary_client.delete(key)
+    finally:
+        db.close()
+    return results
+
+
+def print_report(results):
+    print(f"\n📚 {results['title']} ({results['questions']} questions)")
+    print(f"   {'fanout':<8} {results['fanout_ms']:>10.2f} ms")
+    print(f"   {'build':<8} {results['build_ms']:>10.2f} ms")
+    print(f"   {'cached':<8} {results['cached_ms']:>10.2f} ms")
+    print(
+        f"\n📦 {results['raw_bytes']:,} bytes of JSON, {results['gzip_bytes']:,} gzipped "
+        f"({results['raw_bytes'] / results['gzip_bytes']:.1f}x)"
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare test bundle delivery with per-question fetches")
+    parser.add_argument("--test-id", help="Practice test to bundle (default: the one with most questions)")
+    parser.add_argument("--repeat", type=int, default=10, help="Runs per method (median reported)")
+    parser.add_argument("--output", help="Result file (default: benchmarks/results/test-bundles-<timestamp>.json)")
+    args = parser.parse_args()
+
+    print("MCAT Prep - Test Bundles")
+    print("=" * 50)
+    results = run(args)
+    print_report(results)
+
+    os.makedirs(RESULTS_DIR, exist_ok=True)
+    output = args.output or os.path.join(
+        RESULTS_DIR, f"test-bundles-{datetime.now().strftime('%Y%m%d-%H%M%S')}.json"
+    )
+    with open(output, "w") as f:
+        json.dump(results, f, indent=2)
+    print(f"\n💾 Results saved to {output}")
@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+"""
+Topic hierarchy benchmark: closure table vs recursive CTE
+Builds synthetic topic trees of two shapes, a deep chain and a wide F-ary tree,
+with questions attached to every topic, then times "count the questions under
+this topic" both ways for the root and a mid-level topic:
+
+    cte      WITH RECURSIVE over topics.parent_topic_id on every request
+    closure  one primary-key lookup in topic_closure (what the API does)
+
+It also times the closure rebuild the content importer runs. Everything lives
+in temporary tables named like the real ones (temporary tables shadow them),
+so the production rebuild SQL runs unchanged and nothing real is touched; the
+transaction is rolled back at the end.
+
+Usage:
+    python benchmarks/topic_hierarchy.py
+    python benchmarks/topic_hierarchy.py --depth 500 --fanout 40 --levels 3 --questions-per-topic 10
+"""
+import sys
+import os
+import json
+import time
+import argparse
+import statistics
+from datetime import datetime
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.core.database import engine
+from app.services.topic_closure import rebuild_topic_closure
+
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "results")
+
+QUERIES = {
+    "cte": """
+        WITH RECURSIVE sub (id) AS (
+            SELECT %(topic_id)s
+            UNION ALL
+            SELECT t.id FROM topics t JOIN sub ON t.parent_topic_id = sub.id
+        )
+        SELECT count(*) FROM questions WHERE topic_id IN (SELECT id FROM sub)
+    """,
+    "closure": """
+        SELECT count(*) FROM questions
+        WHERE topic_id IN (SELECT descendant_id FROM topic_closure WHERE ancestor_id = %(topic_id)s)
+    """,
+}
+
+
+def create_tables(cursor):
+    cursor.execute("CREATE TEMP TABLE topics (id integer PRIMARY KEY, parent_topic_id integer) ON COMMIT DROP")
+    cursor.execute("CREATE INDEX ON topics (parent_topic_id)")
+    cursor.execute(
+        "CREATE TEMP TABLE topic_closure (ancestor_id integer, descendant_id integer, depth integer NOT NULL, "
+        "PRIMARY KEY (ancestor_id, descendant_id)) ON COMMIT DROP"
+    )
+    cursor.execute("CREATE TEMP TABLE questions (id bigserial PRIMARY KEY, topic_id integer) ON COMMIT DROP")
+    cursor.execute("CREATE INDEX ON questions (topic_id)")
+
+
+def load_shape(cursor, shape, args):
+    """Fill topics and questions; returns (topic count, [(label, topic id)] to query)"""
+    cursor.execute("TRUNCATE topics, topic_closure, questions")
+    if shape == "deep":
+        count = args.depth
+        # A chain: topic i's parent is i - 1
+        cursor.execute(
+            "INSERT INTO topics SELECT i, NULLIF(i - 1, 0) FROM generate_series(1, %(n)s) i", {"n": count}
+        )
+        probes = [("root", 1), ("middle", count // 2)]
+    else:
+        fanout = args.fanout
+        count = sum(fanout ** level for level in range(args.levels + 1))
+        # A complete F-ary tree in heap order: the children of k are F*(k-1)+2 .. F*k+1
+        cursor.execute(
+            "INSERT INTO topics SELECT i, CASE WHEN i = 1 THEN NULL ELSE (i - 2) / %(f)s + 1 END "
+            "FROM generate_series(1, %(n)s) i",
+            {"f": fanout, "n": count},
+        )
+        probes = [("root", 1), ("level-1", 2)]
+    cursor.execute(
+        "INSERT INTO questions (topic_id) SELECT t.id FROM topics t, generate_series(1, %(q)s)",
+        {"q": args.questions_per_topic},
+    )
+    cursor.execute("ANALYZE topics")
+    cursor.execute("ANALYZE questions")
+    return count, probes
+
+
+def time_query(cursor, sql, topic_id, repeat):
+    timings, result = [], None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        cursor.execute(sql, {"topic_id": topic_id})
+        result = cursor.fetchone()[0]
+        timings.append((time.perf_counter() - started) * 1000)
+    return result, round(statistics.median(timings), 3)
+
+
+def run(args):
+    report = {"args": vars(args), "shapes": {}}
+    connection = engine.raw_connection()
+    try:
+        cursor = connection.cursor()
+        create_tables(cursor)
+        for shape in ("deep", "wide"):
+            topics, probes = load_shape(cursor, shape, args)
+            started = time.perf_counter()
+            pairs = rebuild_topic_closure(cursor)
+            rebuild_ms = round((time.perf_counter() - started) * 1000, 1)
+            cursor.execute("ANALYZE topic_closure")
+            entry = {"topics": topics, "closure_pairs": pairs, "rebuild_ms": rebuild_ms, "probes": {}}
+            for label, topic_id in probes:
+                counts, medians = {}, {}
+                for method, sql in QUERIES.items():
+                    counts[method], medians[method] = time_query(cursor, sql, topic_id, args.repeat)
+                if counts["cte"] != counts["closure"]:
+                    sys.exit(f"❌ {shape}/{label}: cte counted {counts['cte']}, closure {counts['closure']}")
+                entry["probes"][label] = {
+                    "questions": counts["closure"],
+                    **{f"{method}_ms": median for method, median in medians.items()},
+                }
+            report["shapes"][shape] = entry
+    finally:
+        connection.rollback()
+        connection.close()
+    return report
+
+
+def print_report(report):
+    for shape, entry in report["shapes"].items():
+        print(
+            f"\n🌳 {shape}: {entry['topics']:,} topics, {entry['closure_pairs']:,} closure pairs, "
+            f"rebuilt in {entry['rebuild_ms']:.1f} ms"
+        )
+        print(f"   {'probe':<10} {'questions':>10} {'cte ms':>10} {'closure ms':>11} {'speedup':>8}")
+        for label, probe in entry["probes"].items():
+            speedup = probe["cte_ms"] / probe["closure_ms"] if probe["closure_ms"] else 0
+            print(
+                f"   {label:<10} {probe['questions']:>10,} {probe['cte_ms']:>10.2f} "
+                f"{probe['closure_ms']:>11.2f} {speedup:>7.1f}x"
+            )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare topic_closure lookups with recursive CTEs")
+    parser.add_argument("--depth", type=int, default=200, help="Length of the deep chain")
+    parser.add_argument("--fanout", type=int, default=30, help="Children per topic in the wide tree")
+    parser.add_argument("--levels", type=int, default=3, help="Levels below the root in the wide tree")
+    parser.add_argument("--questions-per-topic", type=int, default=20)
+    parser.add_argument("--repeat", type=int, default=7, help="Runs per query (median reported)")
+    parser.add_argument("--output", help="Result file (default: benchmarks/results/topic-hierarchy-<timestamp>.json)")
+    args = parser.parse_args()
+
+    print("MCAT Prep - Topic Hierarchy Benchmark")
+    print("=" * 50)
+    report = run(args)
+    print_report(report)
+
+    os.makedirs(RESULTS_DIR, exist_ok=True)
+    output = args.output or os.path.join(
+        RESULTS_DIR, f"topic-hierarchy-{datetime.now().strftime('%Y%m%d-%H%M%S')}.json"
+    )
+    with open(output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"\n💾 Results saved to {output}")
@@ -0,0 +1,421 @@
+#!/usr/bin/env python3
+"""
+Columnar export of attempt history for the analytics team
+Streams question attempts, completed test attempts and question metadata out of
+Postgres through server-side cursors into Hive-style partitioned Parquet files:
+
+    <out>/user_question_attempts/month=YYYY-MM/section=CPBS/part-<run>.parquet
+    <out>/user_test_attempts/month=YYYY-MM/part-<run>.parquet
+    <out>/questions/section=CPBS/questions.parquet
+
+Attempt tables are exported incrementally: a watermark per table is kept in
+<out>/_watermarks.json and only rows newer than it are appended on the next run.
+Question metadata is small and is rewritten as a full snapshot every run.
+
+Usage:
+    python scripts/export_parquet.py --out /data/exports
+    python scripts/export_parquet.py --out /data/fresh --full   # ignore watermarks
+"""
+import sys
+import os
+import json
+import argparse
+import time
+from datetime import datetime, timedelta, timezone
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # pragma: no cover - optional dependency
+    print("❌ pyarrow is required for Parquet export: poetry install --extras analytics")
+    sys.exit(1)
+
+from sqlalchemy import select, func
+from app.core.database import engine
+from app.models import UserQuestionAttempt, UserTestAttempt, Question
+
+WATERMARK_FILE = "_watermarks.json"
+EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+IN_PROGRESS_PREFIX = ".in-progress-"  # hidden, so Parquet readers skip unfinished files
+
+TIMESTAMP = pa.timestamp("us", tz="UTC")
+
+ATTEMPT_SCHEMA = pa.schema(
+    [
+        ("id", pa.string()),
+        ("user_id", pa.string()),
+        ("question_id", pa.string()),
+        ("test_attempt_id", pa.string()),
+        ("selected_answer", pa.string()),
+        ("is_correct", pa.bool_()),
+        ("time_spent_seconds", pa.int32()),
+        ("is_flagged", pa.bool_()),
+        ("attempt_mode", pa.string()),
+        ("confidence_level", pa.int16()),
+        ("attempted_at", TIMESTAMP),
+        ("topic_id", pa.int32()),
+        ("foundational_concept_id", pa.int32()),
+        ("difficulty_level", pa.int16()),
+    ]
+)
+
+TEST_ATTEMPT_SCHEMA = pa.schema(
+    [
+        ("id", pa.string()),
+        ("user_id", pa.string()),
+        ("practice_test_id", pa.string()),
+        ("started_at", TIMESTAMP),
+        ("completed_at", TIMESTAMP),
+        ("total_score", pa.int16()),
+        ("cpbs_score", pa.int16()),
+        ("cars_score", pa.int16()),
+        ("bbls_score", pa.int16()),
+        ("psbb_score", pa.int16()),
+        ("total_correct", pa.int32()),
+        ("total_questions", pa.int32()),
+        ("accuracy_percentage", pa.int16()),
+        ("total_time_spent_seconds", pa.int32()),
+    ]
+)
+
+QUESTION_SCHEMA = pa.schema(
+    [
+        ("id", pa.string()),
+        ("question_type", pa.string()),
+        ("passage_id", pa.string()),
+        ("topic_id", pa.int32()),
+        ("foundational_concept_id", pa.int32()),
+        ("difficulty_level", pa.int16()),
+        ("tags", pa.list_(pa.string())),
+        ("estimated_time_seconds", pa.int32()),
+        ("times_answered", pa.int32()),
+        ("average_accuracy", pa.int16()),
+        ("created_at", TIMESTAMP),
+        ("updated_at", TIMESTAMP),
+    ]
+)
+
+
+def load_watermarks(out_dir):
+    """Read per-table watermarks, defaulting to the epoch"""
+    path = os.path.join(out_dir, WATERMARK_FILE)
+    if not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        return {table: datetime.fromisoformat(value) for table, value in json.load(f).items()}
+
+
+def save_watermarks(out_dir, watermarks):
+    """Atomically persist watermarks so a crashed run never advances them"""
+    path = os.path.join(out_dir, WATERMARK_FILE)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump({table: value.isoformat() for table, value in watermarks.items()}, f, indent=2)
+    os.replace(tmp_path, path)
+
+
+def _to_str(value):
+    return str(value) if value is not None else None
+
+
+class PartitionedWriter:
+    """Buffers rows per partition and writes them as Parquet row groups
+
+    Files are written under a hidden in-progress name, which Parquet readers
+    skip, and only get their final name from publish(). Leaving the ``with``
+    block on an error deletes them instead, so a failed run leaves nothing
+    behind for the next run to duplicate.
+    """
+
+    def __init__(self, root, schema, run_id, row_group_size, file_name=None):
+        self.root = root
+        self.schema = schema
+        self.run_id = run_id
+        self.row_group_size = row_group_size
+        self.file_name = file_name or f"part-{run_id}.parquet"
+        self.buffers = {}
+        self.writers = {}
+        self.paths = []  # final path of every file written, in creation order
+        self.rows_written = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self.discard()
+
+    def write(self, partition, row):
+        buffer = self.buffers.setdefault(partition, [])
+        buffer.append(row)
+        if len(buffer) >= self.row_group_size:
+            self._flush(partition)
+
+    def close_partitions(self, keep):
+        """Close every open partition not matching ``keep`` (called as months roll over)"""
+        for partition in [p for p in {**self.buffers, **self.writers} if not keep(p)]:
+            self._flush(partition)
+            writer = self.writers.pop(partition, None)
+            if writer is not None:
+                writer.close()
+
+    def close(self):
+        for partition in list(self.buffers):
+            self._flush(partition)
+        for writer in self.writers.values():
+            writer.close()
+        self.writers.clear()
+
+    def publish(self):
+        """Give every closed file its final name"""
+        for path in self.paths:
+            os.replace(_in_progress(path), path)
+
+    def discard(self):
+        """Delete everything written so far"""
+        self.buffers.clear()
+        for writer in self.writers.values():
+            try:
+                writer.close()
+            except Exception:
+                pass
+        self.writers.clear()
+        for path in self.paths:
+            if os.path.exists(_in_progress(path)):
+                os.remove(_in_progress(path))
+
+    def _flush(self, partition):
+        rows = self.buffers.pop(partition, None)
+        if not rows:
+            return
+        writer = self.writers.get(partition)
+        if writer is None:
+            directory = os.path.join(self.root, *(f"{key}={value}" for key, value in partition))
+            os.makedirs(directory, exist_ok=True)
+            path = os.path.join(directory, self.file_name)
+            writer = pq.ParquetWriter(_in_progress(path), self.schema, compression="zstd")
+            self.writers[partition] = writer
+            self.paths.append(path)
+        columns = {name: [row[i] for row in rows] for i, name in enumerate(self.schema.names)}
+        writer.write_table(pa.table(columns, schema=self.schema))
+        self.rows_written += len(rows)
+
+
+def _in_progress(path):
+    directory, name = os.path.split(path)
+    return os.path.join(directory, IN_PROGRESS_PREFIX + name)
+
+
+def remove_in_progress(out_dir):
+    """Delete files left by a run that was killed before it could clean up"""
+    removed = 0
+    for directory, _, files in os.walk(out_dir):
+        for name in files:
+            if name.startswith(IN_PROGRESS_PREFIX):
+                os.remove(os.path.join(directory, name))
+                removed += 1
+    return removed
+
+
+def _stream(stmt, batch_size):
+    """Yield result rows in batches from a server-side (named) cursor"""
+    with engine.connect() as conn:
+        result = conn.execution_options(stream_results=True, yield_per=batch_size).execute(stmt)
+        for partition in result.partitions():
+            yield from partition
+
+
+def export_question_attempts(out_dir, run_id, lower, upper, batch_size):
+    """Write attempts with lower < attempted_at <= upper, partitioned by month and section
+
+    Returns the writer; its files appear once the caller publishes them.
+    """
+    stmt = (
+        select(
+            UserQuestionAttempt.id,
+            UserQuestionAttempt.user_id,
+            UserQuestionAttempt.question_id,
+            UserQuestionAttempt.test_attempt_id,
+            UserQuestionAttempt.selected_answer,
+            UserQuestionAttempt.is_correct,
+            UserQuestionAttempt.time_spent_seconds,
+            UserQuestionAttempt.is_flagged,
+            UserQuestionAttempt.attempt_mode,
+            UserQuestionAttempt.confidence_level,
+            UserQuestionAttempt.attempted_at,
+            Question.topic_id,
+            Question.foundational_concept_id,
+            Question.difficulty_level,
+            Question.mcat_section,
+        )
+        .join(Question, Question.id == UserQuestionAttempt.question_id)
+        .where(UserQuestionAttempt.attempted_at > lower, UserQuestionAttempt.attempted_at <= upper)
+        .order_by(UserQuestionAttempt.attempted_at)
+    )
+
+    current_month = None
+    with PartitionedWriter(
+        os.path.join(out_dir, "user_question_attempts"), ATTEMPT_SCHEMA, run_id, batch_size
+    ) as writer:
+        for row in _stream(stmt, batch_size):
+            month = row.attempted_at.strftime("%Y-%m")
+            if month != current_month:
+                # Rows arrive in time order, so a finished month never receives more rows
+                writer.close_partitions(lambda p, m=month: p[0][1] == m)
+                current_month = month
+            writer.write(
+                (("month", month), ("section", row.mcat_section)),
+                (
+                    _to_str(row.id),
+                    _to_str(row.user_id),
+                    _to_str(row.question_id),
+                    _to_str(row.test_attempt_id),
+                    row.selected_answer,
+                    row.is_correct,
+                    row.time_spent_seconds,
+                    row.is_flagged,
+                    row.attempt_mode,
+                    row.confidence_level,
+                    row.attempted_at,
+                    row.topic_id,
+                    row.foundational_concept_id,
+                    row.difficulty_level,
+                ),
+            )
+    return writer
+
+
+def export_test_attempts(out_dir, run_id, lower, upper, batch_size):
+    """Write completed test attempts with lower < completed_at <= upper, partitioned by month
+
+    Returns the writer; its files appear once the caller publishes them.
+    """
+    stmt = (
+        select(
+            UserTestAttempt.id,
+            UserTestAttempt.user_id,
+            UserTestAttempt.practice_test_id,
+            UserTestAttempt.started_at,
+            UserTestAttempt.completed_at,
+            UserTestAttempt.total_score,
+            UserTestAttempt.cpbs_score,
+            UserTestAttempt.cars_score,
+            UserTestAttempt.bbls_score,
+            UserTestAttempt.psbb_score,
+            UserTestAttempt.total_correct,
+            UserTestAttempt.total_questions,
+            UserTestAttempt.accuracy_percentage,
+            UserTestAttempt.total_time_spent_seconds,
+        )
+        .where(
+            UserTestAttempt.status == "completed",
+            UserTestAttempt.completed_at > lower,
+            UserTestAttempt.completed_at <= upper,
+        )
+        .order_by(UserTestAttempt.completed_at)
+    )
+
+    with PartitionedWriter(
+        os.path.join(out_dir, "user_test_attempts"), TEST_ATTEMPT_SCHEMA, run_id, batch_size
+    ) as writer:
+        for row in _stream(stmt, batch_size):
+            writer.write(
+                (("month", row.completed_at.strftime("%Y-%m")),),
+                (
+                    _to_str(row.id),
+                    _to_str(row.user_id),
+                    _to_str(row.practice_test_id),
+                    *row[3:],
+                ),
+            )
+    return writer
+
+
+def export_questions(out_dir, batch_size):
+    """Rewrite the question metadata snapshot, partitioned by section"""
+    stmt = select(
+        Question.id,
+        Question.question_type,
+        Question.passage_id,
+        Question.topic_id,
+        Question.foundational_concept_id,
+        Question.difficulty_level,
+        Question.tags,
+        Question.estimated_time_seconds,
+        Question.times_answered,
+        Question.average_accuracy,
+        Question.created_at,
+        Question.updated_at,
+        Question.mcat_section,
+    ).order_by(Question.mcat_section)
+
+    root = os.path.join(out_dir, "questions")
+    snapshot_id = f"snapshot-{int(time.time())}"
+    with PartitionedWriter(root, QUESTION_SCHEMA, snapshot_id, batch_size, "questions.parquet") as writer:
+        for row in _stream(stmt, batch_size):
+            writer.write(
+                (("section", row.mcat_section),),
+                (_to_str(row.id), row.question_type, _to_str(row.passage_id), *row[3:12]),
+            )
+
+    # Swap each section's snapshot in place of the previous one
+    writer.publish()
+    for section_dir in os.listdir(root):
+        stale = os.path.join(root, section_dir, "questions.parquet")
+        if stale not in writer.paths and os.path.exists(stale):
+            os.remove(stale)
+    return writer.rows_written
+
+
+def run_export(out_dir, full=False, lag_minutes=5, batch_size=50_000):
+    """Run one incremental export and advance the watermarks"""
+    os.makedirs(out_dir, exist_ok=True)
+    removed = remove_in_progress(out_dir)
+    if removed:
+        print(f"🧹 Removed {removed} unfinished files from an interrupted run")
+    watermarks = {} if full else load_watermarks(out_dir)
+    run_id = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+
+    # Stay a few minutes behind now(): attempted_at is the inserting transaction's
+    # start time, so rows from still-open transactions can appear with older stamps.
+    with engine.connect() as conn:
+        db_now = conn.execute(select(func.now())).scalar()
+    upper = db_now - timedelta(minutes=lag_minutes)
+
+    exports = [
+        ("user_question_attempts", export_question_attempts),
+        ("user_test_attempts", export_test_attempts),
+    ]
+    for table, export in exports:
+        lower = watermarks.get(table, EPOCH)
+        if lower >= upper:
+            print(f"⏭️  {table}: up to date")
+            continue
+        started = time.perf_counter()
+        writer = export(out_dir, run_id, lower, upper, batch_size)
+        # Files become visible right before the watermark moves past their rows
+        writer.publish()
+        watermarks[table] = upper
+        save_watermarks(out_dir, watermarks)
+        elapsed = time.perf_counter() - started
+        print(f"✅ {table}: {writer.rows_written} rows ({lower.isoformat()} → {upper.isoformat()}) in {elapsed:.1f}s")
+
+    rows = export_questions(out_dir, batch_size)
+    print(f"✅ questions: {rows} rows (full snapshot)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Export attempt history to partitioned Parquet")
+    parser.add_argument("--out", required=True, help="Export root directory")
+    parser.add_argument("--full", action="store_true", help="Ignore watermarks and export everything (use a fresh --out)")
+    parser.add_argument("--lag-minutes", type=int, default=5, help="Stay this far behind now()")
+    parser.add_argument("--batch-size", type=int, default=50_000, help="Cursor fetch / row group size")
+    args = parser.parse_args()
+
+    print("MCAT Prep - Parquet Export")
+    print("=" * 50)
+    run_export(args.out, full=args.full, lag_minutes=args.lag_minutes, batch_size=args.batch_size)
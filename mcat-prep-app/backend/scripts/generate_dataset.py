@@ -0,0 +1,557 @@
+#!/usr/bin/env python3
+"""
+Synthetic production-scale dataset generator for performance testing
+Fabricates users, taxonomy, passages, questions, practice tests, test attempts,
+question attempts and review-queue rows with configurable distributions. Work is
+sharded across processes and every shard COPYs straight into Postgres over its
+own connection, so tens of millions of attempts load in minutes.
+
+Everything is derived from --seed: the same arguments always produce the same
+dataset. Entity ids are deterministic (kind prefix + ordinal), which lets shards
+reference users, questions and tests without coordinating.
+
+All generated users share the password "loadtest123" and are named
+loadtest+<n>@mcatprep.dev, which the load benchmark harness logs in with.
+
+Usage:
+    python scripts/generate_dataset.py --truncate                  # defaults: 100k users, 200k questions, 50M attempts
+    python scripts/generate_dataset.py --truncate --users 1000 --questions 5000 --attempts 1000000
+"""
+import sys
+import os
+import io
+import time
+import math
+import bisect
+import random
+import calendar
+import argparse
+from multiprocessing import Pool
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import psycopg2
+from redis.exceptions import RedisError
+from sqlalchemy.engine import make_url
+from app.core.config import settings
+from app.core.security import get_password_hash
+from app.services.content_version import bump_version
+from app.services.topic_closure import rebuild_topic_closure
+
+LOADTEST_PASSWORD = "loadtest123"
+SECTIONS = ["CPBS", "CARS", "BBLS", "PSBB"]
+ANSWERS = "ABCD"
+
+# Id prefixes keep deterministic UUIDs of different kinds from colliding
+USER, PASSAGE, QUESTION, PRACTICE_TEST, TEST_ATTEMPT, ATTEMPT, REVIEW = range(1, 8)
+
+TRUNCATE_TABLES = [
+    "review_queue",
+    "user_question_attempts",
+    "user_test_attempts",
+    "practice_tests",
+    "questions",
+    "passages",
+    "study_modules",
+    "topics",
+    "aamc_foundational_concepts",
+    "users",
+]
+
+
+def _uid(kind, n):
+    """Deterministic UUID for the n-th entity of a kind"""
+    return f"{kind:08x}-0000-4000-8000-{n:012x}"
+
+
+def _ts(epoch_seconds):
+    return time.strftime("%Y-%m-%d %H:%M:%S+00", time.gmtime(epoch_seconds))
+
+
+def _correct_answer(question_n):
+    return ANSWERS[(question_n * 7919) % 4]
+
+
+def _question_difficulty(question_n, cum_weights):
+    """Difficulty 1-5 drawn from cumulative weights by a cheap hash of the ordinal"""
+    point = (question_n * 2654435761 % 2**32) / 2**32 * cum_weights[-1]
+    return bisect.bisect_right(cum_weights, point) + 1
+
+
+def _dsn():
+    return make_url(settings.DATABASE_URL).set(drivername="postgresql").render_as_string(
+        hide_password=False
+    )
+
+
+class CopyBuffer:
+    """Accumulates rows in COPY text format for one table"""
+
+    def __init__(self, table, columns):
+        self.table = table
+        self.columns = columns
+        self.buffer = io.StringIO()
+        self.rows = 0
+
+    def add(self, *values):
+        self.buffer.write("\t".join("\\N" if v is None else str(v) for v in values))
+        self.buffer.write("\n")
+        self.rows += 1
+
+    def copy(self, cursor):
+        if not self.rows:
+            return 0
+        self.buffer.seek(0)
+        cursor.copy_expert(
+            f"COPY {self.table} ({', '.join(self.columns)}) FROM STDIN", self.buffer
+        )
+        copied = self.rows
+        self.buffer = io.StringIO()
+        self.rows = 0
+        return copied
+
+
+def _connect():
+    connection = psycopg2.connect(_dsn())
+    with connection.cursor() as cursor:
+        # Generated data can always be regenerated, so skip waiting on WAL flushes
+        cursor.execute("SET synchronous_commit = off")
+    return connection
+
+
+# ---------------------------------------------------------------------------
+# Shard workers (run in child processes)
+# ---------------------------------------------------------------------------
+
+
+def generate_users(task):
+    start, stop, config = task
+    rng = random.Random(config["seed"] * 1_000_003 + start)
+    users = CopyBuffer(
+        "users",
+        ["id", "email", "password_hash", "full_name", "target_mcat_score", "created_at", "is_active", "subscription_tier"],
+    )
+    now = config["now"]
+    for n in range(start, stop):
+        users.add(
+            _uid(USER, n),
+            f"loadtest+{n}@mcatprep.dev",
+            config["password_hash"],
+            f"Load Test {n}",
+            rng.choice(range(500, 529)),
+            _ts(now - rng.random() * config["days"] * 86400),
+            "true",
+            rng.choices(["free", "premium", "pro"], weights=[80, 15, 5])[0],
+        )
+
+    connection = _connect()
+    try:
+        with connection.cursor() as cursor:
+            copied = users.copy(cursor)
+        connection.commit()
+    finally:
+        connection.close()
+    return "users", copied
+
+
+def generate_content(task):
+    start, stop, config = task
+    rng = random.Random(config["seed"] * 1_000_033 + start)
+    passages = CopyBuffer(
+        "passages", ["id", "mcat_section", "passage_text", "topic_id", "foundational_concept_id"]
+    )
+    questions = CopyBuffer(
+        "questions",
+        [
+            "id", "question_type", "mcat_section", "passage_id", "topic_id", "foundational_concept_id",
+            "difficulty_level", "question_text", "options", "correct_answer", "correct_explanation",
+            "tags", "estimated_time_seconds", "times_answered",
+        ],
+    )
+    topics_per_section = config["topics"] // 4
+    concepts_per_section = config["concepts"] // 4
+    passage_questions = config["passage_questions"]
+    options = '{"A": "Option A", "B": "Option B", "C": "Option C", "D": "Option D"}'
+    filler = " ".join(["Lorem ipsum dolor sit amet consectetur."] * 6)
+
+    questions_per_passage = config["questions_per_passage"]
+
+    for n in range(start, stop):
+        # Questions sharing a passage share its section
+        section_index = (n // questions_per_passage if n < passage_questions else n) % 4
+        topic_id = section_index * topics_per_section + rng.randrange(topics_per_section) + 1
+        concept_id = section_index * concepts_per_section + rng.randrange(concepts_per_section) + 1
+        passage_id = None
+        if n < passage_questions:
+            passage_n = n // questions_per_passage
+            passage_id = _uid(PASSAGE, passage_n)
+            if n % questions_per_passage == 0:
+                passages.add(
+                    passage_id, SECTIONS[section_index],
+                    f"Passage {passage_n}. {filler * 8}", topic_id, concept_id,
+                )
+        questions.add(
+            _uid(QUESTION, n),
+            "passage_based" if passage_id else "standalone",
+            SECTIONS[section_index],
+            passage_id,
+            topic_id,
+            concept_id,
+            _question_difficulty(n, config["difficulty_weights"]),
+            f"Synthetic question {n}? {filler}",
+            options,
+            _correct_answer(n),
+            f"Explanation for question {n}. {filler}",
+            "{synthetic,loadtest}",
+            rng.choice([60, 75, 90, 105, 120]),
+            0,
+        )
+
+    connection = _connect()
+    try:
+        with connection.cursor() as cursor:
+            copied = passages.copy(cursor) + questions.copy(cursor)
+        connection.commit()
+    finally:
+        connection.close()
+    return "content", copied
+
+
+def generate_activity(task):
+    """Generate test attempts, question attempts and review-queue rows for a user range"""
+    users, config = task
+    connection = _connect()
+    test_attempts = CopyBuffer(
+        "user_test_attempts",
+        [
+            "id", "user_id", "practice_test_id", "started_at", "completed_at", "status",
+            "total_score", "cpbs_score", "cars_score", "bbls_score", "psbb_score",
+            "total_correct", "total_questions", "accuracy_percentage", "total_time_spent_seconds",
+        ],
+    )
+    attempts = CopyBuffer(
+        "user_question_attempts",
+        [
+            "id", "user_id", "question_id", "test_attempt_id", "selected_answer", "is_correct",
+            "time_spent_seconds", "is_flagged", "attempt_mode", "attempted_at",
+        ],
+    )
+    reviews = CopyBuffer(
+        "review_queue", ["id", "user_id", "question_id", "added_at", "priority", "last_attempt_id"]
+    )
+
+    num_questions = config["questions"]
+    popularity = config["question_popularity_skew"]
+    now = config["now"]
+    span = config["days"] * 86400
+    copied = 0
+
+    def flush(cursor):
+        # Parents before children: test attempts, then attempts, then review rows
+        return test_attempts.copy(cursor) + attempts.copy(cursor) + reviews.copy(cursor)
+
+    try:
+        with connection.cursor() as cursor:
+            for user_n, attempt_offset, count, test_offset in users:
+                rng = random.Random(config["seed"] * 1_000_081 + user_n)
+                user_id = _uid(USER, user_n)
+                ability = rng.betavariate(config["ability_alpha"], config["ability_beta"])
+                review_seen = set()
+                clock = now - span * rng.random()
+                attempt_n = attempt_offset
+                test_n = test_offset
+                remaining = count
+
+                while remaining > 0:
+                    if clock >= now:
+                        # Heavy users outrun the window: wrap their later sessions back into it
+                        # rather than clamping them all onto "now"
+                        clock = now - span + (clock - now) % span
+                    is_test = rng.random() < config["test_session_rate"]
+                    session = min(remaining, rng.randint(30, 60) if is_test else rng.randint(5, 25))
+                    test_attempt_id = _uid(TEST_ATTEMPT, test_n) if is_test else None
+                    session_start = clock
+                    correct = 0
+                    seconds_total = 0
+
+                    for _ in range(session):
+                        # Skewed popularity: low ordinals are answered far more often
+                        question_n = int(num_questions * rng.random() ** popularity)
+                        difficulty = _question_difficulty(question_n, config["difficulty_weights"])
+                        p_correct = max(0.05, min(0.98, ability + 0.3 - difficulty * 0.1))
+                        is_correct = rng.random() < p_correct
+                        answer = _correct_answer(question_n)
+                        selected = answer if is_correct else rng.choice(ANSWERS.replace(answer, ""))
+                        seconds = max(5, int(rng.lognormvariate(4.3, 0.45)))
+                        clock += seconds
+                        attempt_id = _uid(ATTEMPT, attempt_n)
+                        attempts.add(
+                            attempt_id, user_id, _uid(QUESTION, question_n), test_attempt_id,
+                            selected, "true" if is_correct else "false", seconds,
+                            "true" if rng.random() < 0.05 else "false",
+                            "timed" if is_test else rng.choice(["timed", "untimed", "review"]),
+                            _ts(min(clock, now)),
+                        )
+                        if not is_correct and question_n not in review_seen and len(review_seen) < config["max_review_per_user"]:
+                            review_seen.add(question_n)
+                            reviews.add(
+                                _uid(REVIEW, attempt_n), user_id, _uid(QUESTION, question_n),
+                                _ts(min(clock, now)), rng.randint(3, 10), attempt_id,
+                            )
+                        correct += is_correct
+                        seconds_total += seconds
+                        attempt_n += 1
+
+                    if is_test:
+                        accuracy = correct / session
+                        section_scores = [
+                            max(118, min(132, round(118 + 14 * accuracy + rng.uniform(-1.5, 1.5))))
+                            for _ in SECTIONS
+                        ]
+                        test_attempts.add(
+                            test_attempt_id, user_id,
+                            _uid(PRACTICE_TEST, rng.randrange(config["practice_tests"])),
+                            _ts(min(session_start, now)), _ts(min(clock, now)), "completed",
+                            sum(section_scores), *section_scores,
+                            correct, session, round(accuracy * 100), seconds_total,
+                        )
+                        test_n += 1
+
+                    remaining -= session
+                    # Gap until the next study session: hours to days
+                    clock += rng.expovariate(1 / (config["days"] * 86400 / max(count / 20, 1)))
+
+                if attempts.rows >= config["chunk_rows"]:
+                    copied += flush(cursor)
+                    connection.commit()
+
+            copied += flush(cursor)
+        connection.commit()
+    finally:
+        connection.close()
+    return "activity", copied
+
+
+# ---------------------------------------------------------------------------
+# Orchestration (parent process)
+# ---------------------------------------------------------------------------
+
+
+def load_fixed_rows(config):
+    """Taxonomy and practice tests are small, so the parent process loads them directly"""
+    connection = _connect()
+    try:
+        with connection.cursor() as cursor:
+            concepts = CopyBuffer(
+                "aamc_foundational_concepts", ["id", "concept_code", "mcat_section", "title"]
+            )
+            per_section = config["concepts"] // 4
+            for n in range(config["concepts"]):
+                concepts.add(n + 1, f"S{n}", SECTIONS[n // per_section % 4], f"Synthetic concept {n}")
+            concepts.copy(cursor)
+
+            topics = CopyBuffer(
+                "topics", ["id", "name", "mcat_section", "foundational_concept_id", "difficulty_level", "parent_topic_id"]
+            )
+            per_section = config["topics"] // 4
+            concepts_per_section = config["concepts"] // 4
+            for n in range(config["topics"]):
+                section = n // per_section % 4
+                # Every tenth topic in a section is a parent of the nine that follow it
+                parent = None if n % 10 == 0 else n - n % 10 + 1
+                topics.add(
+                    n + 1, f"Synthetic topic {n}", SECTIONS[section],
+                    section * concepts_per_section + n % concepts_per_section + 1,
+                    n % 5 + 1, parent,
+                )
+            topics.copy(cursor)
+            rebuild_topic_closure(cursor)
+
+            tests = CopyBuffer(
+                "practice_tests",
+                ["id", "test_type", "title", "is_official_aamc", "sections", "total_questions", "total_duration_minutes", "is_active"],
+            )
+            for n in range(config["practice_tests"]):
+                tests.add(
+                    _uid(PRACTICE_TEST, n), "full_length", f"Synthetic Full Length {n}", "false",
+                    '[{"section": "mixed", "duration_minutes": 95, "question_ids": []}]',
+                    59, 95, "true",
+                )
+            tests.copy(cursor)
+
+            for table in ("aamc_foundational_concepts", "topics"):
+                cursor.execute(
+                    f"SELECT setval(pg_get_serial_sequence('{table}', 'id'), (SELECT MAX(id) FROM {table}))"
+                )
+        connection.commit()
+    finally:
+        connection.close()
+
+
+def plan_activity(config):
+    """Split the attempt total across users with a heavy-tailed (Pareto) activity distribution"""
+    rng = random.Random(config["seed"])
+    weights = [rng.paretovariate(config["activity_alpha"]) for _ in range(config["users"])]
+    scale = config["attempts"] / sum(weights)
+    counts = [int(w * scale) for w in weights]
+    for n in rng.sample(range(config["users"]), config["attempts"] - sum(counts)):
+        counts[n] += 1
+
+    # Each user gets a disjoint block of attempt and test-attempt ordinals
+    plan, attempt_offset, test_offset = [], 0, 0
+    for user_n, count in enumerate(counts):
+        plan.append((user_n, attempt_offset, count, test_offset))
+        attempt_offset += count
+        test_offset += count // 30 + 1
+    return plan
+
+
+def _ranges(total, shards, multiple=1):
+    """Split range(total) into up to ``shards`` ranges whose starts are multiples of ``multiple``"""
+    size = math.ceil(total / shards / multiple) * multiple if total else 0
+    return [(start, min(start + size, total)) for start in range(0, total, size)] if size else []
+
+
+def _shard_plan(plan, target_rows):
+    shards, current, rows = [], [], 0
+    for entry in plan:
+        current.append(entry)
+        rows += entry[2]
+        if rows >= target_rows:
+            shards.append(current)
+            current, rows = [], 0
+    if current:
+        shards.append(current)
+    return shards
+
+
+def truncate(config):
+    connection = _connect()
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute(f"TRUNCATE {', '.join(TRUNCATE_TABLES)} RESTART IDENTITY CASCADE")
+        connection.commit()
+    finally:
+        connection.close()
+
+
+def create_attempt_partitions(config):
+    """Make sure a monthly partition exists for the whole generated history"""
+    first_day = time.gmtime(config["now"] - config["days"] * 86400)
+    connection = _connect()
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT create_user_question_attempt_partitions(3, %s)",
+                (f"{first_day.tm_year}-{first_day.tm_mon:02d}-01",),
+            )
+        connection.commit()
+    finally:
+        connection.close()
+
+
+def analyze():
+    connection = _connect()
+    connection.autocommit = True
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute("ANALYZE")
+    finally:
+        connection.close()
+
+
+def run_phase(pool, label, func, tasks):
+    started = time.perf_counter()
+    total = 0
+    for done, (_, rows) in enumerate(pool.imap_unordered(func, tasks), start=1):
+        total += rows
+        rate = total / (time.perf_counter() - started)
+        print(f"\r   {label}: {done}/{len(tasks)} shards, {total:,} rows ({rate:,.0f} rows/s)", end="", flush=True)
+    print()
+    return total
+
+
+def generate(config):
+    started = time.perf_counter()
+    if config["truncate"]:
+        print("🧹 Truncating existing data...")
+        truncate(config)
+
+    print("📚 Loading taxonomy and practice tests...")
+    load_fixed_rows(config)
+
+    shards = config["workers"] * 4
+    with Pool(config["workers"]) as pool:
+        print("👤 Users...")
+        run_phase(pool, "users", generate_users, [(a, b, config) for a, b in _ranges(config["users"], shards)])
+
+        print("❓ Passages and questions...")
+        # A passage is written by the shard holding its first question, so keep its questions together
+        content_ranges = _ranges(config["questions"], shards, config["questions_per_passage"])
+        run_phase(pool, "content", generate_content, [(a, b, config) for a, b in content_ranges])
+
+        print("📝 Test attempts, question attempts and review queue...")
+        create_attempt_partitions(config)
+        plan = plan_activity(config)
+        activity_shards = _shard_plan(plan, max(config["attempts"] // (shards * 4), config["chunk_rows"]))
+        run_phase(pool, "activity", generate_activity, [(shard, config) for shard in activity_shards])
+
+    print("📈 Analyzing tables...")
+    analyze()
+    # Workers rebuild their in-memory content (taxonomy, quiz candidates) when the version moves
+    try:
+        print(f"🔖 Content version is now {bump_version()}")
+    except RedisError as e:
+        print(f"⚠️  Could not bump the content version ({e}); workers keep cached content until restarted")
+    print(f"\n🎉 Dataset generated in {time.perf_counter() - started:,.1f}s")
+    print(f"   Log in as loadtest+0@mcatprep.dev / {LOADTEST_PASSWORD}")
+    print("   Run scripts/rebuild_aggregates.py to populate the analytics rollups")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate a synthetic production-scale dataset")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--users", type=int, default=100_000)
+    parser.add_argument("--questions", type=int, default=200_000)
+    parser.add_argument("--attempts", type=int, default=50_000_000)
+    parser.add_argument("--concepts", type=int, default=40)
+    parser.add_argument("--topics", type=int, default=400)
+    parser.add_argument("--practice-tests", type=int, default=50)
+    parser.add_argument("--passage-fraction", type=float, default=0.6, help="Share of questions that are passage-based")
+    parser.add_argument("--questions-per-passage", type=int, default=5)
+    parser.add_argument("--days", type=int, default=365, help="History span to spread activity over")
+    parser.add_argument("--activity-alpha", type=float, default=1.3, help="Pareto shape of per-user activity (lower = heavier tail)")
+    parser.add_argument("--ability-alpha", type=float, default=5.0, help="Beta distribution alpha for user ability")
+    parser.add_argument("--ability-beta", type=float, default=4.0, help="Beta distribution beta for user ability")
+    parser.add_argument("--question-popularity-skew", type=float, default=1.5, help=">1 concentrates attempts on popular questions")
+    parser.add_argument("--difficulty-weights", default="10,25,35,20,10", help="Relative weights of difficulty 1..5")
+    parser.add_argument("--test-session-rate", type=float, default=0.15, help="Share of study sessions that are test attempts")
+    parser.add_argument("--max-review-per-user", type=int, default=300)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 4)
+    parser.add_argument("--chunk-rows", type=int, default=200_000, help="Attempt rows per COPY round trip")
+    parser.add_argument("--truncate", action="store_true", help="Empty all content and activity tables first")
+    args = parser.parse_args()
+
+    if settings.ENVIRONMENT == "production":
+        print("❌ Refusing to generate synthetic data in production")
+        sys.exit(1)
+
+    print("MCAT Prep - Synthetic Dataset Generator")
+    print("=" * 50)
+    config = {
+        key: getattr(args, key)
+        for key in (
+            "seed", "users", "questions", "attempts", "concepts", "topics", "practice_tests",
+            "questions_per_passage", "days", "activity_alpha", "ability_alpha", "ability_beta",
+            "question_popularity_skew", "test_session_rate", "max_review_per_user", "workers",
+            "chunk_rows", "truncate",
+        )
+    }
+    weights = [float(w) for w in args.difficulty_weights.split(",")]
+    config["difficulty_weights"] = [sum(weights[: i + 1]) for i in range(len(weights))]
+    config["passage_questions"] = int(args.questions * args.passage_fraction)
+    # Pin "now" so the same seed produces the same timestamps on every run
+    config["now"] = calendar.timegm((2026, 1, 1, 0, 0, 0))
+    # One bcrypt hash shared by every user keeps generation CPU-bound on data, not hashing
+    config["password_hash"] = get_password_hash(LOADTEST_PASSWORD)
+    generate(config)
@@ -0,0 +1,398 @@
+#!/usr/bin/env python3
+"""
+High-throughput content importer for licensed question banks
+Streams a bundle directory of JSONL or CSV files, validates every row against the
+constraints enforced by the content models, COPYs the rows into temporary staging
+tables and then upserts each table with set-based statements. After a
+successful import the content version in Redis is bumped so running workers
+reload their taxonomy snapshots. Importing topics also rebuilds topic_closure
+in the same transaction.
+
+Bundle layout (any subset, .jsonl or .csv):
+    concepts.jsonl   topics.jsonl   passages.jsonl   questions.jsonl
+
+In CSV files, JSON-typed columns (options, tags, incorrect_explanations, ...) hold
+JSON-encoded strings. Concepts and topics must carry explicit integer ids so that
+other rows can reference them; passage and question ids are generated when missing.
+
+Usage:
+    python scripts/import_content.py /data/bank-2026
+    python scripts/import_content.py /data/bank-2026 --dry-run
+    python scripts/import_content.py /data/bank-2026 --benchmark-json bench.json
+"""
+import sys
+import os
+import io
+import csv
+import json
+import time
+import uuid
+import argparse
+from typing import Optional, Literal, Dict, List
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from pydantic import BaseModel, Field, ValidationError, field_validator, model_validator
+from redis.exceptions import RedisError
+from app.core.database import engine
+from app.services.content_version import bump_version
+from app.services.topic_closure import rebuild_topic_closure
+
+MCATSection = Literal["CPBS", "CARS", "BBLS", "PSBB"]
+
+
+class ConceptRow(BaseModel):
+    id: int
+    concept_code: str = Field(min_length=1, max_length=10)
+    mcat_section: MCATSection
+    title: str = Field(min_length=1, max_length=255)
+    description: Optional[str] = None
+    parent_concept_id: Optional[int] = None
+
+
+class TopicRow(BaseModel):
+    id: int
+    name: str = Field(min_length=1, max_length=255)
+    mcat_section: MCATSection
+    foundational_concept_id: Optional[int] = None
+    description: Optional[str] = None
+    difficulty_level: Optional[int] = Field(default=None, ge=1, le=5)
+    parent_topic_id: Optional[int] = None
+
+
+class PassageRow(BaseModel):
+    id: uuid.UUID = Field(default_factory=uuid.uuid4)
+    mcat_section: MCATSection
+    passage_text: str = Field(min_length=1)
+    passage_images: Optional[List[str]] = None
+    topic_id: Optional[int] = None
+    foundational_concept_id: Optional[int] = None
+
+
+class QuestionRow(BaseModel):
+    id: uuid.UUID = Field(default_factory=uuid.uuid4)
+    question_type: Literal["passage_based", "standalone"]
+    mcat_section: MCATSection
+    passage_id: Optional[uuid.UUID] = None
+    topic_id: Optional[int] = None
+    foundational_concept_id: Optional[int] = None
+    difficulty_level: Optional[int] = Field(default=None, ge=1, le=5)
+    question_text: str = Field(min_length=1)
+    question_images: Optional[List[str]] = None
+    options: Dict[str, str]
+    correct_answer: Literal["A", "B", "C", "D"]
+    correct_explanation: str = Field(min_length=1)
+    incorrect_explanations: Optional[Dict[str, str]] = None
+    tags: Optional[List[str]] = None
+    estimated_time_seconds: int = Field(default=90, gt=0)
+
+    @field_validator("options")
+    @classmethod
+    def options_are_a_to_d(cls, options):
+        if sorted(options) != ["A", "B", "C", "D"]:
+            raise ValueError("options must have exactly the keys A, B, C and D")
+        return options
+
+    @model_validator(mode="after")
+    def passage_questions_have_passage(self):
+        if self.question_type == "passage_based" and self.passage_id is None:
+            raise ValueError("passage_based questions require passage_id")
+        return self
+
+
+# Import order follows foreign keys; serial tables get their sequence bumped afterwards
+ENTITIES = [
+    ("concepts", "aamc_foundational_concepts", ConceptRow, True),
+    ("topics", "topics", TopicRow, True),
+    ("passages", "passages", PassageRow, False),
+    ("questions", "questions", QuestionRow, False),
+]
+
+JSON_COLUMNS = {"passage_images", "question_images", "options", "incorrect_explanations"}
+ARRAY_COLUMNS = {"tags"}
+UPDATE_TIMESTAMP_TABLES = {"questions"}
+# Tables numbered from a sequence default (questions.ordinal backs the seen-question bitmaps)
+ORDINAL_TABLES = {"questions"}
+
+
+def _find_source(bundle_dir, name):
+    for extension in ("jsonl", "csv"):
+        path = os.path.join(bundle_dir, f"{name}.{extension}")
+        if os.path.exists(path):
+            return path, extension
+    return None, None
+
+
+def _read_rows(path, extension):
+    """Yield (line_number, raw dict) from a JSONL or CSV file without loading it whole"""
+    with open(path, newline="", encoding="utf-8") as f:
+        if extension == "jsonl":
+            for line_number, line in enumerate(f, start=1):
+                if line.strip():
+                    yield line_number, json.loads(line)
+        else:
+            for line_number, record in enumerate(csv.DictReader(f), start=2):
+                yield line_number, {
+                    key: json.loads(value)
+                    if key in JSON_COLUMNS | ARRAY_COLUMNS and value
+                    else (value if value != "" else None)
+                    for key, value in record.items()
+                }
+
+
+def _pg_array(values):
+    """Render a text[] literal for COPY"""
+    escaped = (value.replace("\\", "\\\\").replace('"', '\\"') for value in values)
+    return "{" + ",".join(f'"{value}"' for value in escaped) + "}"
+
+
+def _copy_value(column, value):
+    if value is None:
+        return None
+    if column in JSON_COLUMNS:
+        return json.dumps(value)
+    if column in ARRAY_COLUMNS:
+        return _pg_array(value)
+    return value
+
+
+class Progress:
+    """Prints a single updating progress line with the running rows/sec rate"""
+
+    def __init__(self, label, every=10_000):
+        self.label = label
+        self.every = every
+        self.started = time.perf_counter()
+        self.rows = 0
+        self.rejected = 0
+
+    def tick(self, rows=1):
+        self.rows += rows
+        if self.rows % self.every == 0:
+            self._print()
+
+    def finish(self):
+        self._print()
+        print()
+
+    @property
+    def elapsed(self):
+        return time.perf_counter() - self.started
+
+    def _print(self):
+        rate = self.rows / self.elapsed if self.elapsed else 0
+        print(
+            f"\r   {self.label}: {self.rows:,} rows, {self.rejected:,} rejected ({rate:,.0f} rows/s)",
+            end="",
+            flush=True,
+        )
+
+
+def stage_entity(cursor, path, extension, table, schema, chunk_size, strict, dry_run):
+    """Validate and COPY one source file into a temporary staging table"""
+    columns = list(schema.model_fields)
+    stage = f"stage_{table}"
+    if not dry_run:
+        cursor.execute(
+            f"CREATE TEMP TABLE {stage} (LIKE {table} INCLUDING DEFAULTS) ON COMMIT DROP"
+        )
+        cursor.execute(f"ALTER TABLE {stage} ADD COLUMN _line bigint")
+        if table in ORDINAL_TABLES:
+            # Staged rows are never numbered; the copied nextval default would burn an ordinal per row
+            cursor.execute(f"ALTER TABLE {stage} ALTER COLUMN ordinal DROP DEFAULT")
+    copy_sql = (
+        f"COPY {stage} ({', '.join(columns)}, _line) FROM STDIN WITH (FORMAT csv)"
+    )
+
+    progress = Progress(table)
+    errors = []
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    pending = 0
+
+    def flush():
+        nonlocal pending
+        if pending and not dry_run:
+            buffer.seek(0)
+            cursor.copy_expert(copy_sql, buffer)
+        buffer.seek(0)
+        buffer.truncate()
+        pending = 0
+
+    for line_number, raw in _read_rows(path, extension):
+        try:
+            row = schema.model_validate(raw)
+        except ValidationError as e:
+            if strict:
+                raise ValueError(f"{path}:{line_number}: {e}") from e
+            progress.rejected += 1
+            if len(errors) < 20:
+                errors.append(f"{os.path.basename(path)}:{line_number}: {e.errors()[0]['msg']}")
+            continue
+
+        values = row.model_dump()
+        writer.writerow([_copy_value(column, values[column]) for column in columns] + [line_number])
+        pending += 1
+        progress.tick()
+        if pending >= chunk_size:
+            flush()
+
+    flush()
+    progress.finish()
+    for error in errors:
+        print(f"   ⚠️  {error}")
+    return columns, progress
+
+
+def upsert_entity(cursor, table, columns, serial):
+    """Merge a staging table into its target (last duplicate wins)"""
+    column_list = ", ".join(columns)
+    latest = f"SELECT DISTINCT ON (id) {column_list} FROM stage_{table}"
+    updates = [f"{column} = EXCLUDED.{column}" for column in columns if column != "id"]
+    if table in UPDATE_TIMESTAMP_TABLES:
+        updates.append("updated_at = now()")
+    if table in ORDINAL_TABLES:
+        # Column defaults are evaluated before ON CONFLICT, so an upsert would take an ordinal
+        # for every existing row it updates; update those first and insert only new ids
+        assignments = [update.replace("EXCLUDED.", "staged.") for update in updates]
+        cursor.execute(
+            f"""
+            UPDATE {table} SET {", ".join(assignments)}
+            FROM ({latest} ORDER BY id, _line DESC) staged
+            WHERE {table}.id = staged.id
+            """
+        )
+        upserted = cursor.rowcount
+        cursor.execute(
+            f"""
+            INSERT INTO {table} ({column_list})
+            {latest} staged
+            WHERE NOT EXISTS (SELECT 1 FROM {table} existing WHERE existing.id = staged.id)
+            ORDER BY id, _line DESC
+            """
+        )
+        return upserted + cursor.rowcount
+
+    cursor.execute(
+        f"""
+        INSERT INTO {table} ({column_list})
+        {latest} ORDER BY id, _line DESC
+        ON CONFLICT (id) DO UPDATE SET {", ".join(updates)}
+        """
+    )
+    upserted = cursor.rowcount
+    if serial:
+        cursor.execute(
+            f"SELECT setval(pg_get_serial_sequence('{table}', 'id'), "
+            f"GREATEST((SELECT MAX(id) FROM {table}), 1))"
+        )
+    return upserted
+
+
+def import_bundle(bundle_dir, chunk_size=10_000, strict=False, dry_run=False):
+    """Import every entity file found in ``bundle_dir`` in one transaction"""
+    benchmark = {"bundle": os.path.abspath(bundle_dir), "dry_run": dry_run, "entities": {}}
+    started = time.perf_counter()
+
+    # A dry run only validates, so it never needs a database connection
+    connection = None if dry_run else engine.raw_connection()
+    try:
+        cursor = connection.cursor() if connection else None
+        for name, table, schema, serial in ENTITIES:
+            path, extension = _find_source(bundle_dir, name)
+            if path is None:
+                continue
+
+            columns, progress = stage_entity(
+                cursor, path, extension, table, schema, chunk_size, strict, dry_run
+            )
+            stage_seconds = progress.elapsed
+
+            upsert_started = time.perf_counter()
+            upserted = 0 if dry_run else upsert_entity(cursor, table, columns, serial)
+            upsert_seconds = time.perf_counter() - upsert_started
+
+            total_seconds = stage_seconds + upsert_seconds
+            benchmark["entities"][table] = {
+                "rows": progress.rows,
+                "rejected": progress.rejected,
+                "upserted": upserted,
+                "stage_seconds": round(stage_seconds, 3),
+                "upsert_seconds": round(upsert_seconds, 3),
+                "rows_per_second": round(progress.rows / total_seconds) if total_seconds else 0,
+            }
+
+        # Descendant-aware topic filters read the closure; keep it in step with the hierarchy
+        if cursor and "topics" in benchmark["entities"]:
+            closure_started = time.perf_counter()
+            benchmark["topic_closure"] = {
+                "pairs": rebuild_topic_closure(cursor),
+                "seconds": round(time.perf_counter() - closure_started, 3),
+            }
+
+        if connection:
+            connection.commit()
+    except Exception:
+        if connection:
+            connection.rollback()
+        raise
+    finally:
+        if connection:
+            connection.close()
+
+    total_rows = sum(entity["rows"] for entity in benchmark["entities"].values())
+    total_seconds = time.perf_counter() - started
+    benchmark["total_rows"] = total_rows
+    benchmark["total_seconds"] = round(total_seconds, 3)
+    benchmark["rows_per_second"] = round(total_rows / total_seconds) if total_seconds else 0
+    return benchmark
+
+
+def print_benchmark(benchmark):
+    print(f"\n📊 {'table':<28} {'rows':>10} {'rejected':>9} {'stage s':>9} {'upsert s':>9} {'rows/s':>10}")
+    for table, entity in benchmark["entities"].items():
+        print(
+            f"   {table:<28} {entity['rows']:>10,} {entity['rejected']:>9,} "
+            f"{entity['stage_seconds']:>9.2f} {entity['upsert_seconds']:>9.2f} "
+            f"{entity['rows_per_second']:>10,}"
+        )
+    print(
+        f"   {'total':<28} {benchmark['total_rows']:>10,} {'':>9} {'':>9} "
+        f"{benchmark['total_seconds']:>9.2f} {benchmark['rows_per_second']:>10,}"
+    )
+    if "topic_closure" in benchmark:
+        closure = benchmark["topic_closure"]
+        print(f"\n🌳 topic_closure rebuilt: {closure['pairs']:,} pairs in {closure['seconds']:.2f}s")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Bulk import a content bundle via COPY")
+    parser.add_argument("bundle", help="Directory containing concepts/topics/passages/questions files")
+    parser.add_argument("--chunk-size", type=int, default=10_000, help="Rows per COPY round trip")
+    parser.add_argument("--strict", action="store_true", help="Abort on the first invalid row")
+    parser.add_argument("--dry-run", action="store_true", help="Validate only, write nothing")
+    parser.add_argument("--benchmark-json", help="Write timing results to this JSON file")
+    args = parser.parse_args()
+
+    print("MCAT Prep - Bulk Content Import")
+    print("=" * 50)
+    try:
+        results = import_bundle(
+            args.bundle, chunk_size=args.chunk_size, strict=args.strict, dry_run=args.dry_run
+        )
+    except Exception as e:
+        print(f"\n❌ Import failed, nothing was written: {e}")
+        sys.exit(1)
+
+    print_benchmark(results)
+    if not args.dry_run:
+        # Workers rebuild their in-memory content (taxonomy snapshot) when the version moves
+        try:
+            print(f"\n🔖 Content version is now {bump_version()}")
+        except RedisError as e:
+            print(f"\n⚠️  Could not bump the content version ({e}); workers keep their taxonomy until restarted")
+    if args.benchmark_json:
+        with open(args.benchmark_json, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"\n💾 Benchmark written to {args.benchmark_json}")
+    print("\n🎉 Import complete!" if not args.dry_run else "\n✅ Dry run complete, nothing written")
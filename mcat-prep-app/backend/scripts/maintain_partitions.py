@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""
+Partition maintenance for user_question_attempts
+Creates monthly partitions ahead of time and detaches partitions older than the
+retention window. Detached partitions stay intact as ordinary tables (optionally
+moved to an archive schema) so they can be exported, dumped or dropped later.
+
+Run daily from cron:
+    python scripts/maintain_partitions.py                          # create 3 months ahead
+    python scripts/maintain_partitions.py --detach-older-than 24   # also detach >24 month old partitions
+    python scripts/maintain_partitions.py --list
+"""
+import sys
+import os
+import time
+import argparse
+from datetime import date
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+from app.core.database import engine
+
+PARENT = "user_question_attempts"
+DEFAULT_PARTITION = f"{PARENT}_default"
+
+
+def list_partitions(connection):
+    """(name, estimated rows, total bytes) for every attached partition"""
+    return connection.execute(
+        text(
+            """
+            SELECT c.relname, c.reltuples::bigint, pg_total_relation_size(c.oid)
+            FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid
+            WHERE i.inhparent = CAST(:parent AS regclass)
+            ORDER BY c.relname
+            """
+        ),
+        {"parent": PARENT},
+    ).all()
+
+
+def partition_month(name):
+    """Month a partition covers, from its user_question_attempts_YYYY_MM name"""
+    suffix = name[len(PARENT) + 1:]
+    try:
+        year, month = suffix.split("_")
+        return date(int(year), int(month), 1)
+    except ValueError:
+        return None
+
+
+def months_before(today, months):
+    index = today.year * 12 + today.month - 1 - months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def create_ahead(connection, months_ahead):
+    created = connection.execute(
+        text("SELECT create_user_question_attempt_partitions(:months)"), {"months": months_ahead}
+    ).scalar()
+    print(f"✅ Partitions through {months_ahead} months ahead exist ({created} created)")
+
+
+def detach(connection, name, concurrently, archive_schema, retries=5):
+    """Detach one partition, backing off instead of queueing behind long-running queries"""
+    statement = f"ALTER TABLE {PARENT} DETACH PARTITION {name}{' CONCURRENTLY' if concurrently else ''}"
+    for attempt in range(1, retries + 1):
+        try:
+            connection.execute(text("SET lock_timeout = '5s'"))
+            connection.execute(text(statement))
+            break
+        except OperationalError as e:
+            if attempt == retries:
+                raise
+            print(f"   ⏳ {name}: lock not acquired ({e.orig}), retrying...")
+            time.sleep(2 ** attempt)
+
+    if archive_schema:
+        connection.execute(text(f"CREATE SCHEMA IF NOT EXISTS {archive_schema}"))
+        connection.execute(text(f"ALTER TABLE {name} SET SCHEMA {archive_schema}"))
+    print(f"📦 Detached {name}" + (f" into schema {archive_schema}" if archive_schema else ""))
+
+
+def detach_older_than(connection, months, archive_schema, dry_run):
+    cutoff = months_before(date.today(), months)
+    partitions = list_partitions(connection)
+    # CONCURRENTLY avoids blocking writers but Postgres refuses it while a default partition exists
+    concurrently = DEFAULT_PARTITION not in {name for name, _, _ in partitions}
+
+    expired = [
+        name for name, _, _ in partitions
+        if partition_month(name) is not None and partition_month(name) < cutoff
+    ]
+    if not expired:
+        print(f"✅ No partitions older than {cutoff:%Y-%m}")
+        return
+    for name in expired:
+        if dry_run:
+            print(f"   would detach {name}")
+        else:
+            detach(connection, name, concurrently, archive_schema)
+
+
+def print_partitions(connection):
+    print(f"\n{'partition':<40} {'rows (est.)':>14} {'size MB':>10}")
+    for name, rows, size in list_partitions(connection):
+        print(f"{name:<40} {max(rows, 0):>14,} {size / 1024 / 1024:>10,.1f}")
+
+
+def check_default_partition(connection):
+    """Rows in the default partition block creating the partition for their month"""
+    if connection.execute(text("SELECT to_regclass(:name)"), {"name": DEFAULT_PARTITION}).scalar() is None:
+        return
+    stray = connection.execute(text(f"SELECT count(*) FROM {DEFAULT_PARTITION}")).scalar()
+    if stray:
+        print(f"⚠️  {stray:,} rows are in {DEFAULT_PARTITION}; create partitions further ahead/behind and move them")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Create and detach user_question_attempts partitions")
+    parser.add_argument("--months-ahead", type=int, default=3, help="Monthly partitions to keep ready ahead of now")
+    parser.add_argument("--detach-older-than", type=int, metavar="MONTHS", help="Detach partitions older than this many months")
+    parser.add_argument("--archive-schema", help="Move detached partitions into this schema")
+    parser.add_argument("--dry-run", action="store_true", help="Only report what would be detached")
+    parser.add_argument("--list", action="store_true", help="List partitions with sizes")
+    args = parser.parse_args()
+
+    print("MCAT Prep - Partition Maintenance")
+    print("=" * 50)
+    # DETACH ... CONCURRENTLY cannot run inside a transaction block
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as connection:
+        if not args.dry_run:
+            create_ahead(connection, args.months_ahead)
+        if args.detach_older_than is not None:
+            detach_older_than(connection, args.detach_older_than, args.archive_schema, args.dry_run)
+        check_default_partition(connection)
+        if args.list:
+            print_partitions(connection)
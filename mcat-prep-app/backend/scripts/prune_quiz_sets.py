@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+Retention for custom quiz question sets
+Deletes custom_quiz practice_tests rows that no user_quizzes row and no test
+attempt refers to, in batches of one transaction each. Sets younger than the
+grace period are kept, so quizzes created before user_quizzes existed are not
+removed while someone may still be about to start them. Sets being reused by a
+quiz creation right now are locked by it and skipped.
+
+Optionally it first deletes user quizzes older than N days that their user
+never started, which lets their sets go too.
+
+Run daily from cron:
+    python scripts/prune_quiz_sets.py
+    python scripts/prune_quiz_sets.py --quizzes-older-than 90 --grace-hours 24
+    python scripts/prune_quiz_sets.py --dry-run
+"""
+import sys
+import os
+import argparse
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import text
+from sqlalchemy.exc import IntegrityError
+from app.core.database import engine
+
+UNSTARTED_QUIZZES = """
+    SELECT q.id FROM user_quizzes q
+    WHERE q.created_at < now() - make_interval(days => :days)
+      AND NOT EXISTS (
+          SELECT 1 FROM user_test_attempts a
+          WHERE a.practice_test_id = q.practice_test_id AND a.user_id = q.user_id
+      )
+"""
+
+UNREFERENCED_SETS = """
+    SELECT p.id FROM practice_tests p
+    WHERE p.test_type = 'custom_quiz'
+      AND p.created_at < now() - make_interval(hours => :grace_hours)
+      AND NOT EXISTS (SELECT 1 FROM user_quizzes q WHERE q.practice_test_id = p.id)
+      AND NOT EXISTS (SELECT 1 FROM user_test_attempts a WHERE a.practice_test_id = p.id)
+"""
+
+
+def delete_in_batches(table, candidates, params, batch_size):
+    """Delete matching rows batch by batch; returns how many were deleted"""
+    statement = text(f"DELETE FROM {table} WHERE id IN ({candidates} LIMIT :batch FOR UPDATE SKIP LOCKED)")
+    deleted = 0
+    while True:
+        try:
+            with engine.begin() as connection:
+                count = connection.execute(statement, {**params, "batch": batch_size}).rowcount
+        except IntegrityError as e:
+            # A set was reused between our snapshot and our delete; it is left for the next run
+            print(f"   ⚠️  {table}: batch skipped, a row is referenced again ({e.orig.diag.message_primary})")
+            break
+        deleted += count
+        if count < batch_size:
+            break
+    return deleted
+
+
+def count(candidates, params):
+    with engine.connect() as connection:
+        return connection.execute(text(f"SELECT count(*) FROM ({candidates}) candidates"), params).scalar()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Delete custom quiz question sets nothing refers to")
+    parser.add_argument("--quizzes-older-than", type=int, metavar="DAYS",
+                        help="Also delete user quizzes older than this that were never started")
+    parser.add_argument("--grace-hours", type=int, default=24, help="Keep sets created this recently")
+    parser.add_argument("--batch-size", type=int, default=5000)
+    parser.add_argument("--dry-run", action="store_true", help="Only count what would be deleted")
+    args = parser.parse_args()
+
+    print("MCAT Prep - Quiz Set Retention")
+    print("=" * 50)
+    quiz_params = {"days": args.quizzes_older_than}
+    set_params = {"grace_hours": args.grace_hours}
+    if args.dry_run:
+        if args.quizzes_older_than is not None:
+            print(f"   would delete {count(UNSTARTED_QUIZZES, quiz_params):,} unstarted quizzes")
+        print(f"   would delete {count(UNREFERENCED_SETS, set_params):,} unreferenced sets")
+        print("   (sets of deleted quizzes are only counted on the next run)")
+        sys.exit(0)
+
+    if args.quizzes_older_than is not None:
+        deleted = delete_in_batches("user_quizzes", UNSTARTED_QUIZZES, quiz_params, args.batch_size)
+        print(f"🗑️  Deleted {deleted:,} quizzes never started in {args.quizzes_older_than} days")
+    deleted = delete_in_batches("practice_tests", UNREFERENCED_SETS, set_params, args.batch_size)
+    print(f"✅ Deleted {deleted:,} unreferenced quiz sets")
@@ -0,0 +1,224 @@
+#!/usr/bin/env python3
+"""
+Rebuild analytics rollups from raw attempts
+Recomputes user_daily_section_stats from user_question_attempts one month at a
+time (matching the attempt partitions), each month in its own transaction, so
+the backfill never holds locks on the whole table. Use it after the migration
+that adds the rollup, or to repair drift.
+
+Cohort percentile data (user_metric_totals and cohort_sketch_bins) is rebuilt
+from scratch in one transaction. Workers keep flushing their own deltas while
+it runs, so run it at a quiet time.
+
+Weekly Redis leaderboards are rebuilt for every week that is still retained,
+e.g. after Redis lost its data (--only leaderboard).
+
+Usage:
+    python scripts/rebuild_aggregates.py                      # full history
+    python scripts/rebuild_aggregates.py --since 2026-09-01
+    python scripts/rebuild_aggregates.py --only cohort
+    python scripts/rebuild_aggregates.py --only leaderboard
+"""
+import sys
+import os
+import time
+import argparse
+from datetime import date
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import text
+from app.core.config import settings
+from app.core.database import engine
+from app.services import leaderboard
+from app.services.cohort import ACCURACY, SECTION_SCORE, TOTAL_SCORE, SCORE_SECTIONS
+
+
+def _next_month(day):
+    return date(day.year + day.month // 12, day.month % 12 + 1, 1)
+
+
+def month_starts(first, last):
+    current = first.replace(day=1)
+    while current <= last:
+        yield current
+        current = _next_month(current)
+
+
+def rebuild_daily_section_stats(connection, month):
+    """Replace one month of rollup rows with totals recomputed from attempts"""
+    bounds = {"start": month, "stop": _next_month(month)}
+    connection.execute(
+        text("DELETE FROM user_daily_section_stats WHERE day >= :start AND day < :stop"), bounds
+    )
+    return connection.execute(
+        text(
+            """
+            INSERT INTO user_daily_section_stats (user_id, day, mcat_section, attempts, correct, seconds_spent)
+            SELECT a.user_id,
+                   (a.attempted_at AT TIME ZONE 'UTC')::date,
+                   q.mcat_section,
+                   count(*),
+                   count(*) FILTER (WHERE a.is_correct),
+                   COALESCE(sum(a.time_spent_seconds), 0)
+            FROM user_question_attempts a
+            JOIN questions q ON q.id = a.question_id
+            WHERE a.attempted_at >= (CAST(:start AS date) AT TIME ZONE 'UTC')
+              AND a.attempted_at < (CAST(:stop AS date) AT TIME ZONE 'UTC')
+            GROUP BY 1, 2, 3
+            """
+        ),
+        bounds,
+    ).rowcount
+
+
+def rebuild(since=None):
+    with engine.connect() as connection:
+        first = since or connection.execute(
+            text("SELECT (min(attempted_at) AT TIME ZONE 'UTC')::date FROM user_question_attempts")
+        ).scalar()
+    if first is None:
+        print("✅ No attempts, nothing to rebuild")
+        return
+
+    started = time.perf_counter()
+    total = 0
+    for month in month_starts(first, date.today()):
+        month_started = time.perf_counter()
+        with engine.begin() as connection:
+            rows = rebuild_daily_section_stats(connection, month)
+        total += rows
+        print(f"   {month:%Y-%m}: {rows:,} rollup rows ({time.perf_counter() - month_started:.1f}s)")
+    print(f"\n🎉 Rebuilt {total:,} daily section rows in {time.perf_counter() - started:,.1f}s")
+
+
+def _bin_sql(value_sql, spec):
+    """SQL twin of SketchSpec.bin"""
+    return (
+        f"LEAST(GREATEST(floor(({value_sql} - {spec.lo}) / {spec.step})::int, 0), {spec.bins - 1})"
+    )
+
+
+def rebuild_cohort():
+    started = time.perf_counter()
+    with engine.begin() as connection:
+        connection.execute(text("TRUNCATE user_metric_totals, cohort_sketch_bins"))
+        totals = connection.execute(
+            text(
+                """
+                INSERT INTO user_metric_totals (user_id, metric, attempts, correct)
+                SELECT a.user_id, 'accuracy:section:' || q.mcat_section, count(*), count(*) FILTER (WHERE a.is_correct)
+                FROM user_question_attempts a JOIN questions q ON q.id = a.question_id
+                GROUP BY 1, 2
+                UNION ALL
+                SELECT a.user_id, 'accuracy:concept:' || q.foundational_concept_id, count(*),
+                       count(*) FILTER (WHERE a.is_correct)
+                FROM user_question_attempts a JOIN questions q ON q.id = a.question_id
+                WHERE q.foundational_concept_id IS NOT NULL
+                GROUP BY 1, 2
+                """
+            )
+        ).rowcount
+        print(f"   user_metric_totals: {totals:,} rows")
+
+        accuracy_bin = _bin_sql("100.0 * correct / attempts", ACCURACY)
+        bins = connection.execute(
+            text(
+                f"""
+                INSERT INTO cohort_sketch_bins (metric, bin, count)
+                SELECT metric, {accuracy_bin}, count(*)
+                FROM user_metric_totals
+                WHERE attempts >= :min_attempts
+                GROUP BY 1, 2
+                """
+            ),
+            {"min_attempts": settings.COHORT_MIN_ATTEMPTS},
+        ).rowcount
+        for name, spec in [("total", TOTAL_SCORE)] + [(section, SECTION_SCORE) for section in SCORE_SECTIONS]:
+            bins += connection.execute(
+                text(
+                    f"""
+                    INSERT INTO cohort_sketch_bins (metric, bin, count)
+                    SELECT 'score:{name}', {_bin_sql(f"{name}_score", spec)}, count(*)
+                    FROM user_test_attempts
+                    WHERE status = 'completed' AND {name}_score IS NOT NULL
+                    GROUP BY 1, 2
+                    """
+                )
+            ).rowcount
+        print(f"   cohort_sketch_bins: {bins:,} rows")
+    print(f"\n🎉 Rebuilt cohort sketches in {time.perf_counter() - started:,.1f}s")
+
+
+def rebuild_leaderboard_week(connection, week):
+    start, stop = leaderboard.week_bounds(week)
+    bounds = {"start": start, "stop": stop}
+    counts = {
+        str(user_id): (attempts, correct)
+        for user_id, attempts, correct in connection.execute(
+            text(
+                """
+                SELECT user_id, count(*), count(*) FILTER (WHERE is_correct)
+                FROM user_question_attempts
+                WHERE attempted_at >= :start AND attempted_at < :stop
+                GROUP BY user_id
+                """
+            ),
+            bounds,
+        )
+    }
+    scores = {
+        str(user_id): score
+        for user_id, score in connection.execute(
+            text(
+                """
+                SELECT user_id, max(total_score)
+                FROM user_test_attempts
+                WHERE status = 'completed' AND total_score IS NOT NULL
+                  AND completed_at >= :start AND completed_at < :stop
+                GROUP BY user_id
+                """
+            ),
+            bounds,
+        )
+    }
+    names = {}
+    members = list(counts.keys() | scores.keys())
+    for offset in range(0, len(members), 10000):
+        names.update(
+            (str(user_id), full_name)
+            for user_id, full_name in connection.execute(
+                text("SELECT id, full_name FROM users WHERE id = ANY(CAST(:ids AS uuid[]))"),
+                {"ids": members[offset:offset + 10000]},
+            )
+        )
+    leaderboard.replace_week(week, counts, scores, names)
+    return len(counts), len(scores)
+
+
+def rebuild_leaderboards():
+    started = time.perf_counter()
+    with engine.connect() as connection:
+        for week in leaderboard.retained_weeks():
+            ranked, scored = rebuild_leaderboard_week(connection, week)
+            print(f"   {week}: {ranked:,} students answering, {scored:,} with test scores")
+    print(f"\n🎉 Rebuilt leaderboards in {time.perf_counter() - started:,.1f}s")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Recompute analytics rollups from user_question_attempts")
+    parser.add_argument("--since", type=date.fromisoformat, help="First month of daily stats to rebuild (YYYY-MM-DD)")
+    parser.add_argument("--only", choices=["daily", "cohort", "leaderboard"], help="Rebuild just one aggregate")
+    args = parser.parse_args()
+
+    print("MCAT Prep - Rebuild Analytics Aggregates")
+    print("=" * 50)
+    if args.only in (None, "daily"):
+        print("📈 user_daily_section_stats...")
+        rebuild(args.since)
+    if args.only in (None, "cohort"):
+        print("👥 Cohort percentile sketches...")
+        rebuild_cohort()
+    if args.only in (None, "leaderboard"):
+        print("🏆 Weekly leaderboards...")
+        rebuild_leaderboards()
@@ -11,9 +11,12 @@ import uuid
 
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
+from redis.exceptions import RedisError
 from sqlalchemy.orm import Session
 from app.core.database import SessionLocal
 from app.core.security import get_password_hash
+from app.services.content_version import bump_version
+from app.services.topic_closure import rebuild_topic_closure_in_session
 from app.models import (
     User,
     AAMCFoundationalConcept,
@@ -123,6 +126,8 @@ def create_comprehensive_content():
             topic = Topic(**t_data)
             db.add(topic)
             topics.append(topic)
+        db.flush()
+        rebuild_topic_closure_in_session(db)
         db.commit()
         db.refresh(topics[0])
         print(f"✅ Created {len(topics)} topics")
@@ -770,6 +775,12 @@ def create_comprehensive_content():
         db.commit()
         print(f"✅ Created {len(study_modules_data)} study modules")
 
+        # Workers rebuild their in-memory content (taxonomy, quiz candidates) when the version moves
+        try:
+            print(f"🔖 Content version is now {bump_version()}")
+        except RedisError as e:
+            print(f"⚠️  Could not bump the content version ({e}); workers keep cached content until restarted")
+
         print("\n🎉 Comprehensive MCAT content created successfully!")
         print(f"\n📊 Content Summary:")
         print(f"   - Users: {len(users)}")
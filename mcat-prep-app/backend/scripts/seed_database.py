@@ -10,9 +10,12 @@ from datetime import date
 # Add parent directory to path
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
+from redis.exceptions import RedisError
 from sqlalchemy.orm import Session
 from app.core.database import SessionLocal, engine, Base
 from app.core.security import get_password_hash
+from app.services.content_version import bump_version
+from app.services.topic_closure import rebuild_topic_closure_in_session
 from app.models import (
     User,
     AAMCFoundationalConcept,
@@ -157,6 +160,8 @@ def seed_database():
             topic = Topic(**topic_data)
             db.add(topic)
             topic_objects.append(topic)
+        db.flush()
+        rebuild_topic_closure_in_session(db)
         db.commit()
         print(f"✅ Created {len(topics)} topics")
 
@@ -350,6 +355,12 @@ def seed_database():
         db.commit()
         print(f"✅ Created {len(questions)} sample questions")
 
+        # Workers rebuild their in-memory content (taxonomy, quiz candidates) when the version moves
+        try:
+            print(f"🔖 Content version is now {bump_version()}")
+        except RedisError as e:
+            print(f"⚠️  Could not bump the content version ({e}); workers keep cached content until restarted")
+
         print("\n🎉 Database seeding completed successfully!")
         print("\n📝 Demo User Credentials:")
         print("   Email: demo@mcatprep.com")
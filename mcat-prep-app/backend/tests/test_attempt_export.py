@@ -0,0 +1,119 @@
+import asyncio
+import csv
+import io
+import json
+import tracemalloc
+import uuid
+from collections import namedtuple
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+
+import pytest
+from app.api.endpoints import users
+from app.api.endpoints.users import EXPORT_BATCH_SIZE, EXPORT_COLUMNS
+
+ROWS = 100_000
+PEAK_LIMIT_BYTES = 8 * 1024 * 1024  # the full NDJSON export is ~35 MB of text
+WELL_FORMED_ROWS = 2_500  # spans several batches
+
+ExportRow = namedtuple("ExportRow", EXPORT_COLUMNS)
+IDS = [uuid.uuid4() for _ in range(64)]
+
+
+class StreamingSession:
+    """Stands in for the read session: yields attempts batch by batch without holding them"""
+
+    def __init__(self, rows):
+        self.rows = rows
+        self.closed = False
+
+    def execute(self, stmt):
+        return self
+
+    def partitions(self):
+        started = datetime(2026, 1, 1, tzinfo=timezone.utc)
+        for offset in range(0, self.rows, EXPORT_BATCH_SIZE):
+            yield [
+                ExportRow(
+                    id=IDS[n % 64],
+                    question_id=IDS[n % 61],
+                    mcat_section="CARS",
+                    test_attempt_id=IDS[n % 59] if n % 3 == 0 else None,
+                    selected_answer="B",
+                    is_correct=n % 2 == 0,
+                    time_spent_seconds=n % 120,
+                    is_flagged=False,
+                    attempt_mode="practice",
+                    confidence_level=None,
+                    attempted_at=started + timedelta(seconds=n),
+                )
+                for n in range(offset, min(offset + EXPORT_BATCH_SIZE, self.rows))
+            ]
+
+    def close(self):
+        self.closed = True
+
+
+@pytest.fixture
+def export(monkeypatch):
+    """Streams the export of ``rows`` stubbed attempts through check_chunk; returns the session"""
+
+    def run(format, rows, check_chunk):
+        session = StreamingSession(rows)
+        monkeypatch.setattr(users, "open_read_session", lambda use_primary=False: session)
+        monkeypatch.setattr(users, "is_pinned_to_primary", lambda user_id: False)
+
+        async def stream():
+            response = await users.export_attempt_history(
+                format=format, since=None, current_user=SimpleNamespace(id=uuid.uuid4())
+            )
+            async for chunk in response.body_iterator:
+                check_chunk(chunk)
+
+        asyncio.run(stream())
+        return session
+
+    return run
+
+
+@pytest.mark.parametrize("format", ["ndjson", "csv"])
+def test_export_streams_in_bounded_memory(export, format):
+    lines = []
+    tracemalloc.start()
+    try:
+        session = export(format, ROWS, lambda chunk: lines.append(chunk.count("\n")))
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+    assert sum(lines) == ROWS + (format == "csv")
+    assert len(lines) >= ROWS // EXPORT_BATCH_SIZE
+    assert peak < PEAK_LIMIT_BYTES
+    assert session.closed
+
+
+def test_ndjson_export_is_well_formed(export):
+    chunks = []
+    export("ndjson", WELL_FORMED_ROWS, chunks.append)
+
+    assert all(chunk.endswith("\n") for chunk in chunks)
+    records = [json.loads(line) for line in "".join(chunks).splitlines()]
+    assert len(records) == WELL_FORMED_ROWS
+    assert all(list(record) == EXPORT_COLUMNS for record in records)
+    assert records[0]["test_attempt_id"] == str(IDS[0])
+    assert records[1]["test_attempt_id"] is None
+    assert datetime.fromisoformat(records[-1]["attempted_at"]).tzinfo is not None
+
+
+def test_csv_export_is_well_formed(export):
+    chunks = []
+    export("csv", WELL_FORMED_ROWS, chunks.append)
+
+    rows = list(csv.reader(io.StringIO("".join(chunks))))
+    assert rows[0] == EXPORT_COLUMNS
+    assert len(rows) == WELL_FORMED_ROWS + 1
+    assert all(len(row) == len(EXPORT_COLUMNS) for row in rows)
+    records = list(csv.DictReader(io.StringIO("".join(chunks))))
+    assert records[0]["is_correct"] == "True"
+    assert records[1]["test_attempt_id"] == ""
+    assert datetime.fromisoformat(records[-1]["attempted_at"]).tzinfo is not None
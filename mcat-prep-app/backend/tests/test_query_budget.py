@@ -0,0 +1,50 @@
+import uuid
+
+import pytest
+from fastapi.testclient import TestClient
+from app.core.query_stats import assert_max_queries
+from app.core.security import create_access_token
+from app.main import app
+from app.models.analytics import UserDailySectionStats, UserMetricTotals
+from app.models.content import Question
+from app.models.progress import ReviewQueue
+from app.models.test import UserQuestionAttempt
+from app.models.user import User
+
+SUBMIT_BUDGET = 5  # auth, question update, attempt insert, daily rollup, metric totals
+REVIEW_QUEUE_BUDGET = SUBMIT_BUDGET + 1  # incorrect and flagged answers also upsert the review queue
+
+
+@pytest.fixture
+def learner(db):
+    user = User(id=uuid.uuid4(), email=f"{uuid.uuid4()}@example.com", full_name="Budget Test")
+    question = Question(
+        id=uuid.uuid4(),
+        question_type="standalone",
+        mcat_section="CPBS",
+        question_text="Which option is correct?",
+        options={"A": "This one", "B": "Not this", "C": "Nor this", "D": "Nor this"},
+        correct_answer="A",
+    )
+    db.add_all([user, question])
+    db.commit()
+    yield user, question
+    for model in (UserQuestionAttempt, ReviewQueue, UserDailySectionStats, UserMetricTotals):
+        db.query(model).filter(model.user_id == user.id).delete()
+    db.query(Question).filter(Question.id == question.id).delete()
+    db.query(User).filter(User.id == user.id).delete()
+    db.commit()
+
+
+@pytest.mark.parametrize("selected_answer, budget", [("A", SUBMIT_BUDGET), ("B", REVIEW_QUEUE_BUDGET)])
+def test_submit_question_attempt_stays_within_query_budget(database, learner, selected_answer, budget):
+    user, question = learner
+    client = TestClient(app)
+    headers = {"Authorization": f"Bearer {create_access_token({'sub': str(user.id)})}"}
+    payload = {"question_id": str(question.id), "selected_answer": selected_answer, "time_spent_seconds": 40}
+
+    with assert_max_queries(database, budget):
+        response = client.post("/api/questions/attempt", json=payload, headers=headers)
+
+    assert response.status_code == 200
+    assert response.json()["is_correct"] is (selected_answer == "A")
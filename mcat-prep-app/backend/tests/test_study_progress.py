@@ -0,0 +1,116 @@
+import uuid
+
+import pytest
+from redis.exceptions import ConnectionError
+from app.models.content import StudyModule
+from app.models.progress import UserStudyProgress
+from app.models.user import User
+from app.services import study_progress
+from app.services.study_progress import HeartbeatBuffer
+
+
+class DownRedis:
+    """Every command fails as if Redis were unreachable"""
+
+    def __getattr__(self, name):
+        def fail(*args, **kwargs):
+            raise ConnectionError("Redis is down")
+
+        return fail
+
+
+@pytest.fixture
+def redis_down(monkeypatch):
+    monkeypatch.setattr(study_progress, "redis_client", DownRedis())
+
+
+def test_heartbeats_coalesce_into_one_row_per_pair(redis_down, monkeypatch):
+    batches = []
+    monkeypatch.setattr(
+        study_progress, "write_progress", lambda pending: batches.append(dict(pending)) or len(pending)
+    )
+    pairs = [(uuid.uuid4(), module_id) for module_id in (1, 2)] + [(uuid.uuid4(), 1)]
+    buffer = HeartbeatBuffer()
+    for _ in range(200):
+        for user_id, module_id in pairs:
+            buffer.record(user_id, module_id, 15)
+
+    written = buffer.flush()
+
+    assert written == len(pairs)
+    assert len(batches) == 1
+    assert {(str(user_id), module_id) for user_id, module_id in pairs} == set(batches[0])
+    assert all(entry[0] == 200 * 15 for entry in batches[0].values())
+    assert buffer.flush() == 0
+
+
+def test_failed_write_is_kept_for_the_next_flush(redis_down, monkeypatch):
+    def unavailable(pending):
+        raise RuntimeError("database unavailable")
+
+    monkeypatch.setattr(study_progress, "write_progress", unavailable)
+    buffer = HeartbeatBuffer()
+    user_id = uuid.uuid4()
+    buffer.record(user_id, 1, 15)
+    with pytest.raises(RuntimeError):
+        buffer.flush()
+
+    batches = []
+    monkeypatch.setattr(
+        study_progress, "write_progress", lambda pending: batches.append(dict(pending)) or len(pending)
+    )
+    buffer.record(user_id, 1, 15)
+    assert buffer.flush() == 1
+    assert batches[0][(str(user_id), 1)][0] == 30
+
+
+@pytest.fixture
+def reader(db):
+    user = User(id=uuid.uuid4(), email=f"{uuid.uuid4()}@example.com", full_name="Heartbeat Test")
+    modules = [
+        StudyModule(title="Timed", mcat_section="BBLS", content_type="text", content={}, estimated_time_minutes=1),
+        StudyModule(title="Untimed", mcat_section="BBLS", content_type="text", content={}),
+    ]
+    db.add(user)
+    db.add_all(modules)
+    db.commit()
+    yield user, modules
+    db.query(UserStudyProgress).filter(UserStudyProgress.user_id == user.id).delete()
+    db.query(StudyModule).filter(StudyModule.id.in_([module.id for module in modules])).delete()
+    db.query(User).filter(User.id == user.id).delete()
+    db.commit()
+
+
+def _progress(db, user_id, module_id):
+    db.expire_all()
+    return (
+        db.query(UserStudyProgress)
+        .filter(UserStudyProgress.user_id == user_id, UserStudyProgress.study_module_id == module_id)
+        .one()
+    )
+
+
+def test_flushed_heartbeats_move_progress_to_completed(redis_down, db, reader):
+    user, (timed, untimed) = reader
+    buffer = HeartbeatBuffer()
+    for _ in range(2):
+        buffer.record(user.id, timed.id, 15)
+        buffer.record(user.id, untimed.id, 15)
+    assert buffer.flush() == 2
+    for module in (timed, untimed):
+        progress = _progress(db, user.id, module.id)
+        assert (progress.status, progress.time_spent_seconds) == ("in_progress", 30)
+
+    # 0.9 of the one-minute estimate completes the timed module; the untimed one needs an explicit finish
+    for _ in range(2):
+        buffer.record(user.id, timed.id, 15)
+    buffer.record(user.id, untimed.id, 15)
+    buffer.flush()
+    progress = _progress(db, user.id, timed.id)
+    assert (progress.status, progress.time_spent_seconds) == ("completed", 60)
+    assert progress.completed_at is not None
+    assert _progress(db, user.id, untimed.id).status == "in_progress"
+
+    buffer.record(user.id, untimed.id, 5, completed=True)
+    buffer.flush()
+    assert _progress(db, user.id, untimed.id).status == "completed"